@@ -0,0 +1,90 @@
+"""
+Maintenance commands, run next to the API against the same DATABASE_URL:
+
+    python -m app.cli schema    # create or upgrade the tables
+    python -m app.cli rollups   # rebuild the stats rollups from the tasks and events
+    python -m app.cli archive   # move old completed tasks and past events to the archive
+    python -m app.cli backup [full|incremental]
+    python -m app.cli restore <name> <path>    # with the API stopped
+"""
+import argparse
+import importlib
+import logging
+import sys
+from typing import List, Optional
+
+from app.core import archive as archiver
+from app.core import backup as backups
+from app.core import rollups as rollup_tables
+from app.core import writer
+from app.core.database import engine
+from app.core.schema import MODEL_MODULES, ensure_schema
+
+logger = logging.getLogger("app.cli")
+
+
+def schema(args: argparse.Namespace) -> int:
+    """Create or upgrade the tables; a one-off migration before a deploy."""
+    logger.info(f"Database schema {ensure_schema(engine)}")
+    return 0
+
+
+def rollups(args: argparse.Namespace) -> int:
+    """Recompute the stats rollups from the tasks and events tables."""
+    ensure_schema(engine)
+    with engine.execution_options(sqlite_immediate=True).begin() as conn:
+        logger.info(f"Rebuilt {rollup_tables.rebuild(conn)} rollup rows")
+    return 0
+
+
+def archive(args: argparse.Namespace) -> int:
+    """Run one archiving pass over completed tasks and past events."""
+    ensure_schema(engine)
+    try:
+        logger.info(f"Archived {archiver.run_once()} rows")
+    finally:
+        writer.stop()
+    return 0
+
+
+def backup(args: argparse.Namespace) -> int:
+    """Take a full or incremental snapshot into BACKUP_DIR."""
+    for module in MODEL_MODULES:  # Base.metadata lists the tables to COPY
+        importlib.import_module(module)
+    job = backups.run(args.kind)  # logs its own summary
+    if job.status != "done":
+        logger.error(f"Backup {job.id} failed: {job.error}")
+        return 1
+    return 0
+
+
+def restore(args: argparse.Namespace) -> int:
+    """Rebuild a SQLite snapshot from its full snapshot and the incrementals up to it."""
+    logger.info(f"Restored {args.name} to {args.path} from {backups.restore(args.name, args.path)} snapshots")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="8alls API maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("schema", help=schema.__doc__).set_defaults(handler=schema)
+    commands.add_parser("rollups", help=rollups.__doc__).set_defaults(handler=rollups)
+    commands.add_parser("archive", help=archive.__doc__).set_defaults(handler=archive)
+    parser_backup = commands.add_parser("backup", help=backup.__doc__)
+    parser_backup.add_argument("kind", nargs="?", choices=(backups.FULL, backups.INCREMENTAL), default=backups.FULL)
+    parser_backup.set_defaults(handler=backup)
+    parser_restore = commands.add_parser("restore", help=restore.__doc__)
+    parser_restore.add_argument("name", help="snapshot name, e.g. 20261019T020000000Z-incr")
+    parser_restore.add_argument("path", help="database file to write")
+    parser_restore.set_defaults(handler=restore)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""Admission control and load shedding.
+
+The API runs on a single shared CPU with 256 MB of memory. Without a limit,
+a burst queues unbounded work in the threadpool and the session pool until
+the health check times out and the machine is restarted. This middleware
+caps concurrent requests, holds a bounded number in a priority queue, and
+answers everything else immediately with 503 (server busy) or 429 (client
+over its rate limit), both with Retry-After.
+
+Lanes, highest priority first:
+- CRITICAL: health check and metrics — always admitted, never rate limited
+- INTERACTIVE: single-item reads and writes
+- BULK: collection listings, batch requests and exports
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from typing import Dict, List, Tuple
+
+from app.core.auth import valid_api_key
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, registry
+
+CRITICAL = 0
+INTERACTIVE = 1
+BULK = 2
+LANE_NAMES = {CRITICAL: "critical", INTERACTIVE: "interactive", BULK: "bulk"}
+
+CRITICAL_PATHS = ("/health", "/metrics")
+BULK_PREFIXES = ("/api/batch", "/api/calendar")
+
+ADMISSION_REQUESTS = registry.register(Counter(
+    "admission_requests_total",
+    "Requests by lane and outcome (admitted, queued, shed, rate_limited).",
+    ("lane", "outcome"),
+))
+ADMISSION_IN_FLIGHT = registry.register(Gauge(
+    "admission_in_flight", "Requests currently being served."
+))
+ADMISSION_QUEUE_DEPTH = registry.register(Gauge(
+    "admission_queue_depth", "Requests waiting for a slot."
+))
+ADMISSION_QUEUE_WAIT = registry.register(Histogram(
+    "admission_queue_wait_seconds", "Time queued requests waited for a slot.", ("lane",)
+))
+
+
+def classify(method: str, path: str) -> int:
+    """Pick the lane for a request."""
+    if path in CRITICAL_PATHS:
+        return CRITICAL
+    if path.startswith(BULK_PREFIXES) or path.rstrip("/").endswith("export-to-vault"):
+        return BULK
+    parts = [part for part in path.split("/") if part]
+    if method == "GET" and len(parts) <= 2:
+        return BULK  # /api/<collection>
+    return INTERACTIVE
+
+
+class ConcurrencyLimiter:
+    """Slot counter with a bounded priority wait queue."""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    def _queued(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    def _update_gauges(self) -> None:
+        ADMISSION_IN_FLIGHT.set(self.active)
+        ADMISSION_QUEUE_DEPTH.set(self._queued())
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free and nobody is waiting."""
+        if self.active < self.max_concurrency and not self._queued():
+            self.active += 1
+            self._update_gauges()
+            return True
+        return False
+
+    def enqueue(self, lane: int) -> asyncio.Future:
+        """
+        Queue for a slot. The returned future resolves True when a slot is
+        handed over, or False if the request was shed. When the queue is full
+        the lowest-priority (then newest) waiter is shed to make room, unless
+        the new request is itself the lowest priority.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        live = [w for w in self._waiters if not w[2].done()]
+        if len(live) >= self.max_queue:
+            worst = max(live, key=lambda w: (w[0], w[1]))
+            if worst[0] <= lane:
+                fut.set_result(False)
+                return fut
+            worst[2].set_result(False)
+        heapq.heappush(self._waiters, (lane, next(self._counter), fut))
+        self._update_gauges()
+        return fut
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the highest-priority waiter."""
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(True)  # slot passes over without decrementing
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets."""
+
+    MAX_KEYS = 10000
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, key: str) -> float:
+        """Consume one token; return 0 on success or the seconds until one is available."""
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            wait = (1 - tokens) / self.rate
+        if len(self._buckets) > self.MAX_KEYS:
+            # Full buckets carry no state worth keeping
+            self._buckets = {
+                k: (t, ts) for k, (t, ts) in self._buckets.items()
+                if t + (now - ts) * self.rate < self.burst
+            }
+        return wait
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying the rate limiter and the concurrency limiter."""
+
+    def __init__(
+        self,
+        app,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        rate_limit: float,
+        rate_burst: int,
+    ):
+        self.app = app
+        self.queue_timeout = queue_timeout
+        self.limiter = ConcurrencyLimiter(max_concurrency, max_queue) if max_concurrency > 0 else None
+        self.buckets = TokenBucketLimiter(rate_limit, rate_burst) if rate_limit > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        lane = classify(scope["method"], scope["path"])
+        lane_name = LANE_NAMES[lane]
+        if lane == CRITICAL:
+            ADMISSION_REQUESTS.inc(lane=lane_name, outcome="admitted")
+            await self.app(scope, receive, send)
+            return
+
+        if self.buckets is not None:
+            wait = self.buckets.take(_client_key(scope))
+            if wait:
+                ADMISSION_REQUESTS.inc(lane=lane_name, outcome="rate_limited")
+                await _reject(send, 429, "Rate limit exceeded", wait)
+                return
+
+        if self.limiter is None:
+            ADMISSION_REQUESTS.inc(lane=lane_name, outcome="admitted")
+            await self.app(scope, receive, send)
+            return
+
+        if not self.limiter.try_acquire():
+            ADMISSION_REQUESTS.inc(lane=lane_name, outcome="queued")
+            start = time.perf_counter()
+            fut = self.limiter.enqueue(lane)
+            try:
+                await asyncio.wait({fut}, timeout=self.queue_timeout)
+            except asyncio.CancelledError:
+                # The client went away while queued: give back a slot handed over meanwhile,
+                # otherwise withdraw so release() does not hand one to this dead waiter
+                if fut.done() and not fut.cancelled() and fut.result():
+                    self.limiter.release()
+                else:
+                    fut.cancel()
+                    self.limiter._update_gauges()
+                raise
+            ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - start, lane=lane_name)
+            if not fut.done():
+                fut.cancel()
+                self.limiter._update_gauges()
+            if fut.cancelled() or not fut.result():
+                ADMISSION_REQUESTS.inc(lane=lane_name, outcome="shed")
+                await _reject(send, 503, "Server busy", 1)
+                return
+
+        ADMISSION_REQUESTS.inc(lane=lane_name, outcome="admitted")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
+
+
+def _client_key(scope) -> str:
+    """
+    Rate-limit key: the API key if it is valid, otherwise the client address.
+    An unchecked header would let a client pick a fresh bucket per request.
+
+    Behind TRUSTED_PROXY_HOPS reverse proxies the socket address is the
+    nearest proxy's, so the address is taken from X-Forwarded-For instead:
+    the entry the outermost trusted proxy appended. Entries before it are
+    whatever the client sent and are ignored.
+    """
+    forwarded = None
+    for name, value in scope.get("headers", []):
+        if name == b"x-api-key" and valid_api_key(value.decode("latin-1")):
+            return "key:api"
+        if name == b"x-forwarded-for":
+            forwarded = value.decode("latin-1")
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0 and forwarded:
+        addresses = [address.strip() for address in forwarded.split(",") if address.strip()]
+        if len(addresses) >= hops:
+            return "ip:" + addresses[-hops]
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    """Send a small JSON error with Retry-After without touching the app."""
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
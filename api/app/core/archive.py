@@ -0,0 +1,169 @@
+"""Hot/cold split of tasks and events.
+
+Tasks completed more than ARCHIVE_TASKS_AFTER_DAYS ago and one-off events
+that ended more than ARCHIVE_EVENTS_AFTER_DAYS ago are moved to the
+``archived_tasks`` and ``archived_events`` tables, so the tables every list,
+search and calendar query reads only hold the working set. Recurring series
+stay in ``events``: they keep producing occurrences.
+
+The move runs in the background every ARCHIVE_INTERVAL_SECONDS (in one
+worker), ARCHIVE_BATCH_SIZE rows per write job, each job copying the rows
+and deleting them from the hot table in one transaction. ``python -m
+app.cli archive`` runs one pass.
+
+Archived rows keep their tag index rows and their share of the stats
+rollups. Routes read them with ``include_archived=true``, which swaps the
+model for ``task_source``/``event_source``: a UNION ALL of both tables that
+maps onto the hot model, so filters and ordering work unchanged. They are
+read-only apart from DELETE.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, insert, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from app.core import tags as tag_index
+from app.core import workers, writer
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import Counter, registry
+from app.core.timeutils import to_epoch
+from app.models.archive import ArchivedEvent, ArchivedTask
+from app.models.event import Event
+from app.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+ROWS_ARCHIVED = registry.register(Counter(
+    "rows_archived_total", "Tasks and events moved to the archive tables.", ("item_type",)
+))
+
+
+def _columns(model, archive) -> tuple:
+    """(hot columns, matching archive columns), in the hot table's order."""
+    names = [column.name for column in model.__table__.columns]
+    return names, [archive.__table__.c[name] for name in names]
+
+
+def _source(model, archive, name: str, include_archived: bool):
+    if not include_archived:
+        return model
+    names, archived = _columns(model, archive)
+    both = union_all(select(*(model.__table__.c[n] for n in names)), select(*archived)).subquery(name)
+    return aliased(model, both)
+
+
+def task_source(include_archived: bool):
+    """The entity to query tasks through: Task, or Task over both tables."""
+    return _source(Task, ArchivedTask, "all_tasks", include_archived)
+
+
+def event_source(include_archived: bool):
+    """The entity to query events through: Event, or Event over both tables."""
+    return _source(Event, ArchivedEvent, "all_events", include_archived)
+
+
+def _move(db: Session, model, archive, ids: List[str]) -> None:
+    names, _ = _columns(model, archive)
+    db.execute(
+        insert(archive).from_select(names, select(*(model.__table__.c[n] for n in names)).where(model.id.in_(ids)))
+    )
+    db.execute(delete(model).where(model.id.in_(ids)))
+
+
+def _archive_batch(db: Session, item_type: str, model, archive, condition) -> List[str]:
+    """Move up to ARCHIVE_BATCH_SIZE rows matching `condition`; return their ids."""
+    ids = list(db.scalars(select(model.id).where(condition).limit(settings.ARCHIVE_BATCH_SIZE)))
+    if ids:
+        _move(db, model, archive, ids)
+        for item_id in ids:
+            workers.record(db, item_type, item_id, "archived")
+    return ids
+
+
+def _task_condition(now: datetime):
+    cutoff = now - timedelta(days=settings.ARCHIVE_TASKS_AFTER_DAYS)
+    return (Task.completed == True) & (Task.completed_epoch < to_epoch(cutoff))  # noqa: E712
+
+
+def _event_condition(now: datetime):
+    cutoff = now - timedelta(days=settings.ARCHIVE_EVENTS_AFTER_DAYS)
+    return Event.recurrence_rule.is_(None) & (Event.end_epoch < to_epoch(cutoff))
+
+
+def _forget(item_type: str, ids: List[str]) -> None:
+    """Drop archived items from this worker's in-memory state."""
+    from app.core import freebusy, suggest
+
+    # Archived events ended days ago, so they have no pending reminders
+    for item_id in ids:
+        suggest.index.remove(item_type, item_id)
+    if item_type == tag_index.EVENT:
+        freebusy.invalidate()
+
+
+def run_once(now: Optional[datetime] = None) -> int:
+    """Archive everything past its cutoff, batch by batch; return the rows moved."""
+    now = now or datetime.now(timezone.utc)
+    plans = []
+    if settings.ARCHIVE_TASKS_AFTER_DAYS > 0:
+        plans.append((tag_index.TASK, Task, ArchivedTask, _task_condition(now)))
+    if settings.ARCHIVE_EVENTS_AFTER_DAYS > 0:
+        plans.append((tag_index.EVENT, Event, ArchivedEvent, _event_condition(now)))
+
+    moved = 0
+    db = SessionLocal()
+    try:
+        for item_type, model, archive, condition in plans:
+            while True:
+                ids = writer.run(db, lambda db: _archive_batch(db, item_type, model, archive, condition))
+                db.rollback()  # fresh snapshot for the next batch
+                if not ids:
+                    break
+                _forget(item_type, ids)
+                ROWS_ARCHIVED.inc(len(ids), item_type=item_type)
+                moved += len(ids)
+                if len(ids) < settings.ARCHIVE_BATCH_SIZE:
+                    break
+    finally:
+        db.close()
+    if moved:
+        logger.info(f"Archived {moved} completed tasks and past events")
+    return moved
+
+
+class Archiver:
+    """Runs ``run_once`` every ARCHIVE_INTERVAL_SECONDS."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.to_thread(run_once)
+            except Exception as e:
+                logger.error(f"Archiving failed: {e}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+
+
+archiver = Archiver(settings.ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,18 @@
+"""API key check for admin routes."""
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def valid_api_key(value: Optional[str]) -> bool:
+    """Whether `value` is the configured API_KEY."""
+    return value is not None and secrets.compare_digest(value, settings.API_KEY)
+
+
+def require_api_key(x_api_key: Optional[str] = Header(None)) -> None:
+    """Dependency: reject requests without the configured API_KEY in X-API-Key."""
+    if not valid_api_key(x_api_key):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-API-Key")
@@ -0,0 +1,407 @@
+"""Online backups while the API keeps serving.
+
+SQLite snapshots use the online backup API: BACKUP_PAGES_PER_STEP pages per
+step with a BACKUP_STEP_SLEEP_MS pause between steps, each step holding only
+a shared lock. The source connection keeps one read transaction open for
+the whole copy, so WAL serves it a fixed snapshot while the writer commits;
+without it the copy restarts every time another connection writes.
+
+Snapshots in BACKUP_DIR, each with a ``<name>.json`` manifest (parent, page
+counts, timings):
+
+- full: ``<stamp>-full.db``, a plain database file
+- incremental: ``<stamp>-incr.db``, the pages that differ from the previous
+  snapshot (table ``pages(pgno, data)``). The copy is taken like a full one
+  into a scratch file and compared page by page with the image of the
+  previous snapshot (``.image-<name>.db``), which it then replaces.
+
+``python -m app.cli restore <name> <path>`` rebuilds a snapshot from
+its full snapshot and the incrementals up to it.
+
+PostgreSQL snapshots are full only: every table streamed with ``COPY ... TO
+STDOUT`` into ``<stamp>-full/<table>.copy`` inside one REPEATABLE READ READ
+ONLY transaction, like pg_dump; load them back with ``COPY ... FROM STDIN``.
+
+Backups run from POST /api/backups and, every BACKUP_INTERVAL_SECONDS, in
+the leader worker. One runs at a time across workers.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional, Tuple
+
+from app.core import workers
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.core.metrics import Counter, Gauge, Histogram, registry
+from app.schemas.backup import BackupJob, BackupSnapshot
+
+logger = logging.getLogger(__name__)
+
+FULL = "full"
+INCREMENTAL = "incremental"
+
+BACKUPS = registry.register(Counter(
+    "backups_total", "Backup runs by kind and outcome.", ("kind", "outcome")
+))
+BACKUP_DURATION = registry.register(Histogram(
+    "backup_duration_seconds", "Time to take a backup snapshot.", ("kind",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+))
+BACKUP_LAST_SUCCESS = registry.register(Gauge(
+    "backup_last_success_timestamp_seconds", "Unix time of the last snapshot written.", ("kind",)
+))
+
+# This worker's recent jobs, newest last
+jobs: Deque[BackupJob] = deque(maxlen=20)
+
+
+class BackupError(Exception):
+    """A backup that cannot be taken as asked."""
+
+
+class BackupInProgress(BackupError):
+    """Another backup is running, in this worker or another."""
+
+
+def _dir() -> str:
+    os.makedirs(settings.BACKUP_DIR, exist_ok=True)
+    return settings.BACKUP_DIR
+
+
+def _path(name: str) -> str:
+    return os.path.join(settings.BACKUP_DIR, name)
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _sqlite_path() -> str:
+    path = engine.url.database
+    if not path or path == ":memory:":
+        raise BackupError("An in-memory database cannot be backed up")
+    return path
+
+
+def snapshots() -> List[BackupSnapshot]:
+    """Every snapshot with a manifest, oldest first."""
+    found = []
+    for manifest in sorted(glob.glob(os.path.join(settings.BACKUP_DIR, "*.json"))):
+        with open(manifest) as f:
+            found.append(BackupSnapshot.model_validate(json.load(f)))
+    return found
+
+
+def _manifest(name: str) -> BackupSnapshot:
+    try:
+        with open(_path(f"{name}.json")) as f:
+            return BackupSnapshot.model_validate(json.load(f))
+    except FileNotFoundError:
+        raise BackupError(f"No snapshot named {name}") from None
+
+
+def _write_manifest(snapshot: BackupSnapshot) -> None:
+    tmp = _path(f".{snapshot.name}.json.tmp")
+    with open(tmp, "w") as f:
+        f.write(snapshot.model_dump_json(indent=2))
+    os.replace(tmp, _path(f"{snapshot.name}.json"))
+
+
+def _latest_image() -> Optional[Tuple[str, str]]:
+    """(snapshot name, path) of the image of the newest SQLite snapshot, if any."""
+    images = sorted(glob.glob(os.path.join(settings.BACKUP_DIR, ".image-*.db")))
+    if not images:
+        return None
+    name = os.path.basename(images[-1])[len(".image-"):-len(".db")]
+    return name, images[-1]
+
+
+def _set_image(name: str, source: str) -> None:
+    """Make `source` the image of snapshot `name`, replacing older images."""
+    image = _path(f".image-{name}.db")
+    if source.endswith("-full.db"):
+        try:
+            os.link(source, image)  # images are replaced, never written in place
+        except OSError:
+            shutil.copyfile(source, image)
+    else:
+        os.replace(source, image)
+    for old in glob.glob(os.path.join(settings.BACKUP_DIR, ".image-*.db")):
+        if old != image:
+            os.remove(old)
+
+
+def _copy_sqlite(dest: str, job: BackupJob) -> None:
+    """Online backup of the database into `dest`, step by step."""
+    source = sqlite3.connect(_sqlite_path(), isolation_level=None, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(dest)
+
+    def progress(status, remaining, total):
+        job.total, job.done = total, total - remaining
+        job.steps += 1
+        if remaining:
+            time.sleep(settings.BACKUP_STEP_SLEEP_MS / 1000)  # ``sleep`` below only applies after SQLITE_BUSY
+
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()  # pin the snapshot
+        source.backup(
+            target, pages=settings.BACKUP_PAGES_PER_STEP, progress=progress,
+            sleep=settings.BACKUP_STEP_SLEEP_MS / 1000,
+        )
+        source.execute("COMMIT")
+    finally:
+        target.close()
+        source.close()
+
+
+def _page_size(path: str) -> int:
+    with open(path, "rb") as f:
+        f.seek(16)
+        size = int.from_bytes(f.read(2), "big")
+    return 65536 if size == 1 else size
+
+
+def _diff_pages(old: str, new: str, delta: str) -> Tuple[int, int]:
+    """Store the pages of `new` that differ from `old` in `delta`; return (pages in new, pages stored)."""
+    page_size = _page_size(new)
+    changed = 0
+    out = sqlite3.connect(delta)
+    try:
+        out.execute("CREATE TABLE pages (pgno INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+        with open(old, "rb") as before, open(new, "rb") as after:
+            pgno = 0
+            while True:
+                page = after.read(page_size)
+                if not page:
+                    break
+                pgno += 1
+                if page != before.read(page_size):
+                    out.execute("INSERT INTO pages VALUES (?, ?)", (pgno, page))
+                    changed += 1
+        out.commit()
+    finally:
+        out.close()
+    return pgno, changed
+
+
+def _snapshot_sqlite(job: BackupJob, name: str, started: float) -> BackupSnapshot:
+    latest = _latest_image() if job.kind == INCREMENTAL else None
+    if job.kind == INCREMENTAL and latest is None:
+        job.kind = FULL  # nothing to compare with yet
+        name = name.replace("-incr", "-full")
+    job.snapshot = name
+
+    copy = _path(f".{name}.tmp")
+    _copy_sqlite(copy, job)
+    job.timings_ms["copy"] = _elapsed_ms(started)
+
+    if job.kind == FULL:
+        os.replace(copy, _path(f"{name}.db"))
+        pages = changed = job.total
+        parent = None
+        _set_image(name, _path(f"{name}.db"))
+    else:
+        parent, image = latest
+        diff_start = time.perf_counter()
+        delta = _path(f".{name}.delta.tmp")
+        pages, changed = _diff_pages(image, copy, delta)
+        os.replace(delta, _path(f"{name}.db"))
+        _set_image(name, copy)
+        job.timings_ms["diff"] = _elapsed_ms(diff_start)
+
+    return BackupSnapshot(
+        name=name, kind=job.kind, file=f"{name}.db", parent=parent, dialect="sqlite",
+        created_at=job.started_at, pages=pages, changed_pages=changed,
+        bytes=os.path.getsize(_path(f"{name}.db")), timings_ms={},
+    )
+
+
+def _snapshot_postgres(job: BackupJob, name: str, started: float) -> BackupSnapshot:
+    if job.kind == INCREMENTAL:
+        raise BackupError("Incremental backups need SQLite; take a full backup")
+    job.snapshot = name
+    job.unit = "tables"
+    tables = Base.metadata.sorted_tables
+    job.total = len(tables)
+    copy = _path(f".{name}.tmp")
+    os.makedirs(copy)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        for table in tables:
+            with open(os.path.join(copy, f"{table.name}.copy"), "wb") as f:
+                cursor.copy_expert(f'COPY "{table.name}" TO STDOUT', f)
+            job.done += 1
+            job.steps += 1
+        raw.rollback()
+    finally:
+        raw.close()
+    os.replace(copy, _path(name))
+    job.timings_ms["copy"] = _elapsed_ms(started)
+    size = sum(os.path.getsize(os.path.join(_path(name), f)) for f in os.listdir(_path(name)))
+    return BackupSnapshot(
+        name=name, kind=FULL, file=name, dialect="postgresql", created_at=job.started_at,
+        pages=len(tables), changed_pages=len(tables), bytes=size, timings_ms={},
+    )
+
+
+def _prune() -> None:
+    """Delete snapshots older than the newest BACKUP_KEEP_FULL full ones."""
+    if settings.BACKUP_KEEP_FULL <= 0:
+        return
+    fulls = [s.name for s in snapshots() if s.kind == FULL]
+    if len(fulls) <= settings.BACKUP_KEEP_FULL:
+        return
+    keep_from = fulls[-settings.BACKUP_KEEP_FULL]
+    for snapshot in snapshots():
+        if snapshot.name < keep_from:
+            target = _path(snapshot.file)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            elif os.path.exists(target):
+                os.remove(target)
+            os.remove(_path(f"{snapshot.name}.json"))
+            logger.info(f"Deleted backup {snapshot.name}")
+
+
+def _begin(kind: str):
+    lock = workers.try_lock("backup")
+    if lock is None:
+        raise BackupInProgress("A backup is already running")
+    job = BackupJob(id=uuid.uuid4().hex[:12], kind=kind, started_at=datetime.now(timezone.utc))
+    jobs.append(job)
+    return job, lock
+
+
+def _finish(job: BackupJob, lock) -> BackupJob:
+    started = time.perf_counter()
+    stamp = job.started_at.strftime("%Y%m%dT%H%M%S%f")[:-3] + "Z"
+    try:
+        _dir()
+        if engine.dialect.name == "sqlite":
+            snapshot = _snapshot_sqlite(job, f"{stamp}-{'incr' if job.kind == INCREMENTAL else 'full'}", started)
+        else:
+            snapshot = _snapshot_postgres(job, f"{stamp}-full", started)
+        job.timings_ms["total"] = _elapsed_ms(started)
+        snapshot.timings_ms = dict(job.timings_ms)
+        _write_manifest(snapshot)
+        if job.kind == FULL:
+            _prune()
+    except Exception as e:
+        job.status, job.error = "failed", str(e)
+        BACKUPS.inc(kind=job.kind, outcome="error")
+        logger.error(f"Backup {job.id} failed: {e}")
+        for leftover in glob.glob(os.path.join(settings.BACKUP_DIR, f".{stamp}-*.tmp")):
+            shutil.rmtree(leftover) if os.path.isdir(leftover) else os.remove(leftover)
+    else:
+        job.status = "done"
+        BACKUPS.inc(kind=job.kind, outcome="ok")
+        BACKUP_DURATION.observe(time.perf_counter() - started, kind=job.kind)
+        BACKUP_LAST_SUCCESS.set(time.time(), kind=job.kind)
+        logger.info(
+            f"Backup {snapshot.name}: {snapshot.changed_pages}/{snapshot.pages} {job.unit}, "
+            f"{snapshot.bytes} bytes in {job.timings_ms['total']:.0f} ms"
+        )
+    finally:
+        job.finished_at = datetime.now(timezone.utc)
+        lock.close()
+    return job
+
+
+def start(kind: str = FULL) -> BackupJob:
+    """Start a backup in a background thread and return its job (raises BackupInProgress)."""
+    job, lock = _begin(kind)
+    threading.Thread(target=_finish, args=(job, lock), name=f"backup-{job.id}", daemon=True).start()
+    return job
+
+
+def run(kind: str = FULL) -> BackupJob:
+    """Take a backup in this thread and return its finished job."""
+    return _finish(*_begin(kind))
+
+
+def _scheduled_kind() -> str:
+    """Incremental, unless the chain since the last full snapshot is BACKUP_FULL_EVERY long."""
+    if engine.dialect.name != "sqlite" or settings.BACKUP_FULL_EVERY <= 1:
+        return FULL
+    chain = 0
+    for snapshot in reversed(snapshots()):
+        if snapshot.kind == FULL:
+            break
+        chain += 1
+    else:
+        return FULL
+    return FULL if chain + 1 >= settings.BACKUP_FULL_EVERY else INCREMENTAL
+
+
+def restore(name: str, dest: str) -> int:
+    """Write SQLite snapshot `name` to `dest`; return the number of snapshots applied."""
+    chain = [_manifest(name)]
+    while chain[-1].kind == INCREMENTAL:
+        chain.append(_manifest(chain[-1].parent))
+    if chain[-1].dialect != "sqlite":
+        raise BackupError("PostgreSQL snapshots are restored with COPY ... FROM STDIN")
+    base = chain.pop()
+    shutil.copyfile(_path(base.file), dest)
+    page_size = _page_size(dest)
+    with open(dest, "r+b") as f:
+        for snapshot in reversed(chain):
+            delta = sqlite3.connect(_path(snapshot.file))
+            try:
+                for pgno, data in delta.execute("SELECT pgno, data FROM pages"):
+                    f.seek((pgno - 1) * page_size)
+                    f.write(data)
+            finally:
+                delta.close()
+            f.truncate(snapshot.pages * page_size)
+    return len(chain) + 1
+
+
+class BackupScheduler:
+    """Takes a backup every BACKUP_INTERVAL_SECONDS."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stop.is_set():
+                return
+            try:
+                await asyncio.to_thread(run, _scheduled_kind())
+            except BackupInProgress:
+                logger.info("Skipped a scheduled backup: another one is running")
+            except Exception as e:
+                logger.error(f"Scheduled backup failed: {e}")
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+
+
+scheduler = BackupScheduler(settings.BACKUP_INTERVAL_SECONDS)
@@ -1,6 +1,6 @@
 """Application configuration."""
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -13,12 +13,75 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./8alls.db"
+    # SQLite: how long a writer waits for another process's write lock
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # SQLite: max write jobs committed together in one transaction by the writer thread
+    WRITE_BATCH_SIZE: int = 64
+
+    # Uvicorn worker processes (uvicorn reads the same variable). With more than one,
+    # workers exchange task/event changes through the database every WORKER_SYNC_SECONDS.
+    # Each worker has its own SQLite writer, metrics, admission limits and rate-limit
+    # buckets: the limits below apply per worker, and /metrics reports one worker.
+    WEB_CONCURRENCY: int = 1
+    WORKER_SYNC_SECONDS: float = 0.5
+
+    # Move tasks completed / one-off events ended more than this many days ago to the
+    # archive tables, ARCHIVE_BATCH_SIZE rows per transaction. 0 keeps them in place.
+    ARCHIVE_TASKS_AFTER_DAYS: int = 90
+    ARCHIVE_EVENTS_AFTER_DAYS: int = 180
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+
+    # Online backups into BACKUP_DIR: POST /api/backups, and every BACKUP_INTERVAL_SECONDS
+    # (0 = never) an incremental snapshot, full every BACKUP_FULL_EVERY runs; the newest
+    # BACKUP_KEEP_FULL full snapshots and their incrementals are kept. SQLite copies
+    # BACKUP_PAGES_PER_STEP pages at a time, pausing BACKUP_STEP_SLEEP_MS between steps.
+    BACKUP_DIR: str = "./backups"
+    BACKUP_INTERVAL_SECONDS: float = 0.0
+    BACKUP_FULL_EVERY: int = 24
+    BACKUP_KEEP_FULL: int = 3
+    BACKUP_PAGES_PER_STEP: int = 256
+    BACKUP_STEP_SLEEP_MS: float = 5.0
 
     # CORS - accept comma-separated string
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:3001"
 
     # Obsidian vault — set to enable direct file writing from the API
     VAULT_PATH: str = ""
+    # Threads writing files during POST /api/daily-notes/export-to-vault
+    VAULT_EXPORT_WORKERS: int = 4
+    # Ingest daily notes edited in the vault (file notifications, or polling every VAULT_POLL_SECONDS)
+    VAULT_WATCH: bool = True
+    VAULT_POLL_SECONDS: float = 5.0
+
+    # Query logging — statements slower than this are logged with their plan
+    SLOW_QUERY_MS: float = 100.0
+    # Max SQL statements per request; enforced (500) in test, logged elsewhere. 0 disables.
+    QUERY_BUDGET: int = 10
+    # Per-route overrides, comma-separated "METHOD /route/template=N"
+    QUERY_BUDGETS: str = ""
+
+    # Sampling interval of ?profile=1 requests (admin only, see app.core.profiling)
+    PROFILE_INTERVAL_MS: float = 5.0
+    # Append request/SQL/vault/broadcast spans to this file as OTLP-JSON lines. Empty disables.
+    TRACE_FILE: str = ""
+    TRACE_SAMPLE_RATE: float = 1.0
+    TRACE_FILE_MAX_BYTES: int = 10_000_000
+    TRACE_FILE_BACKUPS: int = 5
+
+    # Admission control (per worker) — sized for one shared CPU / 256 MB. 0 disables the concurrency limit.
+    MAX_CONCURRENT_REQUESTS: int = 8
+    MAX_QUEUED_REQUESTS: int = 32
+    QUEUE_TIMEOUT_SECONDS: float = 5.0
+    # Per-API-key (or client IP) token bucket, per worker. 0 disables rate limiting.
+    RATE_LIMIT_PER_SECOND: float = 20.0
+    RATE_LIMIT_BURST: int = 60
+    # Reverse proxies in front of the app that append to X-Forwarded-For (1 on Fly.io).
+    # Anonymous clients are rate limited by the address the outermost one saw. 0 uses the socket address.
+    TRUSTED_PROXY_HOPS: int = 0
+
+    # Compress responses at least this large (bytes) with brotli or gzip
+    COMPRESSION_MIN_SIZE: int = 1024
 
     # Environment
     ENVIRONMENT: str = "development"
@@ -31,5 +94,22 @@ class Settings(BaseSettings):
         """Parse CORS origins from comma-separated string."""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
+    def get_query_budgets(self) -> Dict[str, int]:
+        """Parse per-route query budgets from a comma-separated string."""
+        budgets = {}
+        for entry in self.QUERY_BUDGETS.split(","):
+            if "=" in entry:
+                route, limit = entry.rsplit("=", 1)
+                budgets[route.strip()] = int(limit)
+        return budgets
+
+    @property
+    def enforce_query_budget(self) -> bool:
+        """
+        Whether exceeding the query budget fails the request. Only under tests:
+        elsewhere the request's writes are already committed, so it is logged.
+        """
+        return self.ENVIRONMENT == "test"
+
 
 settings = Settings()
@@ -0,0 +1,51 @@
+"""Markdown layout of a daily note: sections rendered under ``## `` headings and parsed back."""
+
+SECTION_ORDER = ["tasks", "calendar", "notes", "completed"]
+SECTION_LABELS = {
+    "tasks": "## Tasks",
+    "calendar": "## Calendar",
+    "notes": "## Notes",
+    "completed": "## Completed",
+}
+
+
+def assemble_content(sections: dict) -> str:
+    """Assemble sections dict into a full markdown string."""
+    parts = []
+    # Render known sections in preferred order first
+    for key in SECTION_ORDER:
+        if key in sections and sections[key]:
+            parts.append(f"{SECTION_LABELS.get(key, f'## {key.title()}')}\n{sections[key]}")
+    # Then any custom sections
+    for key, value in sections.items():
+        if key not in SECTION_ORDER and value:
+            parts.append(f"## {key.title()}\n{value}")
+    return "\n\n".join(parts)
+
+
+def parse_content(content: str, known_keys=()) -> dict:
+    """
+    Split markdown back into sections using the headings _assemble_content
+    emits. Custom headings map back to the existing section key they were
+    rendered from, otherwise to the lower-cased heading. Text before the
+    first heading is kept at the top of the notes section.
+    """
+    keys = {label: key for key, label in SECTION_LABELS.items()}
+    keys.update((f"## {key.title()}", key) for key in known_keys if key not in SECTION_LABELS)
+    sections = {}
+    key, lines = None, []
+    preamble = ""
+    for line in content.splitlines() + ["## "]:  # sentinel heading flushes the last section
+        if not line.startswith("## "):
+            lines.append(line)
+            continue
+        body = "\n".join(lines).strip("\n")
+        if key is not None:
+            sections[key] = body
+        else:
+            preamble = body.strip()
+        heading = line.rstrip()
+        key, lines = keys.get(heading, heading[3:].strip().lower()), []
+    if preamble:
+        sections["notes"] = f"{preamble}\n\n{sections['notes']}" if sections.get("notes") else preamble
+    return sections
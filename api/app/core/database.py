@@ -1,7 +1,10 @@
 """Database connection and session management."""
-from sqlalchemy import create_engine
+import contextvars
+from typing import Optional
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 
@@ -11,15 +14,46 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
 )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """WAL so readers never block the writer, and wait on locks instead of failing."""
+        dbapi_connection.isolation_level = None  # transactions are begun in _begin_sqlite
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin_sqlite(conn):
+        """
+        BEGIN IMMEDIATE for connections opened with sqlite_immediate=True (the
+        writer, migrations): they take the write lock up front and wait for it
+        with busy_timeout, instead of failing with "database is locked" when a
+        read transaction is upgraded after another process wrote.
+        """
+        immediate = conn.get_execution_options().get("sqlite_immediate")
+        conn.connection.driver_connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+# Create session factory. Objects stay loaded after commit: write handlers get
+# generated columns back through RETURNING and serialize without a refresh.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Base class for models
 Base = declarative_base()
 
 
+# Set while POST /api/batch dispatches sub-requests so they all share one session
+shared_session: contextvars.ContextVar[Optional[Session]] = contextvars.ContextVar("shared_session", default=None)
+
+
 def get_db():
     """Dependency to get database session."""
+    shared = shared_session.get()
+    if shared is not None:
+        yield shared  # owned and closed by the batch request
+        return
     db = SessionLocal()
     try:
         yield db
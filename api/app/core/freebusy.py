@@ -0,0 +1,54 @@
+"""
+Per-process cache of free/busy results, keyed by (start, end, granularity).
+
+Every event write in this worker clears it, and the change feed clears it for
+writes made by the other workers (so they can serve a stale result until the
+next poll). A read records ``generation()`` before querying and passes it to
+``put``; if a write cleared the cache meanwhile the result, which may predate
+the write, is not stored.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+CACHE_SIZE = 256
+
+_lock = threading.Lock()
+_cache: "OrderedDict[Hashable, Any]" = OrderedDict()
+_generation = 0
+
+
+def get(key: Hashable) -> Optional[Any]:
+    """The cached result for `key`, or None."""
+    with _lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+        return result
+
+
+def generation() -> int:
+    """Number of invalidations so far; read it before computing a result to cache."""
+    return _generation
+
+
+def put(key: Hashable, result: Any, computed_at: int) -> None:
+    """
+    Cache a result computed after ``generation()`` returned `computed_at`,
+    unless the cache was invalidated since. Evicts the least recently used
+    result past CACHE_SIZE.
+    """
+    with _lock:
+        if computed_at != _generation:
+            return
+        _cache[key] = result
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate() -> None:
+    """Drop every cached result after an event write."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
@@ -0,0 +1,291 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+Keeps counters, gauges and histograms in memory and renders them in the
+Prometheus text format (version 0.0.4) for the /metrics endpoint. Also tracks
+per-request database statistics through a context variable that the
+SQLAlchemy cursor hooks update.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a {name="value",...} label set."""
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value, keeping integers free of a trailing .0."""
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(count)}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+APP_STARTUP = registry.register(Gauge(
+    "app_startup_seconds", "Cold start duration by phase.", ("phase",)
+))
+
+# ── HTTP ──────────────────────────────────────────────────────────────────────
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+))
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+))
+
+# ── Database ──────────────────────────────────────────────────────────────────
+
+DB_QUERIES = registry.register(Counter(
+    "db_queries_total", "SQL statements executed."
+))
+DB_QUERY_DURATION = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement latency."
+))
+DB_QUERIES_PER_REQUEST = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request.", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+DB_TIME_PER_REQUEST = registry.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL per HTTP request.", ("method", "route")
+))
+
+# ── WebSocket ─────────────────────────────────────────────────────────────────
+
+WS_CONNECTIONS = registry.register(Gauge(
+    "websocket_connections", "Currently open WebSocket connections."
+))
+WS_BROADCASTS = registry.register(Counter(
+    "websocket_broadcasts_total", "Broadcasts by message type.", ("type",)
+))
+WS_MESSAGES_SENT = registry.register(Counter(
+    "websocket_messages_sent_total", "WebSocket messages delivered to clients."
+))
+WS_SEND_FAILURES = registry.register(Counter(
+    "websocket_send_failures_total", "WebSocket sends that failed and dropped the connection."
+))
+
+# ── Vault ─────────────────────────────────────────────────────────────────────
+
+VAULT_WRITE_DURATION = registry.register(Histogram(
+    "vault_write_duration_seconds", "Obsidian vault file write latency.", ("subdir",)
+))
+
+
+# ── Per-request database statistics ───────────────────────────────────────────
+
+class RequestStats:
+    """Mutable per-request counters shared with the threadpool via a context variable."""
+
+    __slots__ = ("query_count", "query_time", "statements")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+        self.statements: List[Tuple[str, float]] = []  # (sql, seconds), filled by query_log
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def begin_request() -> Tuple[RequestStats, contextvars.Token]:
+    """Start collecting database statistics for the current request."""
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def end_request(token: contextvars.Token) -> None:
+    """Stop collecting database statistics for the current request."""
+    _request_stats.reset(token)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Return the statistics object for the request being served, if any."""
+    return _request_stats.get()
+
+
+def observe_request(method: str, route: str, status: int, duration: float, stats: RequestStats) -> None:
+    """Record the outcome of one HTTP request."""
+    HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
+    HTTP_REQUEST_DURATION.observe(duration, method=method, route=route)
+    DB_QUERIES_PER_REQUEST.observe(stats.query_count, method=method, route=route)
+    DB_TIME_PER_REQUEST.observe(stats.query_time, method=method, route=route)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach cursor hooks that time every SQL statement."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        DB_QUERIES.inc()
+        DB_QUERY_DURATION.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.query_count += 1
+            stats.query_time += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
+
+
+def render() -> str:
+    """Render all registered metrics in the text exposition format."""
+    return registry.render()
@@ -0,0 +1,143 @@
+"""Response content negotiation: MessagePack bodies and gzip/brotli compression.
+
+Clients that send ``Accept: application/msgpack`` get MessagePack bodies
+rendered straight from the route's return value, so no JSON text is ever
+produced for them. Responses above a size threshold are compressed with
+brotli (when installed and accepted) or gzip. Both msgpack and brotli are
+optional; without them the API falls back to JSON and gzip.
+"""
+import contextvars
+import gzip
+from typing import Any, List, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+MSGPACK_MEDIA_TYPE = MSGPACK_MEDIA_TYPES[0]
+
+_wants_msgpack: contextvars.ContextVar[bool] = contextvars.ContextVar("wants_msgpack", default=False)
+
+
+def msgpack_available() -> bool:
+    """Whether MessagePack encoding is installed."""
+    return msgpack is not None
+
+
+def packb(content: Any) -> bytes:
+    """Encode JSON-compatible content as MessagePack."""
+    return msgpack.packb(content, use_bin_type=True)
+
+
+def _accepted(header: str) -> List[str]:
+    """Media types or codings from an Accept-style header, excluding q=0."""
+    accepted = []
+    for item in header.split(","):
+        value, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, raw = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        if value and quality > 0:
+            accepted.append(value.lower())
+    return accepted
+
+
+def wants_msgpack(accept_header: str) -> bool:
+    """Whether an Accept header asks for MessagePack and we can produce it."""
+    return msgpack is not None and any(t in MSGPACK_MEDIA_TYPES for t in _accepted(accept_header))
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, preferring brotli."""
+    codings = _accepted(accept_encoding)
+    if brotli is not None and "br" in codings:
+        return "br"
+    if "gzip" in codings:
+        return "gzip"
+    return None
+
+
+class NegotiatedJSONResponse(JSONResponse):
+    """Default response class: JSON, or MessagePack when the request asked for it."""
+
+    def render(self, content: Any) -> bytes:
+        if _wants_msgpack.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return packb(content)
+        return super().render(content)
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4)  # fast setting; the VM has one shared CPU
+    return gzip.compress(body, compresslevel=6)
+
+
+class ContentNegotiationMiddleware:
+    """ASGI middleware selecting the body format and compressing large responses."""
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name: value.decode("latin-1") for name, value in scope.get("headers", [])}
+        token = _wants_msgpack.set(wants_msgpack(headers.get(b"accept", "")))
+        encoding = choose_encoding(headers.get(b"accept-encoding", ""))
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            response_headers = [
+                (name, value) for name, value in start_message.get("headers", [])
+                if name.lower() != b"vary"
+            ]
+            response_headers.append((b"vary", b"Accept, Accept-Encoding"))
+            body = message.get("body", b"")
+            already_encoded = any(name.lower() == b"content-encoding" for name, _ in response_headers)
+            if (
+                encoding
+                and not already_encoded
+                and not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+            ):
+                body = _compress(body, encoding)
+                response_headers = [
+                    (name, value) for name, value in response_headers if name.lower() != b"content-length"
+                ]
+                response_headers.append((b"content-encoding", encoding.encode()))
+                response_headers.append((b"content-length", str(len(body)).encode()))
+                message = {**message, "body": body}
+            await send({**start_message, "headers": response_headers})
+            start_message = None
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _wants_msgpack.reset(token)
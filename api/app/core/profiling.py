@@ -0,0 +1,265 @@
+"""On-demand request profiling.
+
+A request carrying ``?profile=1`` (or an ``X-Profile: 1`` header) and a valid
+X-API-Key is served as usual under a sampling profiler, and the response body
+is replaced with a report of where the time went:
+
+- ``profile=1`` / ``profile=tree``: an indented call tree with sample counts
+- ``profile=collapsed``: one ``frame;frame;frame count`` line per stack, the
+  input format of flamegraph.pl, speedscope and inferno
+
+The profiler is a background thread that reads ``sys._current_frames()``
+every PROFILE_INTERVAL_MS. A stack is attributed to the request when it runs
+on the event loop below this middleware, or when it runs the request's
+endpoint (or a closure defined in it) on another thread — the threadpool for
+sync endpoints, the SQLite writer for their writes. Concurrent requests to the
+same endpoint are indistinguishable off the loop thread, so profile on a
+quiet instance when the numbers matter.
+
+The sampler only gets the GIL when the serving thread lets go of it. While a
+profile is running the interpreter switch interval is lowered, otherwise
+samples would land almost exclusively on blocking calls.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app.core.auth import valid_api_key
+
+logger = logging.getLogger(__name__)
+
+# ?profile= / X-Profile value -> report format
+FORMATS = {"1": "tree", "true": "tree", "tree": "tree", "collapsed": "collapsed"}
+
+_switch_lock = threading.Lock()
+_active_profiles = 0
+_saved_switch_interval = 0.0
+
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    """``qualname (path/file.py:line)`` for a code object, with the path shortened."""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        parts = path.split(os.sep)
+        if "site-packages" in parts:
+            path = os.sep.join(parts[parts.index("site-packages") + 1:])
+        elif "app" in parts:
+            path = os.sep.join(parts[parts.index("app"):])
+        else:
+            path = os.sep.join(parts[-2:])
+        label = f"{getattr(code, 'co_qualname', code.co_name)} ({path}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def _lower_switch_interval(interval: float) -> None:
+    global _active_profiles, _saved_switch_interval
+    with _switch_lock:
+        if _active_profiles == 0:
+            _saved_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(_saved_switch_interval, interval / 10))
+        _active_profiles += 1
+
+
+def _restore_switch_interval() -> None:
+    global _active_profiles
+    with _switch_lock:
+        _active_profiles -= 1
+        if _active_profiles == 0:
+            sys.setswitchinterval(_saved_switch_interval)
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks belonging to one request.
+
+    `anchor` is a frame on the event loop thread that every coroutine of the
+    request runs below; `endpoint` returns the request's endpoint function
+    once routing has found it (None before that).
+    """
+
+    def __init__(self, interval: float, anchor, endpoint: Callable[[], Optional[Callable]]):
+        self.interval = interval
+        self.anchor = anchor
+        self.loop_thread = threading.get_ident()
+        self.endpoint = endpoint
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        _lower_switch_interval(self.interval)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        _restore_switch_interval()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        self.sample_count += 1
+        endpoint = self.endpoint()
+        qualname = getattr(endpoint, "__qualname__", None)
+        frames = sys._current_frames()
+        names = None
+        for thread_id, frame in frames.items():
+            if thread_id == self._thread.ident:
+                continue
+            stack = self._stack(thread_id, frame, qualname)
+            if not stack:
+                continue
+            if names is None:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stack.append(f"[{names.get(thread_id, thread_id)}]")
+            stack.reverse()
+            self.samples[tuple(stack)] += 1
+
+    def _stack(self, thread_id: int, frame, qualname: Optional[str]) -> List[str]:
+        """Labels of the request's frames in this stack, innermost first; empty if none."""
+        codes = []
+        if thread_id == self.loop_thread:
+            while frame is not None:
+                if frame is self.anchor:
+                    return [_label(code) for code in codes]
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            return []
+        if qualname is None:
+            return []
+        prefix = qualname + ".<locals>."
+        start = None
+        while frame is not None:
+            codes.append(frame.f_code)
+            name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            if name == qualname or name.startswith(prefix):
+                start = len(codes)  # keep the outermost match
+            frame = frame.f_back
+        return [_label(code) for code in codes[:start]] if start else []
+
+    def tree_report(self) -> str:
+        """Indented call tree, each node with its sample count and share of the total."""
+        root: Dict[str, list] = {}
+        for stack, count in self.samples.items():
+            children = root
+            for label in stack:
+                node = children.setdefault(label, [0, {}])
+                node[0] += count
+                children = node[1]
+        total = sum(self.samples.values()) or 1
+        lines: List[str] = []
+
+        def render(children: Dict[str, list], depth: int) -> None:
+            for label, (count, grandchildren) in sorted(children.items(), key=lambda item: -item[1][0]):
+                lines.append(f"{count * 100 / total:6.1f}% {count:6d}  {'  ' * depth}{label}")
+                render(grandchildren, depth + 1)
+
+        render(root, 0)
+        return "\n".join(lines)
+
+    def collapsed_report(self) -> str:
+        """``frame;frame;frame count`` lines, outermost frame first."""
+        return "\n".join(
+            f"{';'.join(stack)} {count}"
+            for stack, count in sorted(self.samples.items())
+        )
+
+
+def requested_format(scope) -> Optional[str]:
+    """The report format asked for by ``?profile=`` or ``X-Profile``, or None."""
+    value = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile", [None])[-1]
+    if value is None:
+        value = _header(scope, b"x-profile")
+    if value is None:
+        return None
+    return FORMATS.get(value.strip().lower())
+
+
+def _header(scope, wanted: bytes) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == wanted:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """Serve ``?profile=`` requests under a SamplingProfiler and answer with its report."""
+
+    def __init__(self, app, interval_ms: float = 5.0):
+        self.app = app
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        report_format = requested_format(scope)
+        if report_format is None:
+            await self.app(scope, receive, send)
+            return
+        if not valid_api_key(_header(scope, b"x-api-key")):
+            await _respond(send, 401, b"application/json",
+                           json.dumps({"detail": "Profiling requires a valid X-API-Key"}).encode())
+            return
+
+        status = 500
+        error = None
+
+        async def discard_body(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profiler = SamplingProfiler(self.interval, sys._getframe(), lambda: scope.get("endpoint"))
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard_body)
+        except Exception as e:
+            logger.exception(f"Profiled request {scope['method']} {scope['path']} failed")
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            profiler.stop()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if report_format == "collapsed":
+            body = profiler.collapsed_report()
+        else:
+            route = scope.get("route")
+            header = [
+                f"{scope['method']} {route.path if route else scope['path']} -> {status}"
+                + (f" ({error})" if error else ""),
+                f"{elapsed:.1f} ms, {profiler.sample_count} samples every {self.interval * 1000:g} ms, "
+                f"{sum(profiler.samples.values())} stacks attributed to the request",
+                "",
+            ]
+            body = "\n".join(header) + profiler.tree_report()
+        await _respond(send, 200, b"text/plain; charset=utf-8", (body + "\n").encode(),
+                       [(b"x-profiled-status", str(status).encode())])
+
+
+async def _respond(send, status: int, content_type: bytes, body: bytes,
+                   headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+            *(headers or []),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
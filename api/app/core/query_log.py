@@ -0,0 +1,109 @@
+"""Per-request SQL statement log, slow-query EXPLAIN logging and query budgets.
+
+Every statement executed while serving a request is recorded on the request's
+RequestStats. Statements slower than SLOW_QUERY_MS are logged together with
+their query plan. At the end of the request the statement count is checked
+against the route's budget: an overrun is logged, and fails the request
+under tests so N+1 regressions surface immediately.
+"""
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import RequestStats, current_request_stats
+
+logger = logging.getLogger(__name__)
+
+_EXPLAIN_PREFIX = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def explain(cursor, dialect_name: str, statement: str, parameters) -> Optional[str]:
+    """
+    Return the query plan for a statement using a fresh cursor on the same
+    DBAPI connection, bypassing the engine so it is not itself recorded.
+    """
+    prefix = _EXPLAIN_PREFIX.get(dialect_name)
+    if not prefix or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    plan_cursor = cursor.connection.cursor()
+    try:
+        plan_cursor.execute(prefix + statement, parameters or ())
+        rows = plan_cursor.fetchall()
+    finally:
+        plan_cursor.close()
+    if dialect_name == "sqlite":
+        # (id, parent, notused, detail)
+        return "\n".join(str(row[-1]) for row in rows)
+    return "\n".join(str(row[0]) for row in rows)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach cursor hooks that record statements and log slow ones."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_log_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_log_start"].pop()
+        stats = current_request_stats()
+        if stats is not None:
+            stats.statements.append((statement, elapsed))
+
+        if elapsed * 1000 < settings.SLOW_QUERY_MS:
+            return
+        plan = None
+        if not executemany:
+            try:
+                plan = explain(cursor, conn.dialect.name, statement, parameters)
+            except Exception as e:
+                plan = f"<explain failed: {e}>"
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f} ms): {statement}"
+            + (f"\nPlan:\n{plan}" if plan else "")
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_log_start"):
+            conn.info["query_log_start"].pop()
+
+
+# Built-in per-route budgets; QUERY_BUDGETS overrides these. The exact statement
+# count of every endpoint is pinned in tests/test_query_counts.py.
+DEFAULT_BUDGETS = {
+    "POST /api/batch": 0,  # sum of its sub-requests
+}
+
+
+def budget_for(route_key: str) -> int:
+    """Return the query budget for "METHOD /route/template" (0 = unlimited)."""
+    budgets = {**DEFAULT_BUDGETS, **settings.get_query_budgets()}
+    return budgets.get(route_key, settings.QUERY_BUDGET)
+
+
+def check_budget(route_key: str, stats: RequestStats) -> Optional[Tuple[int, List[str]]]:
+    """
+    Compare a finished request against its budget.
+
+    Returns (budget, statements) when the budget was exceeded, otherwise None.
+    """
+    budget = budget_for(route_key)
+    if not budget or len(stats.statements) <= budget:
+        return None
+    statements = [sql for sql, _ in stats.statements]
+    logger.warning(
+        f"Query budget exceeded for {route_key}: {len(statements)} statements (budget {budget})\n"
+        + "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(statements))
+    )
+    return budget, statements
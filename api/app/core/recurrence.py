@@ -0,0 +1,151 @@
+"""Expansion of the RRULE subset used by calendar events.
+
+Supports FREQ=DAILY/WEEKLY/MONTHLY/YEARLY with INTERVAL, COUNT, UNTIL and
+BYDAY (plain weekdays, for WEEKLY). Rules using other parts are expanded as
+far as these fields allow. An "RRULE:" prefix is accepted.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.core.timeutils import to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+# Hard stop for pathological rules (e.g. FREQ=DAILY over centuries)
+MAX_OCCURRENCES = 10000
+
+
+def parse_rrule(rule: str) -> Dict[str, str]:
+    """Parse "FREQ=WEEKLY;BYDAY=MO,WE" into a dict of upper-cased parts."""
+    rule = rule.strip()
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[6:]
+    parts = {}
+    for item in rule.split(";"):
+        key, _, value = item.partition("=")
+        if key and value:
+            parts[key.strip().upper()] = value.strip().upper()
+    return parts
+
+
+def validate_rrule(rule: str) -> Dict[str, str]:
+    """
+    Parse a rule and check the parts expansion depends on; raises ValueError
+    naming the first bad one.
+    """
+    parts = parse_rrule(rule)
+    if parts.get("FREQ") not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    for name in ("INTERVAL", "COUNT"):
+        if name in parts and not (parts[name].isdigit() and int(parts[name]) > 0):
+            raise ValueError(f"{name} must be a positive integer")
+    if "UNTIL" in parts and _parse_until(parts["UNTIL"]) is None:
+        raise ValueError("UNTIL must be a date (YYYYMMDD) or UTC date-time (YYYYMMDDTHHMMSSZ)")
+    return parts
+
+
+def _parse_until(value: str) -> Optional[datetime]:
+    for fmt in ("%Y%m%dT%H%M%SZ", "%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            until = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt == "%Y%m%d":
+            until = until.replace(hour=23, minute=59, second=59)
+        return until
+    return None
+
+
+def _add_months(value: datetime, months: int) -> Optional[datetime]:
+    """Same day-of-month `months` later, or None if that day does not exist."""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    try:
+        return value.replace(year=year, month=month)
+    except ValueError:
+        return None
+
+
+def _candidates(dtstart: datetime, parts: Dict[str, str], window_start: datetime) -> Iterator[Tuple[int, datetime]]:
+    """Yield (index, start) for every occurrence in order, skipping ahead when COUNT allows."""
+    freq = parts.get("FREQ")
+    interval = int(parts.get("INTERVAL", "1"))
+    can_skip = "COUNT" not in parts
+
+    if freq == "DAILY":
+        step = timedelta(days=interval)
+        first = max(0, (window_start - dtstart) // step - 1) if can_skip and window_start > dtstart else 0
+        for k in range(first, first + MAX_OCCURRENCES):
+            yield k, dtstart + k * step
+    elif freq == "WEEKLY":
+        days = sorted({WEEKDAYS[d[-2:]] for d in parts.get("BYDAY", "").split(",") if d[-2:] in WEEKDAYS})
+        days = days or [dtstart.weekday()]
+        week_start = dtstart - timedelta(days=dtstart.weekday())
+        step = timedelta(weeks=interval)
+        first = max(0, (window_start - week_start) // step - 1) if can_skip and window_start > dtstart else 0
+        index = 0
+        for week in range(first, first + MAX_OCCURRENCES):
+            base = week_start + week * step
+            for weekday in days:
+                occurrence = base + timedelta(days=weekday)
+                if occurrence < dtstart:
+                    continue
+                yield index, occurrence
+                index += 1
+    elif freq == "MONTHLY":
+        for k in range(MAX_OCCURRENCES):
+            occurrence = _add_months(dtstart, k * interval)
+            if occurrence:
+                yield k, occurrence
+    elif freq == "YEARLY":
+        for k in range(MAX_OCCURRENCES):
+            occurrence = _add_months(dtstart, 12 * k * interval)
+            if occurrence:
+                yield k, occurrence
+    else:
+        yield 0, dtstart
+
+
+def occurrences(
+    start: datetime,
+    end: datetime,
+    rule: Optional[str],
+    window_start: datetime,
+    window_end: datetime,
+) -> Iterator[Tuple[datetime, datetime]]:
+    """
+    Yield (start, end) of each occurrence overlapping [window_start, window_end].
+
+    All datetimes are normalized to naive UTC. Without a rule the event itself
+    is the only occurrence; so it is with a malformed rule stored before rules
+    were validated, which is logged instead of failing every read of the window.
+    """
+    start, end = to_utc_naive(start), to_utc_naive(end)
+    window_start, window_end = to_utc_naive(window_start), to_utc_naive(window_end)
+    duration = end - start
+    parts = {}
+    if rule:
+        try:
+            parts = validate_rrule(rule)
+        except ValueError as e:
+            logger.warning(f"Ignoring invalid recurrence rule {rule!r}: {e}")
+    count = int(parts["COUNT"]) if "COUNT" in parts else None
+    until = _parse_until(parts["UNTIL"]) if "UNTIL" in parts else None
+
+    seen = 0
+    for index, occurrence in _candidates(start, parts, window_start):
+        if count is not None and index >= count:
+            break
+        if until is not None and occurrence > until:
+            break
+        if occurrence > window_end:
+            break
+        seen += 1
+        if seen > MAX_OCCURRENCES:
+            break
+        if occurrence + duration >= window_start:
+            yield occurrence, occurrence + duration
@@ -0,0 +1,276 @@
+"""In-process scheduler that delivers event reminders over the WebSocket.
+
+``Event.reminders`` holds entries like ``{"minutes_before": 30}``. Each
+pending reminder is one entry in a min-heap keyed by fire time, so the loop
+only ever looks at the head and sleeps until it is due. The heap is filled
+once at startup from two indexed queries (upcoming events and recurring
+series) and afterwards kept current by the event write handlers:
+
+- ``schedule(event)`` replaces every pending reminder of the event
+- ``unschedule(event_id)`` drops them
+
+Replaced entries are not searched for in the heap; each event has a
+generation number and stale entries are skipped when they reach the head.
+Recurring events only keep their next occurrence per reminder in the heap;
+firing it schedules the following one.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.metrics import Counter, Gauge, registry
+from app.core.recurrence import occurrences
+from app.core.timeutils import to_epoch, to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+# How far ahead to look for the next occurrence of a recurring event
+RECURRENCE_HORIZON = timedelta(days=400)
+
+# Reminders at most this late (e.g. after the loop was blocked) are still delivered
+DELIVERY_GRACE = timedelta(minutes=5)
+
+REMINDERS_PENDING = registry.register(Gauge(
+    "reminders_pending", "Reminders scheduled and not yet delivered."
+))
+REMINDERS_FIRED = registry.register(Counter(
+    "reminders_fired_total", "Reminders delivered over the WebSocket."
+))
+
+
+class EventSnapshot(NamedTuple):
+    """The event fields needed to compute and deliver its reminders."""
+
+    id: str
+    title: str
+    start_time: datetime
+    end_time: datetime
+    recurrence_rule: Optional[str]
+    location: Optional[str]
+    offsets: Tuple[int, ...]  # distinct minutes_before values
+
+    @classmethod
+    def from_row(cls, row) -> Optional["EventSnapshot"]:
+        """Build from an Event (or a row with the same attributes); None if nothing to schedule."""
+        if row.status == "cancelled":
+            return None
+        offsets = tuple(sorted(set(_minutes_before(row.reminders))))
+        if not offsets:
+            return None
+        return cls(
+            row.id,
+            row.title,
+            to_utc_naive(row.start_time),
+            to_utc_naive(row.end_time),
+            row.recurrence_rule,
+            row.location,
+            offsets,
+        )
+
+
+def _minutes_before(reminders) -> List[int]:
+    """Valid minutes_before values from an Event.reminders list."""
+    values = []
+    for reminder in reminders or []:
+        if not isinstance(reminder, dict):
+            continue
+        minutes = reminder.get("minutes_before")
+        if isinstance(minutes, (int, float)) and not isinstance(minutes, bool) and minutes >= 0:
+            values.append(int(minutes))
+    return values
+
+
+def next_occurrence(event: EventSnapshot, not_before: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """First occurrence of the event starting at or after not_before."""
+    if not event.recurrence_rule:
+        if event.start_time >= not_before:
+            return event.start_time, event.end_time
+        return None
+    for occ_start, occ_end in occurrences(
+        event.start_time, event.end_time, event.recurrence_rule, not_before, not_before + RECURRENCE_HORIZON
+    ):
+        if occ_start >= not_before:
+            return occ_start, occ_end
+    return None
+
+
+class ReminderScheduler:
+    """Min-heap of pending reminders with lazy invalidation."""
+
+    def __init__(self):
+        # (fire_at, seq, event_id, generation, minutes_before, occurrence_start, occurrence_end)
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._generation_seq = itertools.count(1)  # global, so a number is never reused
+        self._generations: Dict[str, int] = {}
+        self._events: Dict[str, EventSnapshot] = {}
+        self._pending: Dict[str, int] = {}  # live heap entries per event
+        self._live = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return self._live
+
+    # ── Scheduling ──
+
+    def schedule(self, event, now: Optional[datetime] = None) -> None:
+        """(Re)schedule all reminders of an event after it was created or updated."""
+        self._drop(event.id)
+        snapshot = event if isinstance(event, EventSnapshot) else EventSnapshot.from_row(event)
+        if snapshot is None:
+            return
+        now = now or datetime.utcnow()
+        generation = self._generations[snapshot.id] = next(self._generation_seq)
+        self._events[snapshot.id] = snapshot
+        head = self._heap[0][0] if self._heap else None
+        for minutes in snapshot.offsets:
+            self._push_next(snapshot, generation, minutes, now)
+        if not self._pending.get(snapshot.id):
+            self._forget(snapshot.id)  # every reminder is already in the past
+        elif self._heap[0][0] != head:
+            self._wake()
+
+    def unschedule(self, event_id: str) -> None:
+        """Drop every pending reminder of a deleted event."""
+        self._drop(event_id)
+
+    def _forget(self, event_id: str) -> None:
+        """Forget an event; its heap entries become stale."""
+        self._events.pop(event_id, None)
+        self._generations.pop(event_id, None)
+        self._live -= self._pending.pop(event_id, 0)
+
+    def _drop(self, event_id: str) -> None:
+        if event_id not in self._events:
+            return
+        self._forget(event_id)
+        if len(self._heap) > 1024 and len(self._heap) > 2 * self._live:
+            self._heap = [entry for entry in self._heap if self._is_current(entry[2], entry[3])]
+            heapq.heapify(self._heap)
+        REMINDERS_PENDING.set(self._live)
+
+    def _push_next(self, event: EventSnapshot, generation: int, minutes: int, after: datetime) -> None:
+        """Push the first reminder for this offset that fires after `after`."""
+        occurrence = next_occurrence(event, after + timedelta(minutes=minutes))
+        if occurrence is None:
+            return
+        occ_start, occ_end = occurrence
+        fire_at = occ_start - timedelta(minutes=minutes)
+        heapq.heappush(self._heap, (fire_at, next(self._seq), event.id, generation, minutes, occ_start, occ_end))
+        self._pending[event.id] = self._pending.get(event.id, 0) + 1
+        self._live += 1
+        REMINDERS_PENDING.set(self._live)
+
+    def _is_current(self, event_id: str, generation: int) -> bool:
+        return self._generations.get(event_id) == generation
+
+    def pop_due(self, now: datetime) -> List[Tuple[EventSnapshot, int, datetime, datetime]]:
+        """Remove and return (event, minutes_before, occurrence_start, occurrence_end) for due reminders."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, event_id, generation, minutes, occ_start, occ_end = heapq.heappop(self._heap)
+            if not self._is_current(event_id, generation):
+                continue
+            self._live -= 1
+            self._pending[event_id] -= 1
+            event = self._events[event_id]
+            if fire_at >= now - DELIVERY_GRACE:
+                due.append((event, minutes, occ_start, occ_end))
+            if event.recurrence_rule:
+                self._push_next(event, generation, minutes, fire_at + timedelta(seconds=1))
+            if not self._pending[event_id]:
+                self._forget(event_id)  # nothing left to fire until the event is written again
+        REMINDERS_PENDING.set(self._live)
+        return due
+
+    # ── Loading ──
+
+    def load(self, db, now: Optional[datetime] = None) -> int:
+        """Schedule reminders for upcoming and recurring events; return how many are pending."""
+        from app.models.event import Event
+
+        now = now or datetime.utcnow()
+        columns = (
+            Event.id, Event.title, Event.start_time, Event.end_time,
+            Event.recurrence_rule, Event.location, Event.status, Event.reminders,
+        )
+        upcoming = db.query(*columns).filter(Event.start_epoch >= to_epoch(now))
+        recurring = db.query(*columns).filter(Event.recurrence_rule.isnot(None), Event.start_epoch < to_epoch(now))
+        self._heap.clear()
+        self._events.clear()
+        self._generations.clear()
+        self._pending.clear()
+        self._live = 0
+        for row in itertools.chain(upcoming, recurring):
+            self.schedule(row, now=now)
+        logger.info(f"Scheduled {self._live} reminders for {len(self._events)} events")
+        return self._live
+
+    # ── Delivery loop ──
+
+    def _wake(self) -> None:
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        from app.routes.websocket import broadcast_event
+
+        while True:
+            now = datetime.utcnow()
+            for event, minutes, occ_start, occ_end in self.pop_due(now):
+                REMINDERS_FIRED.inc()
+                try:
+                    await broadcast_event("reminder_due", {
+                        "event_id": event.id,
+                        "title": event.title,
+                        "location": event.location,
+                        "start_time": occ_start.isoformat() + "Z",
+                        "end_time": occ_end.isoformat() + "Z",
+                        "minutes_before": minutes,
+                    })
+                except Exception as e:
+                    logger.error(f"Failed to deliver reminder for event {event.id}: {e}")
+
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, (self._heap[0][0] - datetime.utcnow()).total_seconds())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the delivery loop on the running event loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the delivery loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+scheduler = ReminderScheduler()
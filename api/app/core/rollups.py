@@ -0,0 +1,180 @@
+"""Incrementally maintained rollups behind GET /api/stats.
+
+Every task and event contributes fixed amounts to a few counters:
+
+- ``task_day_rollups``: +1 ``created`` on its creation day, +1 ``completed``
+  on its completion day
+- ``open_task_rollups``: +1 ``open`` for its (due date, priority) while open
+- ``event_day_rollups``: +1 ``events`` and its duration in ``minutes`` for
+  its (start day, event type), for one-off events that are not cancelled.
+  Recurring series are expanded when the stats are read.
+
+Write handlers pass the row's state before and after the write to
+``apply_task``/``apply_event``, which apply the difference with one upsert
+per table. ``rebuild`` recomputes every rollup from the base tables; it backs
+the schema migration and ``python -m app.cli rollups`` after manual edits.
+"""
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Table, delete, select
+
+from app.core.timeutils import to_utc_naive
+from app.models.archive import ArchivedEvent, ArchivedTask
+from app.models.event import Event
+from app.models.rollup import EventDayRollup, OpenTaskRollup, TaskDayRollup
+from app.models.task import Task
+
+TASK_DAYS = TaskDayRollup.__table__
+OPEN_TASKS = OpenTaskRollup.__table__
+EVENT_DAYS = EventDayRollup.__table__
+
+# (table, primary key values) -> counter deltas
+Deltas = Dict[Tuple[Table, tuple], Dict[str, int]]
+
+
+class TaskState(NamedTuple):
+    """The task fields the rollups depend on."""
+
+    completed: bool
+    priority: str
+    due_date: Optional[str]
+    created_at: Optional[datetime]
+    completed_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row) -> "TaskState":
+        return cls(bool(row.completed), row.priority, row.due_date, row.created_at, row.completed_at)
+
+
+class EventState(NamedTuple):
+    """The event fields the rollups depend on."""
+
+    start_time: datetime
+    end_time: datetime
+    all_day: bool
+    status: str
+    event_type: Optional[str]
+    recurrence_rule: Optional[str]
+
+    @classmethod
+    def from_row(cls, row) -> "EventState":
+        return cls(row.start_time, row.end_time, bool(row.all_day), row.status, row.event_type, row.recurrence_rule)
+
+
+# Columns to select (or return from a DELETE) to build the states above
+TASK_COLUMNS = (Task.completed, Task.priority, Task.due_date, Task.created_at, Task.completed_at)
+EVENT_COLUMNS = (
+    Event.start_time, Event.end_time, Event.all_day, Event.status, Event.event_type, Event.recurrence_rule,
+)
+# The same columns of the archive tables (archived rows keep their contribution)
+ARCHIVED_TASK_COLUMNS = tuple(getattr(ArchivedTask, column.key) for column in TASK_COLUMNS)
+ARCHIVED_EVENT_COLUMNS = tuple(getattr(ArchivedEvent, column.key) for column in EVENT_COLUMNS)
+
+# Updates touching any of these need the row's previous state
+TASK_FIELDS = frozenset({"completed", "priority", "due_date"})
+EVENT_FIELDS = frozenset({"start_time", "end_time", "all_day", "status", "event_type", "recurrence_rule"})
+
+
+def _day(value: Optional[datetime]) -> Optional[str]:
+    return str(to_utc_naive(value).date()) if value else None
+
+
+def _add(deltas: Deltas, table: Table, key: tuple, sign: int = 1, **counters: int) -> None:
+    totals = deltas.setdefault((table, key), {})
+    for column, amount in counters.items():
+        totals[column] = totals.get(column, 0) + sign * amount
+
+
+def _task_contribution(deltas: Deltas, state: Optional[TaskState], sign: int) -> None:
+    if state is None:
+        return
+    created = _day(state.created_at)
+    if created:
+        _add(deltas, TASK_DAYS, (created,), sign, created=1)
+    if not state.completed:
+        _add(deltas, OPEN_TASKS, (state.due_date or "", state.priority), sign, open=1)
+    elif state.completed_at:
+        _add(deltas, TASK_DAYS, (_day(state.completed_at),), sign, completed=1)
+
+
+def _event_contribution(deltas: Deltas, state: Optional[EventState], sign: int) -> None:
+    if state is None or state.status == "cancelled" or state.recurrence_rule:
+        return
+    minutes = 0 if state.all_day else event_minutes(state.start_time, state.end_time)
+    _add(deltas, EVENT_DAYS, (_day(state.start_time), state.event_type or ""), sign, events=1, minutes=minutes)
+
+
+def event_minutes(start: datetime, end: datetime) -> int:
+    """Whole minutes between two event times."""
+    return max(0, int((to_utc_naive(end) - to_utc_naive(start)).total_seconds() // 60))
+
+
+def _upsert_statement(dialect_name: str, table: Table):
+    """INSERT ... ON CONFLICT DO UPDATE adding the inserted counters to the stored ones."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[column.name for column in table.primary_key],
+        set_={
+            column.name: column + stmt.excluded[column.name]
+            for column in table.columns if not column.primary_key
+        },
+    )
+
+
+def _rows(deltas: Deltas) -> Dict[Table, list]:
+    """Insert parameters per table for the non-zero deltas."""
+    rows: Dict[Table, list] = {}
+    for (table, key), counters in deltas.items():
+        if not any(counters.values()):
+            continue
+        row = {column.name: 0 for column in table.columns if not column.primary_key}
+        row.update(counters)
+        row.update(zip((column.name for column in table.primary_key), key))
+        rows.setdefault(table, []).append(row)
+    return rows
+
+
+def _apply(db, deltas: Deltas) -> None:
+    """Upsert the non-zero deltas, one executemany per table."""
+    dialect_name = db.get_bind().dialect.name
+    for table, table_rows in _rows(deltas).items():
+        db.execute(_upsert_statement(dialect_name, table), table_rows)
+
+
+def apply_task(db, old: Optional[TaskState], new: Optional[TaskState]) -> None:
+    """Move a task's contribution from its old state to its new one (None = absent)."""
+    deltas: Deltas = {}
+    _task_contribution(deltas, old, -1)
+    _task_contribution(deltas, new, 1)
+    _apply(db, deltas)
+
+
+def apply_event(db, old: Optional[EventState], new: Optional[EventState]) -> None:
+    """Move an event's contribution from its old state to its new one (None = absent)."""
+    deltas: Deltas = {}
+    _event_contribution(deltas, old, -1)
+    _event_contribution(deltas, new, 1)
+    _apply(db, deltas)
+
+
+def rebuild(conn) -> int:
+    """Recompute every rollup from the tasks and events tables and their archives; return the rows written."""
+    deltas: Deltas = {}
+    for columns in (TASK_COLUMNS, ARCHIVED_TASK_COLUMNS):
+        for row in conn.execute(select(*columns)):
+            _task_contribution(deltas, TaskState.from_row(row), 1)
+    for columns in (EVENT_COLUMNS, ARCHIVED_EVENT_COLUMNS):
+        for row in conn.execute(select(*columns)):
+            _event_contribution(deltas, EventState.from_row(row), 1)
+
+    rows = _rows(deltas)
+    for table in (TASK_DAYS, OPEN_TASKS, EVENT_DAYS):
+        conn.execute(delete(table))
+        if rows.get(table):
+            conn.execute(table.insert(), rows[table])
+    return sum(len(table_rows) for table_rows in rows.values())
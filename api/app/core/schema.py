@@ -0,0 +1,238 @@
+"""Schema versioning and migrations.
+
+The schema version is stored in a small ``schema_meta`` table. On startup a
+single SELECT compares it with SCHEMA_VERSION; only when the database is
+behind do we import every model, run ``create_all`` and apply the pending
+migrations. Migrations must be idempotent because a database created before
+versioning existed starts at version 0 and replays all of them.
+"""
+import importlib
+import logging
+from typing import Callable, Dict
+
+from sqlalchemy import Column, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.core.database import Base
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 11
+
+# Every model module, so create_all sees the full metadata even when routers are lazy-loaded
+MODEL_MODULES = [
+    "app.models.task",
+    "app.models.event",
+    "app.models.daily_note",
+    "app.models.living_context",
+    "app.models.session_summary",
+    "app.models.tag",
+    "app.models.rollup",
+    "app.models.worker_change",
+    "app.models.archive",
+]
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: str) -> None:
+    """CREATE INDEX IF NOT EXISTS (SQLite and PostgreSQL)."""
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless create_all already created it."""
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _migration_2_query_indexes(conn: Connection) -> None:
+    """Indexes for the range filters and orderings used by the routers."""
+    _create_index(conn, "ix_tasks_due_date", "tasks", "due_date")
+    _create_index(conn, "ix_events_start_time", "events", "start_time")
+    _create_index(conn, "ix_events_end_time", "events", "end_time")
+    _create_index(conn, "ix_events_status_start_time", "events", "status, start_time")
+    _create_index(conn, "ix_events_event_type_start_time", "events", "event_type, start_time")
+    _create_index(conn, "ix_living_contexts_updated_at", "living_contexts", "updated_at")
+    _create_index(conn, "ix_session_summaries_generated_at", "session_summaries", "generated_at")
+
+
+def _migration_3_backfill_tag_index(conn: Connection) -> None:
+    """Populate item_tags from the Task.tags / Event.tags JSON arrays."""
+    from app.core.tags import EVENT, TASK, normalize_tags
+    from app.models.event import Event
+    from app.models.tag import ItemTag
+    from app.models.task import Task
+
+    conn.execute(ItemTag.__table__.delete())
+    rows = []
+    for item_type, model in ((TASK, Task), (EVENT, Event)):
+        for item_id, tags in conn.execute(select(model.id, model.tags)):
+            rows.extend({"tag": tag, "item_type": item_type, "item_id": item_id} for tag in normalize_tags(tags))
+    if rows:
+        conn.execute(ItemTag.__table__.insert(), rows)
+
+
+def _migration_4_task_filter_indexes(conn: Connection) -> None:
+    """Composite indexes behind the GET /api/tasks filters and sort keys."""
+    _create_index(conn, "ix_tasks_completed_due_date", "tasks", "completed, due_date")
+    _create_index(conn, "ix_tasks_completed_priority_due_date", "tasks", "completed, priority, due_date")
+    _create_index(conn, "ix_tasks_completed_created_at", "tasks", "completed, created_at")
+
+
+def _migration_5_recurring_events_index(conn: Connection) -> None:
+    """Partial index over recurring events for free/busy and calendar windows."""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_events_recurring_start_time "
+        "ON events (start_time) WHERE recurrence_rule IS NOT NULL"
+    ))
+
+
+def _migration_6_daily_note_version(conn: Connection) -> None:
+    """Optimistic-concurrency version for daily notes."""
+    _add_column(conn, "daily_notes", "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+def _migration_7_daily_note_content_hash(conn: Connection) -> None:
+    """Hash of the content last exported to the vault."""
+    _add_column(conn, "daily_notes", "content_hash", "VARCHAR")
+
+
+def _migration_8_stats_rollups(conn: Connection) -> None:
+    """Task completion time and the rollup tables behind /api/stats."""
+    from app.core import rollups
+    from app.models.task import Task
+
+    tasks = Task.__table__
+    _add_column(conn, "tasks", "completed_at", tasks.c.completed_at.type.compile(conn.dialect))
+    # Best guess for tasks completed before the column existed: their last update
+    conn.execute(
+        tasks.update()
+        .where(tasks.c.completed == True, tasks.c.completed_at.is_(None))  # noqa: E712
+        .values(completed_at=func.coalesce(tasks.c.updated_at, tasks.c.created_at))
+    )
+    rollups.rebuild(conn)
+
+
+def _migration_10_archive(conn: Connection) -> None:
+    """Index for the archiver's scan of completed tasks (the archive tables come from create_all)."""
+    _create_index(conn, "ix_tasks_completed_completed_at", "tasks", "completed, completed_at")
+
+
+# (table, timestamp column, epoch column, epoch DDL) for migration 11
+_EPOCH_COLUMNS = [
+    ("events", "start_time", "start_epoch", "BIGINT NOT NULL DEFAULT 0"),
+    ("events", "end_time", "end_epoch", "BIGINT NOT NULL DEFAULT 0"),
+    ("archived_events", "start_time", "start_epoch", "BIGINT NOT NULL DEFAULT 0"),
+    ("archived_events", "end_time", "end_epoch", "BIGINT NOT NULL DEFAULT 0"),
+    ("tasks", "completed_at", "completed_epoch", "BIGINT"),
+    ("archived_tasks", "completed_at", "completed_epoch", "BIGINT"),
+    ("living_contexts", "updated_at", "updated_epoch", "BIGINT NOT NULL DEFAULT 0"),
+    ("session_summaries", "generated_at", "generated_epoch", "BIGINT NOT NULL DEFAULT 0"),
+]
+
+
+def _migration_11_epoch_columns(conn: Connection) -> None:
+    """
+    Integer UTC epoch columns behind every time range filter, backfilled from
+    the timestamps (stored without offset on SQLite, so read as UTC), and
+    their indexes in place of the timestamp ones.
+    """
+    for table, column, epoch, ddl in _EPOCH_COLUMNS:
+        _add_column(conn, table, epoch, ddl)
+        if conn.dialect.name == "sqlite":
+            seconds = f"CAST(strftime('%s', {column}) AS INTEGER)"
+        else:
+            seconds = f"CAST(FLOOR(EXTRACT(EPOCH FROM {column})) AS BIGINT)"
+        conn.execute(text(f"UPDATE {table} SET {epoch} = {seconds} WHERE {column} IS NOT NULL"))
+
+    for name in (
+        "ix_events_start_time", "ix_events_end_time", "ix_events_status_start_time",
+        "ix_events_event_type_start_time", "ix_events_recurring_start_time",
+        "ix_archived_events_start_time", "ix_archived_events_end_time",
+        "ix_tasks_completed_completed_at", "ix_living_contexts_updated_at", "ix_session_summaries_generated_at",
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in ("events", "archived_events"):
+        _create_index(conn, f"ix_{table}_start_epoch", table, "start_epoch")
+        _create_index(conn, f"ix_{table}_end_epoch", table, "end_epoch")
+    _create_index(conn, "ix_events_status_start_epoch", "events", "status, start_epoch")
+    _create_index(conn, "ix_events_event_type_start_epoch", "events", "event_type, start_epoch")
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_events_recurring_start_epoch "
+        "ON events (start_epoch) WHERE recurrence_rule IS NOT NULL"
+    ))
+    _create_index(conn, "ix_tasks_completed_completed_epoch", "tasks", "completed, completed_epoch")
+    _create_index(conn, "ix_living_contexts_updated_epoch", "living_contexts", "updated_epoch")
+    _create_index(conn, "ix_session_summaries_generated_epoch", "session_summaries", "generated_epoch")
+
+
+# version -> function(connection) upgrading from version - 1
+MIGRATIONS: Dict[int, Callable[[Connection], None]] = {
+    2: _migration_2_query_indexes,
+    3: _migration_3_backfill_tag_index,
+    4: _migration_4_task_filter_indexes,
+    5: _migration_5_recurring_events_index,
+    6: _migration_6_daily_note_version,
+    7: _migration_7_daily_note_content_hash,
+    8: _migration_8_stats_rollups,
+    10: _migration_10_archive,
+    11: _migration_11_epoch_columns,
+}
+
+schema_meta = Table(
+    "schema_meta",
+    Base.metadata,
+    Column("key", String, primary_key=True),
+    Column("value", String, nullable=False),
+)
+
+
+def get_schema_version(engine: Engine) -> int:
+    """Return the stored schema version, or 0 if the database is unversioned."""
+    try:
+        with engine.connect() as conn:
+            return _read_schema_version(conn)
+    except DBAPIError:
+        return 0  # schema_meta does not exist yet
+
+
+def _read_schema_version(conn: Connection) -> int:
+    value = conn.execute(select(schema_meta.c.value).where(schema_meta.c.key == "version")).scalar()
+    return int(value) if value is not None else 0
+
+
+def _set_schema_version(conn: Connection, version: int) -> None:
+    """Store the schema version."""
+    updated = conn.execute(
+        schema_meta.update().where(schema_meta.c.key == "version").values(value=str(version))
+    ).rowcount
+    if not updated:
+        conn.execute(schema_meta.insert().values(key="version", value=str(version)))
+
+
+def ensure_schema(engine: Engine) -> str:
+    """
+    Bring the database schema up to date.
+
+    Returns "current" when nothing had to be done, otherwise "migrated".
+    """
+    current = get_schema_version(engine)
+    if current >= SCHEMA_VERSION:
+        return "current"
+
+    for module in MODEL_MODULES:
+        importlib.import_module(module)
+
+    logger.info(f"Upgrading database schema from version {current} to {SCHEMA_VERSION}...")
+    # BEGIN IMMEDIATE on SQLite: workers starting together wait for the first one's upgrade
+    with engine.execution_options(sqlite_immediate=True).begin() as conn:
+        if inspect(conn).has_table("schema_meta") and _read_schema_version(conn) >= SCHEMA_VERSION:
+            return "current"  # upgraded by another worker while we waited
+        Base.metadata.create_all(bind=conn)
+        for version in range(current + 1, SCHEMA_VERSION + 1):
+            migration = MIGRATIONS.get(version)
+            if migration:
+                logger.info(f"Applying schema migration {version}")
+                migration(conn)
+        _set_schema_version(conn, SCHEMA_VERSION)
+    return "migrated"
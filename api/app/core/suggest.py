@@ -0,0 +1,251 @@
+"""In-memory typeahead index over task titles, event titles and locations, and tags.
+
+Every suggestion is an entry keyed by (kind, normalized text). Its words go
+into a sorted vocabulary that is searched with bisect, so a prefix lookup
+touches only the words that start with the prefix. For typo tolerance each
+word is also indexed under its first few letters and every single-letter
+deletion of them (symmetric delete), so a misspelled prefix finds its
+candidates with a handful of dict lookups; they are then confirmed with a
+bounded edit distance that counts transpositions as one edit.
+
+The index is built once at startup and then kept current by the task and
+event write handlers through ``index_task``, ``index_event`` and ``remove``.
+"""
+import bisect
+import logging
+import re
+import threading
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from app.core import tags as tag_index
+
+logger = logging.getLogger(__name__)
+
+TASK_TITLE = "task"
+EVENT_TITLE = "event"
+LOCATION = "location"
+TAG = "tag"
+KINDS = (TASK_TITLE, EVENT_TITLE, LOCATION, TAG)
+
+# Fuzzy matching: letters keyed by the delete index, and the minimum query length
+FUZZY_KEY_LENGTH = 4
+FUZZY_MIN_LENGTH = 3
+
+# Prefix matches ranked per lookup; a one-letter prefix would otherwise rank most of the index
+MAX_RANKED = 200
+
+_WORD = re.compile(r"\w+")
+
+Key = Tuple[str, str]  # (kind, normalized text)
+
+
+class Suggestion(NamedTuple):
+    """A lookup result."""
+
+    text: str
+    kind: str
+    item_id: Optional[str]  # the task/event when exactly one has this title
+    count: int  # items with this text
+    fuzzy: bool
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_words(text))
+
+
+def _delete_keys(word: str) -> Set[str]:
+    """The word's leading letters and each single deletion of them."""
+    head = word[:FUZZY_KEY_LENGTH]
+    return {head} | {head[:i] + head[i + 1:] for i in range(len(head))}
+
+
+def _distance(a: str, b: str) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions)."""
+    rows = [list(range(len(b) + 1))]
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            row[j] = min(rows[-1][j] + 1, row[j - 1] + 1, rows[-1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], rows[-2][j - 2] + 1)
+        rows.append(row)
+    return rows[-1][-1]
+
+
+def _prefix_distance(query: str, word: str, limit: int) -> int:
+    """Smallest distance between query and a prefix of word of similar length."""
+    lengths = range(max(1, len(query) - limit), min(len(word), len(query) + limit) + 1)
+    return min((_distance(query, word[:length]) for length in lengths), default=limit + 1)
+
+
+class _Entry:
+    __slots__ = ("text", "words", "ids")
+
+    def __init__(self, text: str, words: List[str]):
+        self.text = text
+        self.words = words
+        self.ids: Set[str] = set()
+
+
+class SuggestIndex:
+    """Prefix index with symmetric-delete fuzzy matching; all methods are thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._entries: Dict[Key, _Entry] = {}
+        self._vocabulary: List[str] = []  # sorted distinct words
+        self._word_entries: Dict[str, Set[Key]] = {}
+        self._delete_words: Dict[str, Set[str]] = {}
+        self._sources: Dict[Tuple[str, str], List[Key]] = {}  # (item type, id) -> entries it contributes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── Maintenance ──
+
+    def _add(self, kind: str, text: str, item_id: str) -> Optional[Key]:
+        normalized = _normalize(text)
+        if not normalized:
+            return None
+        key = (kind, normalized)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(text.strip(), normalized.split())
+            for word in set(entry.words):
+                keys = self._word_entries.get(word)
+                if keys is None:
+                    keys = self._word_entries[word] = set()
+                    bisect.insort(self._vocabulary, word)
+                    for delete_key in _delete_keys(word):
+                        self._delete_words.setdefault(delete_key, set()).add(word)
+                keys.add(key)
+        entry.ids.add(item_id)
+        return key
+
+    def _release(self, key: Key, item_id: str) -> None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.ids.discard(item_id)
+        if entry.ids:
+            return
+        del self._entries[key]
+        for word in set(entry.words):
+            keys = self._word_entries[word]
+            keys.discard(key)
+            if keys:
+                continue
+            del self._word_entries[word]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+            for delete_key in _delete_keys(word):
+                words = self._delete_words[delete_key]
+                words.discard(word)
+                if not words:
+                    del self._delete_words[delete_key]
+
+    def _replace(self, item_type: str, item_id: str, texts: Iterable[Tuple[str, Optional[str]]]) -> None:
+        with self._lock:
+            for key in self._sources.pop((item_type, item_id), []):
+                self._release(key, item_id)
+            keys = [self._add(kind, text, item_id) for kind, text in texts if text]
+            keys = [key for key in keys if key is not None]
+            if keys:
+                self._sources[(item_type, item_id)] = keys
+
+    def index_task(self, task) -> None:
+        """Index (or re-index) a task's title and tags."""
+        texts = [(TASK_TITLE, task.title)] + [(TAG, tag) for tag in tag_index.normalize_tags(task.tags)]
+        self._replace(tag_index.TASK, task.id, texts)
+
+    def index_event(self, event) -> None:
+        """Index (or re-index) an event's title, location and tags."""
+        texts = [(EVENT_TITLE, event.title), (LOCATION, event.location)]
+        texts += [(TAG, tag) for tag in tag_index.normalize_tags(event.tags)]
+        self._replace(tag_index.EVENT, event.id, texts)
+
+    def remove(self, item_type: str, item_id: str) -> None:
+        """Drop a deleted task or event."""
+        self._replace(item_type, item_id, [])
+
+    def load(self, db) -> int:
+        """Rebuild the index from the database; return the number of entries."""
+        from app.models.event import Event
+        from app.models.task import Task
+
+        with self._lock:
+            self._clear()
+        for task in db.query(Task.id, Task.title, Task.tags):
+            self.index_task(task)
+        for event in db.query(Event.id, Event.title, Event.location, Event.tags):
+            self.index_event(event)
+        logger.info(f"Suggest index built with {len(self)} entries")
+        return len(self)
+
+    # ── Lookup ──
+
+    def _words_with_prefix(self, prefix: str) -> Iterator[str]:
+        for i in range(bisect.bisect_left(self._vocabulary, prefix), len(self._vocabulary)):
+            word = self._vocabulary[i]
+            if not word.startswith(prefix):
+                return
+            yield word
+
+    def _fuzzy_words(self, query: str) -> List[str]:
+        candidates: Set[str] = set()
+        for delete_key in _delete_keys(query):
+            candidates.update(self._delete_words.get(delete_key, ()))
+        limit = 1 if len(query) <= 5 else 2
+        return sorted(
+            word for word in candidates
+            if not word.startswith(query) and _prefix_distance(query, word, limit) <= limit
+        )
+
+    def suggest(self, prefix: str, limit: int = 10, kinds: Optional[Iterable[str]] = None) -> List[Suggestion]:
+        """
+        Entries whose words start with the last word of `prefix` and contain
+        the earlier ones, best first; typo matches fill any remaining slots.
+        """
+        query = _words(prefix)
+        if not query:
+            return []
+        *complete, last = query
+        allowed = set(kinds) if kinds else None
+
+        with self._lock:
+            if any(word not in self._word_entries for word in complete):
+                return []
+            results: List[Suggestion] = []
+            seen: Set[Key] = set()
+            for fuzzy, words in ((False, self._words_with_prefix(last)), (True, None)):
+                if fuzzy:
+                    if len(results) >= limit or len(last) < FUZZY_MIN_LENGTH:
+                        break
+                    words = self._fuzzy_words(last)
+                matches = []
+                for word in words:
+                    for key in self._word_entries[word]:
+                        if key in seen or (allowed and key[0] not in allowed):
+                            continue
+                        entry = self._entries[key]
+                        if complete and not set(complete) <= set(entry.words):
+                            continue
+                        seen.add(key)
+                        matches.append((key, entry))
+                    if len(matches) >= MAX_RANKED:
+                        break
+                # Texts starting with the query first, then the most used, then the shortest
+                matches.sort(key=lambda m: (not m[0][1].startswith(" ".join(query)), -len(m[1].ids), len(m[1].text)))
+                for key, entry in matches[:limit - len(results)]:
+                    item_id = next(iter(entry.ids)) if key[0] in (TASK_TITLE, EVENT_TITLE) and len(entry.ids) == 1 else None
+                    results.append(Suggestion(entry.text, key[0], item_id, len(entry.ids), fuzzy))
+            return results
+
+
+index = SuggestIndex()
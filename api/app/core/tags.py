@@ -0,0 +1,53 @@
+"""Maintenance and lookups for the normalized tag index (item_tags)."""
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, intersect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+from app.models.tag import ItemTag
+
+TASK = "task"
+EVENT = "event"
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    """Strip, drop empties and de-duplicate while keeping order."""
+    seen = []
+    for tag in tags or []:
+        tag = tag.strip() if isinstance(tag, str) else ""
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+def sync_tags(db: Session, item_type: str, item_id: str, tags: Optional[Iterable[str]]) -> None:
+    """Replace the index rows for one item. Flushed with the caller's commit."""
+    clear_tags(db, item_type, item_id)
+    add_tags(db, item_type, item_id, tags)
+
+
+def add_tags(db: Session, item_type: str, item_id: str, tags: Optional[Iterable[str]]) -> None:
+    """Index rows for a newly created item, which has none to clear."""
+    db.add_all(ItemTag(tag=tag, item_type=item_type, item_id=item_id) for tag in normalize_tags(tags))
+
+
+def clear_tags(db: Session, item_type: str, item_id: str) -> None:
+    """Remove the index rows for one item."""
+    db.execute(delete(ItemTag).where(ItemTag.item_type == item_type, ItemTag.item_id == item_id))
+
+
+def tagged_ids(item_type: str, tags: Iterable[str], mode: str = "all") -> Executable:
+    """
+    Subquery of item ids carrying the given tags.
+
+    mode="all" requires every tag (AND), mode="any" at least one (OR). Both
+    forms only read the (tag, item_type) prefix of the primary key.
+    """
+    tags = normalize_tags(tags)
+    if mode == "all" and len(tags) > 1:
+        return intersect(*(
+            select(ItemTag.item_id).where(ItemTag.tag == tag, ItemTag.item_type == item_type)
+            for tag in tags
+        ))
+    return select(ItemTag.item_id).where(ItemTag.tag.in_(tags), ItemTag.item_type == item_type)
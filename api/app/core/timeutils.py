@@ -0,0 +1,51 @@
+"""Datetime normalization helpers."""
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Annotated, Any, Dict, Tuple
+
+from pydantic import AfterValidator
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """
+    Convert to a naive UTC datetime. Aware values are converted; naive values
+    are assumed to be UTC already (SQLite drops the offset on storage).
+    """
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def to_utc(value: datetime) -> datetime:
+    """Convert to an aware UTC datetime; naive values are assumed to be UTC already."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc)
+    return value.replace(tzinfo=timezone.utc)
+
+
+# Pydantic field type for stored timestamps: SQLite hands them back naive, always meaning UTC
+UTCDateTime = Annotated[datetime, AfterValidator(to_utc)]
+
+
+def to_epoch(value: datetime) -> int:
+    """Whole seconds since 1970-01-01 UTC, rounded down; naive values are taken as UTC."""
+    return math.floor(to_utc(value).timestamp())
+
+
+def day_epochs(day: date) -> Tuple[int, int]:
+    """Epochs of the start of `day` and of the next day (UTC): the half-open range covering it."""
+    start = to_epoch(datetime.combine(day, time.min))
+    return start, start + int(timedelta(days=1).total_seconds())
+
+
+def with_epochs(model, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    `values` for an insert or update of `model`, plus the integer epoch column
+    of every timestamp in it that the model filters on (``model.EPOCH_COLUMNS``,
+    timestamp name -> epoch column name).
+    """
+    values = dict(values)
+    for name, epoch_name in model.EPOCH_COLUMNS.items():
+        if name in values:
+            values[epoch_name] = to_epoch(values[name]) if values[name] is not None else None
+    return values
@@ -0,0 +1,308 @@
+"""Span tracing exported to a local rotating file as OTLP-JSON.
+
+With TRACE_FILE set, each sampled request records a tree of spans: the
+request itself, every SQL statement it runs, vault writes and WebSocket
+broadcasts. When the request finishes its spans are appended to TRACE_FILE
+as one line holding an OTLP ``ExportTraceServiceRequest`` in JSON, the format
+the OpenTelemetry collector's file exporter writes, so the files can be
+loaded into Jaeger/Tempo or analyzed with jq without running any service.
+
+Writing happens on a logging QueueListener thread behind a
+RotatingFileHandler, which also does the JSON encoding; the request itself
+only enqueues its list of finished spans.
+Code that wants its own span wraps the work in ``with tracing.span(...)``,
+which does nothing outside a sampled request.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import workers
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# OTLP SpanKind
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+# OTLP StatusCode
+STATUS_ERROR = 2
+
+SERVICE_NAME = "8alls-api"
+MAX_STATEMENT_LENGTH = 1000
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Trace:
+    """The finished spans of one request, exported together when its root span ends."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "error", "is_root")
+
+    def __init__(self, trace: Trace, name: str, kind: int, parent_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]] = None, is_root: bool = False):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.is_root = is_root
+
+    def child(self, name: str, kind: int = INTERNAL, attributes: Optional[Dict[str, Any]] = None) -> "Span":
+        return Span(self.trace, name, kind, self.span_id, attributes)
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.trace.spans.append(self)
+        if self.is_root:
+            _export(self.trace.spans)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error is not None else {},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = INTERNAL) -> Iterator[Optional[Span]]:
+    """Record the enclosed block as a child of the current span; a no-op when untraced."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+# --- Export ---------------------------------------------------------------
+
+class _OTLPFormatter(logging.Formatter):
+    """Formats a record whose msg is a list of spans as one ExportTraceServiceRequest."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in record.msg],
+                }],
+            }],
+        }, separators=(",", ":"))
+
+
+class _SpanQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as they are; formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_export_logger = logging.getLogger(f"{__name__}.export")
+_export_logger.propagate = False
+_export_logger.setLevel(logging.INFO)
+_handler: Optional[_SpanQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def start() -> None:
+    """
+    Open TRACE_FILE and start the writer thread; no-op when TRACE_FILE is empty.
+    With several workers each writes its own file, suffixed with its pid,
+    since RotatingFileHandler cannot rotate a file shared between processes.
+    """
+    global _handler, _listener
+    if not settings.TRACE_FILE or _handler is not None:
+        return
+    path = settings.TRACE_FILE
+    if workers.multi_worker():
+        root, ext = os.path.splitext(path)
+        path = f"{root}.{os.getpid()}{ext}"
+    file_handler = logging.handlers.RotatingFileHandler(
+        path,
+        maxBytes=settings.TRACE_FILE_MAX_BYTES,
+        backupCount=settings.TRACE_FILE_BACKUPS,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(_OTLPFormatter())
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _handler = _SpanQueueHandler(records)
+    _listener = logging.handlers.QueueListener(records, file_handler)
+    _listener.start()
+    _export_logger.addHandler(_handler)
+    logger.info(f"Exporting traces to {path}")
+
+
+def stop() -> None:
+    """Flush queued traces and close TRACE_FILE."""
+    global _handler, _listener
+    if _handler is None:
+        return
+    _export_logger.removeHandler(_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _handler = _listener = None
+
+
+def _export(spans: List[Span]) -> None:
+    if _handler is not None:
+        _export_logger.info(spans)
+
+
+# --- Request spans --------------------------------------------------------
+
+def _start_trace(scope) -> Optional[Span]:
+    """The root span for a request, or None if it is not sampled."""
+    traceparent = None
+    for name, value in scope.get("headers", []):
+        if name == b"traceparent":
+            traceparent = _TRACEPARENT.match(value.decode("latin-1").strip().lower())
+            break
+    if traceparent:
+        if not int(traceparent.group(3), 16) & 1:
+            return None
+        trace_id, parent_id = traceparent.group(1), traceparent.group(2)
+    else:
+        if random.random() >= settings.TRACE_SAMPLE_RATE:
+            return None
+        trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+    return Span(Trace(trace_id), scope["method"], SERVER, parent_id, {
+        "http.request.method": scope["method"],
+        "url.path": scope["path"],
+    }, is_root=True)
+
+
+class TracingMiddleware:
+    """Open a root span per sampled request; honours an incoming W3C traceparent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _handler is None:
+            await self.app(scope, receive, send)
+            return
+        root = _start_trace(scope)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current_span.set(root)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+                root.attributes["http.route"] = route.path
+            root.attributes["http.response.status_code"] = status
+            if status >= 500 and root.error is None:
+                root.error = f"HTTP {status}"
+            root.end()
+
+
+# --- SQL spans ------------------------------------------------------------
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach cursor hooks that record every statement of a traced request as a span."""
+    dialect = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        sql_span = None
+        if parent is not None:
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+            sql_span = parent.child(operation or "SQL", CLIENT, {
+                "db.system": dialect,
+                "db.operation": operation,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            })
+        conn.info.setdefault("trace_spans", []).append(sql_span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        sql_span = conn.info["trace_spans"].pop()
+        if sql_span is not None:
+            sql_span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("trace_spans"):
+            sql_span = conn.info["trace_spans"].pop()
+            if sql_span is not None:
+                error = exception_context.original_exception
+                sql_span.error = f"{type(error).__name__}: {error}"
+                sql_span.end()
@@ -0,0 +1,47 @@
+"""Obsidian vault file helpers shared by the routes that write to VAULT_PATH."""
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+from app.core import tracing
+from app.core.config import settings
+
+
+def vault_path() -> Optional[str]:
+    """Return the configured vault root, or None if not set."""
+    return settings.VAULT_PATH or None
+
+
+def resolve(vault: str, relative_path: str) -> Optional[str]:
+    """Absolute path for a vault-relative path, or None if it would escape the vault."""
+    root = os.path.realpath(vault)
+    abs_path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, abs_path]) != root:
+        return None
+    return abs_path
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of a file's text, used to skip unchanged writes."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def write_vault_file(abs_path: str, content: str) -> None:
+    """
+    Write content to the vault, creating parent directories as needed.
+
+    The file is written to a temporary sibling and renamed into place, so
+    Obsidian (and sync tools watching the vault) never see a partial file.
+    """
+    with tracing.span("vault.write", {"file.path": abs_path, "file.size": len(content)}):
+        folder = os.path.dirname(abs_path)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, abs_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -0,0 +1,224 @@
+"""Incremental ingestion of daily notes edited in the Obsidian vault.
+
+Watches ``VAULT_PATH/Daily Notes`` for ``YYYY-MM-DD.md`` files that are
+created or modified. File system notifications come from watchfiles
+(inotify/FSEvents, installed with uvicorn[standard]); without it the folder
+is polled and only files whose mtime or size changed are read. Changed
+files are hashed, compared with the hash stored on the note (so our own
+exports are ignored), parsed back into sections and written with one
+batched upsert. Deleted files are left alone: removing a note goes through
+the API.
+
+On startup, files modified after their note was last updated are ingested,
+which picks up edits made while the API was not running.
+"""
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app.core import vault, writer
+from app.core.daily_note_format import parse_content
+from app.core.database import SessionLocal
+from app.core.metrics import Counter, registry
+from app.core.timeutils import to_utc_naive
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - optional dependency
+    watchfiles = None
+
+logger = logging.getLogger(__name__)
+
+DAILY_NOTE_FILE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.md$")
+
+VAULT_FILES_INGESTED = registry.register(Counter(
+    "vault_files_ingested_total", "Vault files parsed back into daily notes."
+))
+
+
+def _upsert_statement(dialect_name: str, table):
+    """INSERT ... ON CONFLICT (date) DO UPDATE for SQLite and PostgreSQL."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.date],
+        set_={
+            "sections": stmt.excluded.sections,
+            "content": stmt.excluded.content,
+            "content_hash": stmt.excluded.content_hash,
+            "obsidian_path": stmt.excluded.obsidian_path,
+            "obsidian_synced": True,
+            "version": table.c.version + 1,
+            "updated_at": func.now(),
+        },
+    )
+
+
+class VaultWatcher:
+    """Watches the daily notes folder and upserts changed files."""
+
+    def __init__(self, vault_root: str, subdir: str, poll_interval: float = 5.0):
+        self.subdir = subdir
+        self.folder = os.path.join(vault_root, subdir)
+        self.poll_interval = poll_interval
+        self._seen: Dict[str, Tuple[int, int]] = {}  # filename -> (mtime_ns, size)
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    # ── Change detection ──
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        """Stat every daily note file (no reads)."""
+        files = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if DAILY_NOTE_FILE.match(entry.name) and entry.is_file():
+                    files[entry.name] = entry.stat()
+        return files
+
+    def poll(self) -> List[str]:
+        """Filenames created or modified since the previous poll."""
+        changed = []
+        for name, stat in self._scan().items():
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self._seen.get(name) != signature:
+                self._seen[name] = signature
+                changed.append(name)
+        return changed
+
+    def catch_up(self) -> int:
+        """Record the current files and ingest those edited after their note was last updated."""
+        from app.models.daily_note import DailyNote
+
+        files = self._scan()
+        self._seen = {name: (stat.st_mtime_ns, stat.st_size) for name, stat in files.items()}
+        db = SessionLocal()
+        try:
+            last_written = {
+                date: to_utc_naive(updated_at or created_at) if (updated_at or created_at) else None
+                for date, updated_at, created_at in db.query(
+                    DailyNote.date, DailyNote.updated_at, DailyNote.created_at
+                )
+            }
+        finally:
+            db.close()
+        stale = []
+        for name, stat in files.items():
+            written = last_written.get(DAILY_NOTE_FILE.match(name).group(1), datetime.min)
+            if written is None or datetime.utcfromtimestamp(stat.st_mtime) > written:
+                stale.append(name)
+        return self.ingest(stale)
+
+    # ── Ingestion ──
+
+    def ingest(self, names: Iterable[str]) -> int:
+        """Parse the given files and upsert the ones whose content changed; return how many."""
+        from app.models.daily_note import DailyNote
+
+        files = {}
+        for name in names:
+            match = DAILY_NOTE_FILE.match(name)
+            if not match:
+                continue
+            try:
+                with open(os.path.join(self.folder, name), encoding="utf-8") as f:
+                    files[match.group(1)] = f.read()
+            except (FileNotFoundError, UnicodeDecodeError) as e:
+                logger.warning(f"Skipping vault file {name}: {e}")
+        if not files:
+            return 0
+
+        db = SessionLocal()
+        try:
+            existing = {
+                date: (content_hash, sections)
+                for date, content_hash, sections in db.query(
+                    DailyNote.date, DailyNote.content_hash, DailyNote.sections
+                ).filter(DailyNote.date.in_(list(files)))
+            }
+            rows = []
+            for date, content in files.items():
+                digest = vault.content_hash(content)
+                stored_hash, sections = existing.get(date, (None, None))
+                if digest == stored_hash:
+                    continue  # our own export, or already ingested
+                rows.append({
+                    "date": date,
+                    "title": f"Daily Note - {date}",
+                    "sections": parse_content(content, (sections or {}).keys()),
+                    "content": content,
+                    "content_hash": digest,
+                    "obsidian_path": f"{self.subdir}/{date}.md",
+                    "obsidian_synced": True,
+                    "version": 1,
+                })
+            if rows:
+                stmt = _upsert_statement(db.get_bind().dialect.name, DailyNote.__table__)
+                writer.run(db, lambda db: db.execute(stmt, rows))
+        finally:
+            db.close()
+        if rows:
+            VAULT_FILES_INGESTED.inc(len(rows))
+            logger.info(f"Ingested {len(rows)} daily notes from the vault")
+        return len(rows)
+
+    # ── Loop ──
+
+    async def _run(self) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        try:
+            await asyncio.to_thread(self.catch_up)
+        except Exception as e:
+            logger.error(f"Failed to catch up with vault edits: {e}")
+        if watchfiles is not None:
+            logger.info(f"Watching {self.folder} for changes")
+            async for changes in watchfiles.awatch(self.folder, stop_event=self._stop, recursive=False):
+                names = {
+                    os.path.basename(path) for change, path in changes
+                    if change != watchfiles.Change.deleted
+                }
+                await self._ingest_safely(list(names))
+        else:
+            logger.info(f"Polling {self.folder} for changes every {self.poll_interval}s")
+            while not self._stop.is_set():
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                names = await asyncio.to_thread(self.poll)
+                await self._ingest_safely(names)
+
+    async def _ingest_safely(self, names: List[str]) -> None:
+        if not names:
+            return
+        try:
+            await asyncio.to_thread(self.ingest, names)
+        except Exception as e:
+            logger.error(f"Failed to ingest vault changes: {e}")
+
+    def start(self) -> None:
+        """Start watching on the running event loop."""
+        if self._task is None:
+            self._stop = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop watching."""
+        if self._task is None:
+            return
+        self._stop.set()  # ends awatch / the poll loop cleanly
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error(f"Vault watcher failed: {e}")
+        self._task = None
@@ -0,0 +1,211 @@
+"""Coordination between server worker processes (WEB_CONCURRENCY > 1).
+
+Every worker serves reads from its own connections and writes through its
+own group-commit writer (app.core.writer); SQLite serializes the writers.
+Two things need more than that:
+
+- process-wide jobs that must run once (the vault watcher, pruning the
+  change feed) run in the worker holding a file lock, the "leader"
+- in-memory state derived from tasks and events (typeahead index, reminder
+  queue, free/busy cache) and WebSocket clients live in each worker. Task
+  and event writes append to the ``worker_changes`` table in the same
+  transaction; every worker polls it for the other workers' rows, reloads
+  those items and updates its state and clients as if it had written them.
+
+With a single worker none of this runs and ``record`` writes nothing.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, func
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import Counter, registry
+from app.models.worker_change import WorkerChange
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every worker leads and every lock is free
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Feed rows older than this are pruned; a worker further behind reloads nothing it missed
+CHANGE_RETENTION = timedelta(minutes=10)
+PRUNE_EVERY_POLLS = 120
+
+WORKER_CHANGES_APPLIED = registry.register(Counter(
+    "worker_changes_applied_total", "Task and event writes by other workers applied to this worker's state.",
+    ("item_type",),
+))
+
+_leader_lock = None
+
+
+def multi_worker() -> bool:
+    """Whether the server runs more than one worker process."""
+    return settings.WEB_CONCURRENCY > 1
+
+
+def try_lock(name: str):
+    """
+    Take the exclusive lock `name` shared by every process using this
+    database, without waiting. Returns the open lock file, which holds the
+    lock until it is closed, or None if another holder has it.
+    """
+    digest = hashlib.sha1(settings.DATABASE_URL.encode()).hexdigest()[:12]
+    lock_file = open(os.path.join(tempfile.gettempdir(), f"8alls-{name}-{digest}.lock"), "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+    return lock_file
+
+
+def is_leader() -> bool:
+    """
+    Whether this worker runs the process-wide jobs. The first worker to ask
+    takes the "leader" lock and keeps it until it exits; a worker started
+    later takes over once it is released.
+    """
+    global _leader_lock
+    if not multi_worker() or _leader_lock is not None:
+        return True
+    _leader_lock = try_lock("leader")
+    return _leader_lock is not None
+
+
+def record(db, item_type: str, item_id: str, action: str) -> None:
+    """Append a task or event write to the change feed (inside its write job)."""
+    if multi_worker():
+        db.add(WorkerChange(worker=WORKER_ID, item_type=item_type, item_id=item_id, action=action))
+
+
+class ChangeFeed:
+    """Applies other workers' task and event writes to this worker's in-memory state."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_id = 0
+        self.actions: Dict[str, Tuple[str, str]] = {}  # item id -> (first, last) action in the latest poll
+        self.leader = False
+        self._polls = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+
+    def _fetch(self) -> Dict[str, Dict[str, object]]:
+        """
+        Items written by other workers since the last poll, per item type:
+        item id -> reloaded row, or None if it no longer exists.
+        """
+        from app.models.event import Event
+        from app.models.task import Task
+
+        db = SessionLocal()
+        try:
+            changed: Dict[str, Dict[str, object]] = {"task": {}, "event": {}}
+            self.actions = {}
+            for change in db.query(WorkerChange).filter(
+                WorkerChange.id > self.last_id, WorkerChange.worker != WORKER_ID
+            ).order_by(WorkerChange.id):
+                changed[change.item_type][change.item_id] = None
+                first, _ = self.actions.get(change.item_id, (change.action, None))
+                self.actions[change.item_id] = (first, change.action)
+                self.last_id = change.id
+            for model, items in ((Task, changed["task"]), (Event, changed["event"])):
+                if items:
+                    items.update((row.id, row) for row in db.query(model).filter(model.id.in_(list(items))))
+            return changed
+        finally:
+            db.close()
+
+    def _prune(self) -> None:
+        from app.core import writer
+
+        cutoff = datetime.utcnow() - CHANGE_RETENTION
+        db = SessionLocal()
+        try:
+            writer.run(db, lambda db: db.execute(delete(WorkerChange).where(WorkerChange.created_at < cutoff)))
+        finally:
+            db.close()
+
+    async def _apply(self, changed: Dict[str, Dict[str, object]]) -> None:
+        from app.core import freebusy, suggest, tags as tag_index
+        from app.core.reminders import scheduler as reminder_scheduler
+        from app.routes.websocket import broadcast_event, has_listeners
+        from app.schemas.event import Event as EventSchema
+
+        for task_id, task in changed[tag_index.TASK].items():
+            if task is None:
+                suggest.index.remove(tag_index.TASK, task_id)
+            else:
+                suggest.index.index_task(task)
+
+        events = changed[tag_index.EVENT]
+        if events:
+            freebusy.invalidate()
+        for event_id, event in events.items():
+            if event is None:
+                reminder_scheduler.unschedule(event_id)
+                suggest.index.remove(tag_index.EVENT, event_id)
+                # Archiving only moves the event out of the hot table; clients are not told
+                if has_listeners() and self.actions[event_id][1] != "archived":
+                    await broadcast_event("event_deleted", {"id": event_id})
+            else:
+                reminder_scheduler.schedule(event)
+                suggest.index.index_event(event)
+                if has_listeners():
+                    # A row created and updated since the last poll is announced as created
+                    action = "created" if self.actions[event_id][0] == "created" else "updated"
+                    await broadcast_event(f"event_{action}", EventSchema.model_validate(event))
+
+        for item_type, items in changed.items():
+            if items:
+                WORKER_CHANGES_APPLIED.inc(len(items), item_type=item_type)
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._apply(await asyncio.to_thread(self._fetch))
+                self._polls += 1
+                if self.leader and self._polls % PRUNE_EVERY_POLLS == 0:
+                    await asyncio.to_thread(self._prune)
+            except Exception as e:
+                logger.error(f"Failed to apply changes from other workers: {e}")
+
+    def start(self, leader: bool) -> None:
+        """Follow the feed from its current end."""
+        db = SessionLocal()
+        try:
+            self.last_id = db.query(func.max(WorkerChange.id)).scalar() or 0
+        finally:
+            db.close()
+        self.leader = leader
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Worker {WORKER_ID} following the change feed from id {self.last_id}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+
+
+feed = ChangeFeed(settings.WORKER_SYNC_SECONDS)
@@ -0,0 +1,203 @@
+"""Single-writer group commit for SQLite.
+
+SQLite allows one writer at a time. When every request commits on its own
+connection, concurrent writes queue on the database lock, and with several
+worker processes a read transaction that later tries to write fails with
+"database is locked". Here every write in a process goes through one thread
+that owns one connection instead:
+
+- a write is a job, a function taking a Session, submitted with ``run`` (or
+  ``run_async`` from async routes), which waits for it to be committed
+- the thread takes every job that is queued (up to WRITE_BATCH_SIZE), opens
+  one ``BEGIN IMMEDIATE`` transaction, runs each job in its own SAVEPOINT
+  and commits once; a job that raises is rolled back to its savepoint and
+  its exception re-raised in the caller, without affecting the others
+- group commit is per process: with WEB_CONCURRENCY workers there are as
+  many writer threads, and their groups still contend for the database
+  lock. BEGIN IMMEDIATE and busy_timeout make them wait their turn instead
+  of failing, but a group waits up to SQLITE_BUSY_TIMEOUT_MS for the others
+
+Jobs run in the submitting request's context, so their statements count
+towards its query log and budget. Request sessions from ``get_db`` are then
+only used for reads, which WAL lets run concurrently with the writer.
+
+On PostgreSQL, which handles concurrent writers itself, ``run`` calls the
+job with the caller's session and commits it.
+"""
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, NamedTuple, Optional, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WRITER_JOBS = registry.register(Counter(
+    "writer_jobs_total", "Write jobs run by the SQLite writer thread.", ("outcome",)
+))
+WRITER_COMMITS = registry.register(Counter(
+    "writer_commits_total", "Transactions committed by the SQLite writer thread (jobs per commit = group size)."
+))
+
+
+class _Job(NamedTuple):
+    fn: Callable[[Session], object]
+    context: contextvars.Context
+    future: Future
+
+
+_STOP = object()
+
+
+def _call(fn: Callable[[Session], T], session: Session) -> T:
+    result = fn(session)
+    session.flush()
+    return result
+
+
+class GroupCommitWriter:
+    """A thread that runs write jobs on one connection and commits them in groups."""
+
+    def __init__(self, bind: Engine, max_batch: int = 64):
+        self.bind = bind.execution_options(sqlite_immediate=True)
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn: Callable[[Session], T]) -> "Future[T]":
+        """Queue a job; the future resolves once its group is committed."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put(_Job(fn, contextvars.copy_context(), future))
+        return future
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Finish the queued jobs and stop the thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def _loop(self) -> None:
+        conn = None
+        try:
+            while True:
+                jobs: List[_Job] = [self._queue.get()]
+                while len(jobs) < self.max_batch:
+                    try:
+                        jobs.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(job is _STOP for job in jobs)
+                jobs = [job for job in jobs if job is not _STOP]
+                if jobs:
+                    if conn is None or conn.closed:
+                        conn = self.bind.connect()
+                    self._run_group(conn, jobs)
+                if stop:
+                    return
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _run_group(self, conn, jobs: List[_Job]) -> None:
+        try:
+            transaction = conn.begin()
+        except Exception as e:
+            logger.error(f"Writer could not begin a transaction: {e!r}")
+            conn.invalidate()
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+
+        done = []
+        for job in jobs:
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            session = Session(
+                bind=conn, join_transaction_mode="create_savepoint", autoflush=False, expire_on_commit=False
+            )
+            try:
+                session.connection()  # SAVEPOINT, outside the request's statement count
+                result = job.context.run(_call, job.fn, session)
+                session.commit()  # RELEASE SAVEPOINT
+            except Exception as e:
+                session.rollback()
+                WRITER_JOBS.inc(outcome="error")
+                job.future.set_exception(e)
+            else:
+                done.append((job, result))
+            finally:
+                session.close()
+
+        try:
+            transaction.commit()
+        except Exception as e:
+            logger.error(f"Writer commit of {len(done)} jobs failed: {e!r}")
+            if transaction.is_active:
+                transaction.rollback()
+            for job, _ in done:
+                WRITER_JOBS.inc(outcome="error")
+                job.future.set_exception(e)
+            return
+        WRITER_COMMITS.inc()
+        for job, result in done:
+            WRITER_JOBS.inc(outcome="ok")
+            job.future.set_result(result)
+
+
+writer: Optional[GroupCommitWriter] = (
+    GroupCommitWriter(engine, settings.WRITE_BATCH_SIZE) if engine.dialect.name == "sqlite" else None
+)
+
+
+def _run_here(db: Session, fn: Callable[[Session], T]) -> T:
+    try:
+        result = fn(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result
+
+
+def run(db: Session, fn: Callable[[Session], T]) -> T:
+    """Run and commit a write job, returning its result (or raising its exception)."""
+    if writer is None:
+        return _run_here(db, fn)
+    return writer.submit(fn).result()
+
+
+async def run_async(db: Session, fn: Callable[[Session], T]) -> T:
+    """``run`` for async routes: waits without blocking the event loop."""
+    if writer is None:
+        return _run_here(db, fn)
+    return await asyncio.wrap_future(writer.submit(fn))
+
+
+def stop() -> None:
+    """Drain and stop the writer thread (on shutdown)."""
+    if writer is not None:
+        writer.stop()
@@ -1,33 +1,72 @@
 """Main FastAPI application."""
-from fastapi import FastAPI
+import time
+
+_startup_begin = time.perf_counter()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+import importlib
 import logging
 
+from app.core import archive, backup, metrics, query_log, reminders, suggest, tracing, vault, workers, writer
+from app.core.admission import AdmissionControlMiddleware
+from app.core.negotiation import ContentNegotiationMiddleware, NegotiatedJSONResponse
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.routes import tasks, search, events, websocket, daily_notes, therapy_companion
+from app.core.database import SessionLocal, engine
+from app.core.schema import ensure_schema
+from app.routes import tasks, search, events, websocket, daily_notes, tags, calendar, batch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
+# Cold start phases in seconds, reported once the app starts serving
+startup_timings = {"imports": time.perf_counter() - _startup_begin}
+
+# Create or upgrade database tables (skipped when the stored schema version is current)
+_phase_begin = time.perf_counter()
 try:
-    logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
+    schema_state = ensure_schema(engine)
+    logger.info(f"Database schema {schema_state}")
 except Exception as e:
     logger.error(f"Failed to create database tables: {e}")
     # Don't fail startup - let health check show the error
+startup_timings["schema"] = time.perf_counter() - _phase_begin
+_phase_begin = time.perf_counter()
+
+# Time every SQL statement for /metrics and the slow-query log, and trace it
+metrics.instrument_engine(engine)
+query_log.instrument_engine(engine)
+tracing.instrument_engine(engine)
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.API_TITLE,
     version=settings.API_VERSION,
-    description="Central API for 8alls productivity suite"
+    description="Central API for 8alls productivity suite",
+    default_response_class=NegotiatedJSONResponse,
 )
 
-# Add CORS middleware
+# ?profile=1 (admin only): innermost, so the report covers the request and not its queueing
+app.add_middleware(ProfilingMiddleware, interval_ms=settings.PROFILE_INTERVAL_MS)
+
+# Bound concurrency and shed load before work reaches the threadpool
+app.add_middleware(
+    AdmissionControlMiddleware,
+    max_concurrency=settings.MAX_CONCURRENT_REQUESTS,
+    max_queue=settings.MAX_QUEUED_REQUESTS,
+    queue_timeout=settings.QUEUE_TIMEOUT_SECONDS,
+    rate_limit=settings.RATE_LIMIT_PER_SECOND,
+    rate_burst=settings.RATE_LIMIT_BURST,
+)
+
+# Root span per request when TRACE_FILE is set (outside admission control so queue time is included)
+app.add_middleware(TracingMiddleware)
+
+# Add CORS middleware (outside admission control so 429/503 responses carry CORS headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.get_cors_origins_list(),
@@ -36,13 +75,212 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# MessagePack bodies for Accept: application/msgpack, brotli/gzip for large responses
+app.add_middleware(ContentNegotiationMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    """Record per-route latency, status and database usage, and enforce query budgets."""
+    stats, token = metrics.begin_request()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        route_path = route.path if route else "<unmatched>"
+        exceeded = query_log.check_budget(f"{request.method} {route_path}", stats)
+        # Always logged; failing the request is for tests only, its writes have been committed
+        if exceeded and settings.enforce_query_budget:
+            budget, statements = exceeded
+            response = JSONResponse(
+                status_code=500,
+                content={
+                    "detail": f"Query budget exceeded: {len(statements)} statements (budget {budget})",
+                    "statements": statements,
+                },
+            )
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.observe_request(
+            request.method,
+            route.path if route else "<unmatched>",
+            status_code,
+            time.perf_counter() - start,
+            stats,
+        )
+        metrics.end_request(token)
+
+
+# Rarely used routers, imported on the first request under their prefix
+LAZY_ROUTERS = {
+    "/api/therapy-companion": "app.routes.therapy_companion",
+    "/api/stats": "app.routes.stats",
+    "/api/backups": "app.routes.backups",
+}
+_loaded_lazy_routers = set()
+
+# Paths that need every route registered (the OpenAPI schema is built once and cached)
+_DOCS_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+
+def _include_lazy_router(prefix: str) -> None:
+    """Import a lazy router and register its routes."""
+    if prefix in _loaded_lazy_routers:
+        return
+    start = time.perf_counter()
+    module = importlib.import_module(LAZY_ROUTERS[prefix])
+    app.include_router(module.router, prefix="/api")
+    _loaded_lazy_routers.add(prefix)
+    logger.info(f"Loaded router {LAZY_ROUTERS[prefix]} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+@app.middleware("http")
+async def load_lazy_routers(request: Request, call_next):
+    """Register a lazy router before routing reaches it."""
+    path = request.url.path
+    if len(_loaded_lazy_routers) < len(LAZY_ROUTERS):
+        for prefix in LAZY_ROUTERS:
+            # A batch can target any router, like the docs
+            if path.startswith(_DOCS_PATHS + ("/api/batch",)) or path.startswith(prefix):
+                _include_lazy_router(prefix)
+    return await call_next(request)
+
+
 # Include routers
 app.include_router(tasks.router, prefix="/api")
 app.include_router(search.router, prefix="/api")
 app.include_router(events.router, prefix="/api")
 app.include_router(websocket.router)
 app.include_router(daily_notes.router, prefix="/api")
-app.include_router(therapy_companion.router, prefix="/api")
+app.include_router(tags.router, prefix="/api")
+app.include_router(calendar.router, prefix="/api")
+app.include_router(batch.router, prefix="/api")
+
+startup_timings["app"] = time.perf_counter() - _phase_begin
+
+
+@app.on_event("startup")
+def report_startup_timings():
+    """Log and export how long each cold start phase took."""
+    startup_timings["total"] = time.perf_counter() - _startup_begin
+    for phase, seconds in startup_timings.items():
+        metrics.APP_STARTUP.set(seconds, phase=phase)
+    logger.info(
+        "Startup timings: "
+        + ", ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in startup_timings.items())
+    )
+
+
+@app.on_event("startup")
+async def start_reminders():
+    """Load pending event reminders and start delivering them."""
+    db = SessionLocal()
+    try:
+        reminders.scheduler.load(db)
+    except Exception as e:
+        logger.error(f"Failed to load event reminders: {e}")
+    finally:
+        db.close()
+    reminders.scheduler.start()
+
+
+@app.on_event("startup")
+def build_suggest_index():
+    """Build the in-memory typeahead index."""
+    db = SessionLocal()
+    try:
+        suggest.index.load(db)
+    except Exception as e:
+        logger.error(f"Failed to build suggest index: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+async def start_change_feed():
+    """With several workers, follow the other workers' task and event writes."""
+    if workers.multi_worker():
+        workers.feed.start(leader=workers.is_leader())
+
+
+@app.on_event("startup")
+async def start_archiver():
+    """Move completed tasks and past events to the archive tables (in one worker only)."""
+    if (settings.ARCHIVE_TASKS_AFTER_DAYS > 0 or settings.ARCHIVE_EVENTS_AFTER_DAYS > 0) and workers.is_leader():
+        archive.archiver.start()
+
+
+@app.on_event("startup")
+async def start_backups():
+    """Take a backup every BACKUP_INTERVAL_SECONDS (in one worker only)."""
+    if settings.BACKUP_INTERVAL_SECONDS > 0 and workers.is_leader():
+        backup.scheduler.start()
+
+
+@app.on_event("startup")
+def start_tracing():
+    """Export spans to TRACE_FILE, if set."""
+    tracing.start()
+
+
+@app.on_event("startup")
+async def start_vault_watcher():
+    """Ingest daily notes edited in the Obsidian vault (in one worker only)."""
+    vault_root = vault.vault_path()
+    if not (vault_root and settings.VAULT_WATCH) or not workers.is_leader():
+        return
+    from app.core.vault_watch import VaultWatcher
+    from app.routes.daily_notes import VAULT_SUBDIR_DAILY
+
+    app.state.vault_watcher = VaultWatcher(vault_root, VAULT_SUBDIR_DAILY, settings.VAULT_POLL_SECONDS)
+    app.state.vault_watcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_reminders():
+    """Stop the reminder delivery loop."""
+    await reminders.scheduler.stop()
+
+
+@app.on_event("shutdown")
+async def stop_vault_watcher():
+    """Stop watching the vault."""
+    watcher = getattr(app.state, "vault_watcher", None)
+    if watcher is not None:
+        await watcher.stop()
+
+
+@app.on_event("shutdown")
+async def stop_archiver():
+    """Stop archiving."""
+    await archive.archiver.stop()
+
+
+@app.on_event("shutdown")
+async def stop_backups():
+    """Stop scheduling backups (a running one finishes first)."""
+    await backup.scheduler.stop()
+
+
+@app.on_event("shutdown")
+async def stop_change_feed():
+    """Stop following the other workers' writes."""
+    await workers.feed.stop()
+
+
+@app.on_event("shutdown")
+def stop_writer():
+    """Commit the queued writes and stop the writer thread."""
+    writer.stop()
+
+
+@app.on_event("shutdown")
+def stop_tracing():
+    """Write out the queued traces and close TRACE_FILE."""
+    tracing.stop()
 
 
 @app.get("/")
@@ -65,3 +303,9 @@ def health():
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return {"status": "unhealthy", "error": str(e)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of request, database, WebSocket and vault metrics."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
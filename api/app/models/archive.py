@@ -0,0 +1,22 @@
+"""Archive tables: completed tasks and past events moved out of the hot tables."""
+from sqlalchemy import Column, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.event import EventColumns
+from app.models.task import TaskColumns
+
+
+class ArchivedTask(TaskColumns, Base):
+    """A task completed long enough ago to leave the tasks table."""
+
+    __tablename__ = "archived_tasks"
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ArchivedEvent(EventColumns, Base):
+    """A one-off event that ended long enough ago to leave the events table."""
+
+    __tablename__ = "archived_events"
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
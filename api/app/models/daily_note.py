@@ -1,5 +1,5 @@
 """Daily Note database model."""
-from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, JSON
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -11,9 +11,14 @@ class DailyNote(Base):
 
     date = Column(String, primary_key=True)  # YYYY-MM-DD
     title = Column(String, nullable=True)
-    content = Column(Text, nullable=True)  # Assembled markdown, for Obsidian export
+    content = Column(Text, nullable=True)  # Assembled markdown, for Obsidian export; NULL = assemble from sections
     sections = Column(JSON, nullable=True)  # {"tasks": "...", "calendar": "...", "notes": "..."}
     obsidian_path = Column(String, nullable=True)  # e.g. "Daily Notes/2026-02-22.md"
     obsidian_synced = Column(Boolean, default=False, nullable=False)
+    content_hash = Column(String, nullable=True)  # sha256 of the content last exported to the vault
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # bumped by every write; the ETag
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # ORM flushes check and increment the version; PUT and PATCH bump it in their own UPDATE
+    __mapper_args__ = {"version_id_col": version}
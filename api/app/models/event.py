@@ -1,13 +1,14 @@
 """Calendar Event model."""
-from sqlalchemy import Column, String, Text, Boolean, DateTime, JSON
+from sqlalchemy import BigInteger, Column, String, Text, Boolean, DateTime, JSON, Index, text
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 
-class Event(Base):
-    """Calendar event model."""
+class EventColumns:
+    """Columns shared by the events table and its archive."""
 
-    __tablename__ = "events"
+    # Timestamps filtered by range -> their integer UTC epoch column (app.core.timeutils.with_epochs)
+    EPOCH_COLUMNS = {"start_time": "start_epoch", "end_time": "end_epoch"}
 
     id = Column(String, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -16,6 +17,9 @@ class Event(Base):
     # Date/time fields
     start_time = Column(DateTime(timezone=True), nullable=False)
     end_time = Column(DateTime(timezone=True), nullable=False)
+    # Seconds since 1970-01-01 UTC: every range filter and ordering uses these
+    start_epoch = Column(BigInteger, nullable=False, index=True)
+    end_epoch = Column(BigInteger, nullable=False, index=True)
     all_day = Column(Boolean, default=False, nullable=False)
 
     # Location
@@ -43,3 +47,21 @@ class Event(Base):
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class Event(EventColumns, Base):
+    """Calendar event model."""
+
+    __tablename__ = "events"
+    __table_args__ = (
+        # Filtered listings are returned in start order
+        Index("ix_events_status_start_epoch", "status", "start_epoch"),
+        Index("ix_events_event_type_start_epoch", "event_type", "start_epoch"),
+        # Partial index: recurring series are few, and window queries must find them all
+        Index(
+            "ix_events_recurring_start_epoch",
+            "start_epoch",
+            sqlite_where=text("recurrence_rule IS NOT NULL"),
+            postgresql_where=text("recurrence_rule IS NOT NULL"),
+        ),
+    )
@@ -1,5 +1,5 @@
 """Living Context database model."""
-from sqlalchemy import Column, String, Boolean, DateTime, Text
+from sqlalchemy import BigInteger, Column, String, Boolean, DateTime, Text
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -8,10 +8,12 @@ class LivingContext(Base):
     """One version of the living context per session update. Append-only."""
 
     __tablename__ = "living_contexts"
+    EPOCH_COLUMNS = {"updated_at": "updated_epoch"}  # see app.core.timeutils.with_epochs
 
     id = Column(String, primary_key=True)           # UUID from iOS
     content = Column(Text, nullable=False)
     updated_at = Column(DateTime(timezone=True), nullable=False)  # From iOS
+    updated_epoch = Column(BigInteger, nullable=False, index=True)  # updated_at in seconds since 1970-01-01 UTC
     derived_from_session_id = Column(String, nullable=False)      # UUID of originating session
     obsidian_path = Column(String, nullable=True)   # e.g. "Therapy Companion/Living Context/2026-02-22.md"
     obsidian_synced = Column(Boolean, default=False, nullable=False)
@@ -0,0 +1,34 @@
+"""Pre-aggregated productivity rollups, maintained by the task and event write handlers."""
+from sqlalchemy import Column, String, Integer
+from app.core.database import Base
+
+
+class TaskDayRollup(Base):
+    """Tasks created and completed per UTC day."""
+
+    __tablename__ = "task_day_rollups"
+
+    day = Column(String, primary_key=True)  # YYYY-MM-DD
+    created = Column(Integer, nullable=False, default=0, server_default="0")
+    completed = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class OpenTaskRollup(Base):
+    """Open tasks per due date and priority; overdue counts sum the past due dates."""
+
+    __tablename__ = "open_task_rollups"
+
+    due_date = Column(String, primary_key=True)  # "" for tasks without a due date
+    priority = Column(String, primary_key=True)
+    open = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class EventDayRollup(Base):
+    """One-off, non-cancelled events and their minutes per UTC start day and event type."""
+
+    __tablename__ = "event_day_rollups"
+
+    day = Column(String, primary_key=True)  # YYYY-MM-DD
+    event_type = Column(String, primary_key=True)  # "" for events without a type
+    events = Column(Integer, nullable=False, default=0, server_default="0")
+    minutes = Column(Integer, nullable=False, default=0, server_default="0")  # all-day events add none
@@ -1,5 +1,5 @@
 """Session Summary database model."""
-from sqlalchemy import Column, String, Boolean, DateTime, Text
+from sqlalchemy import BigInteger, Column, String, Boolean, DateTime, Text
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -8,10 +8,12 @@ class SessionSummary(Base):
     """One summary record per therapy session. Append-only."""
 
     __tablename__ = "session_summaries"
+    EPOCH_COLUMNS = {"generated_at": "generated_epoch"}  # see app.core.timeutils.with_epochs
 
     id = Column(String, primary_key=True)           # UUID from iOS
     content = Column(Text, nullable=False)
-    generated_at = Column(DateTime(timezone=True), nullable=False)       # From iOS
+    generated_at = Column(DateTime(timezone=True), nullable=False)  # From iOS
+    generated_epoch = Column(BigInteger, nullable=False, index=True)  # generated_at in seconds since 1970-01-01 UTC
     covers_sessions_up_to = Column(DateTime(timezone=True), nullable=False)  # From iOS
     obsidian_path = Column(String, nullable=True)   # e.g. "Therapy Companion/Session Summaries/2026-02-22.md"
     obsidian_synced = Column(Boolean, default=False, nullable=False)
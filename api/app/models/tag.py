@@ -0,0 +1,16 @@
+"""Tag index database model."""
+from sqlalchemy import Column, String, Index
+from app.core.database import Base
+
+
+class ItemTag(Base):
+    """One row per (tag, item) — normalized copy of Task.tags / Event.tags, maintained on every write."""
+
+    __tablename__ = "item_tags"
+    __table_args__ = (
+        Index("ix_item_tags_item", "item_type", "item_id"),
+    )
+
+    tag = Column(String, primary_key=True)
+    item_type = Column(String, primary_key=True)  # 'task', 'event'
+    item_id = Column(String, primary_key=True)
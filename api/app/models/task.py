@@ -1,20 +1,37 @@
 """Task database model."""
-from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Boolean, DateTime, Text, JSON, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 
-class Task(Base):
-    """Task model."""
+class TaskColumns:
+    """Columns shared by the tasks table and its archive."""
 
-    __tablename__ = "tasks"
+    # Timestamps filtered by range -> their integer UTC epoch column (app.core.timeutils.with_epochs)
+    EPOCH_COLUMNS = {"completed_at": "completed_epoch"}
 
     id = Column(String, primary_key=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     completed = Column(Boolean, default=False, nullable=False)
     priority = Column(String, nullable=False)  # 'low', 'medium', 'high'
-    due_date = Column(String, nullable=True)  # ISO format string
+    due_date = Column(String, nullable=True, index=True)  # ISO format string
     tags = Column(JSON, nullable=True)  # Array of strings
+    completed_at = Column(DateTime(timezone=True), nullable=True)  # set when completed flips to true
+    completed_epoch = Column(BigInteger, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class Task(TaskColumns, Base):
+    """Task model."""
+
+    __tablename__ = "tasks"
+    __table_args__ = (
+        # Open/completed lists filtered by due date or priority, or sorted by creation
+        Index("ix_tasks_completed_due_date", "completed", "due_date"),
+        Index("ix_tasks_completed_priority_due_date", "completed", "priority", "due_date"),
+        Index("ix_tasks_completed_created_at", "completed", "created_at"),
+        # The archiver's scan for tasks completed before its cutoff
+        Index("ix_tasks_completed_completed_epoch", "completed", "completed_epoch"),
+    )
@@ -0,0 +1,17 @@
+"""Change feed between server worker processes."""
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class WorkerChange(Base):
+    """A task or event write, for the other workers to refresh their in-memory state from."""
+
+    __tablename__ = "worker_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    worker = Column(String, nullable=False)  # hostname:pid of the writing worker
+    item_type = Column(String, nullable=False)  # 'task', 'event'
+    item_id = Column(String, nullable=False)
+    action = Column(String, nullable=False)  # 'created', 'updated', 'deleted'
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
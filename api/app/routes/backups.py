@@ -0,0 +1,38 @@
+"""Online database backup routes (admin)."""
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.core import backup
+from app.core.auth import require_api_key
+from app.schemas.backup import BackupJob, BackupStatus
+
+router = APIRouter(prefix="/backups", tags=["backups"], dependencies=[Depends(require_api_key)])
+
+
+@router.post("", response_model=BackupJob, status_code=202)
+def start_backup(
+    kind: str = Query(backup.FULL, pattern="^(full|incremental)$", description="Full snapshot, or changed pages only"),
+):
+    """
+    Start a backup snapshot in the background and return its job; poll
+    GET /api/backups/{job_id} for progress. The API keeps serving reads and
+    writes while it runs. 409 if a backup is already running.
+    """
+    try:
+        return backup.start(kind)
+    except backup.BackupInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("", response_model=BackupStatus)
+def list_backups():
+    """This worker's recent backup jobs and the snapshots in BACKUP_DIR, oldest first."""
+    return BackupStatus(jobs=list(backup.jobs), snapshots=backup.snapshots())
+
+
+@router.get("/{job_id}", response_model=BackupJob)
+def get_backup_job(job_id: str):
+    """Progress and timings of a backup job started by this worker."""
+    for job in backup.jobs:
+        if job.id == job_id:
+            return job
+    raise HTTPException(status_code=404, detail="Backup job not found")
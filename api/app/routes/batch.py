@@ -0,0 +1,123 @@
+"""Multiplexed batch request route."""
+import copy
+import json
+import logging
+from urllib.parse import urlsplit
+from fastapi import APIRouter, HTTPException, Request
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.core import negotiation
+from app.core.database import SessionLocal, shared_session
+from app.schemas.batch import BatchRequest, BatchResponse, BatchSubRequest, BatchSubResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+# Per-request keys the router fills in; must not leak from the outer request
+_ROUTING_KEYS = ("route", "endpoint", "path_params")
+# Set by the batch itself; a sub-request cannot override them
+_OWN_HEADERS = (b"content-type", b"content-length")
+# Describe the batch entry rather than the sub-response
+_DROPPED_RESPONSE_HEADERS = ("content-length", "content-type")
+
+
+async def _dispatch(request: Request, sub: BatchSubRequest) -> BatchSubResponse:
+    """Run one sub-request through the router (skipping middleware) and capture its response."""
+    url = urlsplit(sub.path)
+    body = json.dumps(sub.body).encode() if sub.body is not None else b""
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    headers += [(name, value) for name, value in request.scope["headers"] if name in (b"authorization", b"x-api-key")]
+    headers += [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in sub.headers.items()
+        if name.lower().encode("latin-1") not in _OWN_HEADERS
+    ]
+    scope = {key: value for key, value in request.scope.items() if key not in _ROUTING_KEYS}
+    scope.update(
+        method=sub.method,
+        path=url.path,
+        raw_path=url.path.encode(),
+        query_string=url.query.encode(),
+        headers=headers,
+        # Routes may write to request.state; keep that out of the outer request and the other entries
+        state=copy.deepcopy(request.scope.get("state", {})),
+    )
+
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            return {"type": "http.disconnect"}
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status = 500
+    content_type = ""
+    response_headers = {}
+    chunks = []
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                name, value = name.decode("latin-1"), value.decode("latin-1")
+                if name == "content-type":
+                    content_type = value
+                if name not in _DROPPED_RESPONSE_HEADERS:
+                    response_headers[name] = value
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await request.app.router(scope, receive, send)
+
+    raw = b"".join(chunks)
+    if not raw:
+        payload = None
+    elif content_type.startswith(negotiation.MSGPACK_MEDIA_TYPE):
+        payload = negotiation.msgpack.unpackb(raw)
+    elif content_type.startswith("application/json"):
+        payload = json.loads(raw)
+    else:
+        payload = raw.decode("utf-8", errors="replace")
+    return BatchSubResponse(id=sub.id, status=status, headers=response_headers, body=payload)
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(payload: BatchRequest, request: Request):
+    """
+    Run several API requests in one round trip.
+
+    Sub-requests go to the existing routes in order and share one database
+    session (a session is not safe to use from several threads, so they are
+    not run concurrently). A failing sub-request is rolled back and reported
+    in its own entry without affecting the others.
+    """
+    for sub in payload.requests:
+        path = urlsplit(sub.path).path
+        if not path.startswith("/api/") or path.startswith("/api/batch"):
+            raise HTTPException(status_code=400, detail=f"Unsupported batch path: {sub.path}")
+
+    db = SessionLocal()
+    token = shared_session.set(db)
+    responses = []
+    try:
+        for sub in payload.requests:
+            try:
+                result = await _dispatch(request, sub)
+            except StarletteHTTPException as e:
+                # Raised by the router itself, e.g. 404/405 for an unknown path
+                result = BatchSubResponse(id=sub.id, status=e.status_code, body={"detail": e.detail})
+            except Exception as e:
+                logger.error(f"Batch sub-request {sub.method} {sub.path} failed: {e}")
+                result = BatchSubResponse(id=sub.id, status=500, body={"detail": "Internal Server Error"})
+            # Ends the read transaction (writes were committed by the writer) and expires
+            # loaded objects, so the next sub-request sees the writes before it
+            db.rollback()
+            responses.append(result)
+    finally:
+        shared_session.reset(token)
+        db.close()
+    return BatchResponse(responses=responses)
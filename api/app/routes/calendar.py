@@ -0,0 +1,82 @@
+"""Aggregated calendar range routes."""
+from datetime import date as date_type, datetime, time, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core import archive
+from app.core.database import get_db
+from app.models.daily_note import DailyNote as DailyNoteModel
+from app.routes.events import events_in_window
+from app.schemas.calendar import CalendarDay, CalendarEvent, CalendarRange
+
+router = APIRouter(prefix="/calendar", tags=["calendar"])
+
+MAX_RANGE_DAYS = 62
+
+
+@router.get("", response_model=CalendarRange)
+def get_calendar(
+    start: date_type = Query(..., description="First day (YYYY-MM-DD)"),
+    end: date_type = Query(..., description="Last day, inclusive (YYYY-MM-DD)"),
+    include_archived: bool = Query(False, description="Also count archived tasks and events"),
+    db: Session = Depends(get_db),
+):
+    """
+    Month/week view data in one call: event occurrences, due-task counts and
+    daily-note presence for each day in [start, end].
+
+    Runs one events window lookup, one tasks due_date range query and one
+    daily notes range query, then groups per day on the server.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be on or after start")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+
+    day_keys = [str(start + timedelta(days=i)) for i in range((end - start).days + 1)]
+    days = {key: CalendarDay(date=key, events=[], tasks_due=0, tasks_completed=0, has_note=False) for key in day_keys}
+
+    window_start = datetime.combine(start, time.min)
+    window_end = datetime.combine(end, time.max)
+    for occ_start, occ_end, event in events_in_window(db, window_start, window_end, include_archived=include_archived):
+        compact = CalendarEvent(
+            id=event.id,
+            title=event.title,
+            start_time=occ_start,
+            end_time=occ_end,
+            all_day=event.all_day,
+            status=event.status,
+            event_type=event.event_type,
+            color=event.color,
+        )
+        # Multi-day occurrences appear on every day they touch
+        day = max(occ_start.date(), start)
+        last = min(occ_end.date(), end)
+        if occ_end.time() == time.min and occ_end.date() > occ_start.date():
+            last = min(last, occ_end.date() - timedelta(days=1))  # ends at midnight
+        while day <= last:
+            days[str(day)].events.append(compact)
+            day += timedelta(days=1)
+
+    task_model = archive.task_source(include_archived)
+    tasks = (
+        db.query(task_model.due_date, task_model.completed)
+        .filter(task_model.due_date >= str(start), task_model.due_date < str(end + timedelta(days=1)))
+        .all()
+    )
+    for due_date, completed in tasks:
+        day = days.get(due_date[:10])
+        if day:
+            day.tasks_due += 1
+            day.tasks_completed += int(bool(completed))
+
+    notes = (
+        db.query(DailyNoteModel.date)
+        .filter(DailyNoteModel.date >= str(start), DailyNoteModel.date <= str(end))
+        .all()
+    )
+    for (note_date,) in notes:
+        if note_date in days:
+            days[note_date].has_note = True
+
+    return CalendarRange(start=str(start), end=str(end), days=list(days.values()))
@@ -1,10 +1,21 @@
 """Daily Notes API routes."""
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date as date_type
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import JSON, and_, bindparam, cast, delete, func, literal, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
 
+from app.core import vault, writer
+from app.core.daily_note_format import assemble_content
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.metrics import VAULT_WRITE_DURATION
 from app.models.daily_note import DailyNote as DailyNoteModel
 from app.models.task import Task as TaskModel
 from app.models.event import Event as EventModel
@@ -13,30 +24,50 @@ from app.schemas.daily_note import (
     DailyNoteCreate,
     DailyNoteUpdate,
     DailyNotePatch,
+    VaultExportResult,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/daily-notes", tags=["daily-notes"])
 
+VAULT_SUBDIR_DAILY = "Daily Notes"
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Version required by an If-Match header; None when absent or "*"."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.split(",")[0].strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=412, detail="If-Match does not match the current version")
 
-def _assemble_content(sections: dict) -> str:
-    """Assemble sections dict into a full markdown string."""
-    section_order = ["tasks", "calendar", "notes", "completed"]
-    section_labels = {
-        "tasks": "## Tasks",
-        "calendar": "## Calendar",
-        "notes": "## Notes",
-        "completed": "## Completed",
-    }
-    parts = []
-    # Render known sections in preferred order first
-    for key in section_order:
-        if key in sections and sections[key]:
-            parts.append(f"{section_labels.get(key, f'## {key.title()}')}\n{sections[key]}")
-    # Then any custom sections
-    for key, value in sections.items():
-        if key not in section_order and value:
-            parts.append(f"## {key.title()}\n{value}")
-    return "\n\n".join(parts)
+
+def _set_etag(response: Response, note: DailyNoteModel) -> None:
+    response.headers["ETag"] = f'"{note.version}"'
+
+
+def _raise_missing_or_stale(db: Session, date: str) -> None:
+    """After a conditional UPDATE matched nothing: 404 if the note is gone, else 412."""
+    exists = db.query(DailyNoteModel.date).filter(DailyNoteModel.date == date).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Daily note not found")
+    raise HTTPException(status_code=412, detail="If-Match does not match the current version")
+
+
+def _merged_sections(dialect_name: str, sections: dict):
+    """SQL expression merging `sections` into the stored JSON object in place."""
+    if dialect_name == "postgresql":
+        # Bound as JSONB objects: a str would be encoded as a JSON string and || would build an array
+        merged = func.coalesce(cast(DailyNoteModel.sections, JSONB), literal({}, JSONB)).op("||")(
+            bindparam("sections_patch", sections, type_=JSONB)
+        )
+        return cast(merged, JSON)
+    # SQLite: RFC 7396 merge patch; section values are strings so it is a key-level merge
+    return func.json_patch(func.coalesce(DailyNoteModel.sections, "{}"), json.dumps(sections))
 
 
 def _build_today_sections(db: Session, today: str) -> dict:
@@ -47,19 +78,19 @@ def _build_today_sections(db: Session, today: str) -> dict:
         for t in tasks
     ) or ""
 
-    from datetime import datetime
-    day_start = datetime.fromisoformat(f"{today}T00:00:00")
-    day_end = datetime.fromisoformat(f"{today}T23:59:59")
+    from datetime import date
     from sqlalchemy import and_
+    from app.core.timeutils import day_epochs
+    day_start, next_day = day_epochs(date.fromisoformat(today))
     events = (
         db.query(EventModel)
         .filter(
             and_(
-                EventModel.start_time <= day_end,
-                EventModel.end_time >= day_start,
+                EventModel.start_epoch < next_day,
+                EventModel.end_epoch >= day_start,
             )
         )
-        .order_by(EventModel.start_time.asc())
+        .order_by(EventModel.start_epoch.asc())
         .all()
     )
     event_lines = "\n".join(
@@ -97,7 +128,7 @@ def get_today(db: Session = Depends(get_db)):
         return note
 
     sections = _build_today_sections(db, today)
-    content = _assemble_content(sections)
+    content = assemble_content(sections)
     note = DailyNoteModel(
         date=today,
         title=f"Daily Note - {today}",
@@ -105,30 +136,29 @@ def get_today(db: Session = Depends(get_db)):
         content=content,
         obsidian_synced=False,
     )
-    db.add(note)
-    db.commit()
-    db.refresh(note)
-    return note
+
+    def write(db: Session) -> DailyNoteModel:
+        db.add(note)
+        return note
+
+    return writer.run(db, write)
 
 
 @router.get("/{date}", response_model=DailyNote)
-def get_daily_note(date: str, db: Session = Depends(get_db)):
-    """Get a daily note by date (YYYY-MM-DD)."""
+def get_daily_note(date: str, response: Response, db: Session = Depends(get_db)):
+    """Get a daily note by date (YYYY-MM-DD). The ETag is the note's version."""
     note = db.query(DailyNoteModel).filter(DailyNoteModel.date == date).first()
     if not note:
         raise HTTPException(status_code=404, detail="Daily note not found")
+    _set_etag(response, note)
     return note
 
 
 @router.post("", response_model=DailyNote, status_code=201)
 def create_daily_note(note: DailyNoteCreate, db: Session = Depends(get_db)):
     """Create a daily note for a specific date. Returns 409 if one already exists."""
-    existing = db.query(DailyNoteModel).filter(DailyNoteModel.date == note.date).first()
-    if existing:
-        raise HTTPException(status_code=409, detail="Daily note already exists for this date")
-
     sections = note.sections or {}
-    content = _assemble_content(sections) if sections else None
+    content = assemble_content(sections) if sections else None
 
     db_note = DailyNoteModel(
         date=note.date,
@@ -138,70 +168,225 @@ def create_daily_note(note: DailyNoteCreate, db: Session = Depends(get_db)):
         obsidian_path=note.obsidian_path,
         obsidian_synced=note.obsidian_synced,
     )
-    db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
-    return db_note
 
+    def write(db: Session) -> DailyNoteModel:
+        db.add(db_note)
+        try:
+            db.flush()  # the primary key on date rejects duplicates; no existence check needed
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail="Daily note already exists for this date")
+        return db_note
 
-@router.put("/{date}", response_model=DailyNote)
-def update_daily_note(date: str, note: DailyNoteUpdate, db: Session = Depends(get_db)):
-    """Fully replace a daily note's fields."""
-    db_note = db.query(DailyNoteModel).filter(DailyNoteModel.date == date).first()
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Daily note not found")
+    return writer.run(db, write)
+
+
+def _export_one(abs_path: str, content: str) -> None:
+    with VAULT_WRITE_DURATION.time(subdir=VAULT_SUBDIR_DAILY):
+        vault.write_vault_file(abs_path, content)
+
+
+@router.post("/export-to-vault", response_model=VaultExportResult)
+def export_to_vault(
+    start_date: Optional[str] = Query(None, description="Export from date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="Export to date (YYYY-MM-DD)"),
+    force: bool = Query(False, description="Rewrite files even if their content is unchanged"),
+    db: Session = Depends(get_db),
+):
+    """
+    Write the daily notes in a date range to the Obsidian vault.
+
+    Notes whose content hash matches the last export (and whose file still
+    exists) are skipped. The new hashes are stored before the files are
+    written, so the vault watcher recognises the writes as our own instead of
+    ingesting them back; notes edited since they were read are left for the
+    next export. Files are written from a worker pool, then the exported notes
+    are marked obsidian_synced in one bulk UPDATE. Exporting does not change a
+    note, so its version (and ETag) stays the same.
+    """
+    vault_root = vault.vault_path()
+    if not vault_root:
+        raise HTTPException(status_code=400, detail="VAULT_PATH is not configured")
+
+    query = db.query(
+        DailyNoteModel.date,
+        DailyNoteModel.content,
+        DailyNoteModel.sections,
+        DailyNoteModel.obsidian_path,
+        DailyNoteModel.obsidian_synced,
+        DailyNoteModel.content_hash,
+        DailyNoteModel.version,
+    )
+    if start_date:
+        query = query.filter(DailyNoteModel.date >= start_date)
+    if end_date:
+        query = query.filter(DailyNoteModel.date <= end_date)
 
+    pending = []  # (note, relative_path, abs_path, content, hash)
+    exported = unchanged = 0
+    failed = []
+    for note in query:
+        relative_path = note.obsidian_path or f"{VAULT_SUBDIR_DAILY}/{note.date}.md"
+        abs_path = vault.resolve(vault_root, relative_path)
+        if abs_path is None:
+            logger.warning(f"Daily note {note.date} has an obsidian_path outside the vault: {relative_path}")
+            failed.append(note.date)
+            continue
+        content = note.content if note.content is not None else assemble_content(note.sections or {})
+        digest = vault.content_hash(content)
+        if not force and digest == note.content_hash and note.obsidian_synced and os.path.exists(abs_path):
+            unchanged += 1
+            continue
+        pending.append((note, relative_path, abs_path, content, digest))
+    if not pending:
+        return VaultExportResult(exported=exported, unchanged=unchanged, failed=sorted(failed))
+
+    table = DailyNoteModel.__table__
+    # Guarded by version: a note edited since it was read keeps its hash and is not written
+    claim = (
+        table.update()
+        .where(and_(table.c.date == bindparam("b_date"), table.c.version == bindparam("b_version")))
+        .values(obsidian_path=bindparam("b_path"), content_hash=bindparam("b_hash"), obsidian_synced=False)
+    )
+
+    def claim_files(db: Session) -> set:
+        db.execute(claim, [
+            {"b_date": note.date, "b_version": note.version, "b_path": path, "b_hash": digest}
+            for note, path, _, _, digest in pending
+        ])
+        stored = dict(db.query(DailyNoteModel.date, DailyNoteModel.content_hash).filter(
+            DailyNoteModel.date.in_([note.date for note, *_ in pending])
+        ))
+        return {note.date for note, _, _, _, digest in pending if stored.get(note.date) == digest}
+
+    claimed = writer.run(db, claim_files)
+    pending = [item for item in pending if item[0].date in claimed]
+
+    written, unwritten = [], []
+    with ThreadPoolExecutor(max_workers=max(1, settings.VAULT_EXPORT_WORKERS)) as pool:
+        futures = [pool.submit(_export_one, abs_path, content) for _, _, abs_path, content, _ in pending]
+        for (note, _, _, _, digest), future in zip(pending, futures):
+            try:
+                future.result()
+            except OSError as e:
+                logger.error(f"Failed to export daily note {note.date}: {e}")
+                failed.append(note.date)
+                unwritten.append({"b_date": note.date, "b_hash": digest, "b_previous": note.content_hash})
+                continue
+            exported += 1
+            written.append({"b_date": note.date, "b_version": note.version})
+
+    def mark(db: Session) -> None:
+        if written:
+            db.execute(
+                table.update()
+                .where(and_(table.c.date == bindparam("b_date"), table.c.version == bindparam("b_version")))
+                .values(obsidian_synced=True),
+                written,
+            )
+        if unwritten:
+            # The file was not replaced: put back the hash of what it still holds
+            db.execute(
+                table.update()
+                .where(and_(table.c.date == bindparam("b_date"), table.c.content_hash == bindparam("b_hash")))
+                .values(content_hash=bindparam("b_previous")),
+                unwritten,
+            )
+
+    if written or unwritten:
+        writer.run(db, mark)
+
+    return VaultExportResult(exported=exported, unchanged=unchanged, failed=sorted(failed))
+
+
+@router.put("/{date}", response_model=DailyNote)
+def update_daily_note(
+    date: str,
+    note: DailyNoteUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Fully replace a daily note's fields. Honours If-Match with the note's version."""
+    expected_version = _parse_if_match(if_match)
     update_data = note.model_dump(exclude_unset=True)
 
     # If sections updated but content not explicitly set, reassemble content
     if "sections" in update_data and "content" not in update_data:
-        update_data["content"] = _assemble_content(update_data["sections"])
-
-    for field, value in update_data.items():
-        setattr(db_note, field, value)
-
-    db.commit()
-    db.refresh(db_note)
+        update_data["content"] = assemble_content(update_data["sections"])
+
+    def write(db: Session) -> DailyNoteModel:
+        stmt = update(DailyNoteModel).where(DailyNoteModel.date == date)
+        if expected_version is not None:
+            stmt = stmt.where(DailyNoteModel.version == expected_version)
+        db_note = db.scalars(
+            stmt.values(version=DailyNoteModel.version + 1, **update_data).returning(DailyNoteModel),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if db_note is None:
+            _raise_missing_or_stale(db, date)
+        return db_note
+
+    db_note = writer.run(db, write)
+    _set_etag(response, db_note)
     return db_note
 
 
 @router.patch("/{date}", response_model=DailyNote)
-def patch_daily_note(date: str, patch: DailyNotePatch, db: Session = Depends(get_db)):
+def patch_daily_note(
+    date: str,
+    patch: DailyNotePatch,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     Partially update a daily note.
 
     Sections are **merged** at the key level — only provided section keys are
     updated. Other sections are left untouched. This lets multiple apps each
     own different sections without overwriting each other.
-    """
-    db_note = db.query(DailyNoteModel).filter(DailyNoteModel.date == date).first()
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Daily note not found")
-
-    if patch.sections is not None:
-        existing = dict(db_note.sections or {})
-        existing.update(patch.sections)
-        db_note.sections = existing
-        db_note.content = _assemble_content(db_note.sections)
-
-    if patch.obsidian_path is not None:
-        db_note.obsidian_path = patch.obsidian_path
 
-    if patch.obsidian_synced is not None:
-        db_note.obsidian_synced = patch.obsidian_synced
-
-    db.commit()
-    db.refresh(db_note)
+    The merge happens inside a single UPDATE (no read-modify-write), so
+    concurrent PATCHes never lose each other's sections. That UPDATE also
+    clears the stored content, which is assembled from the merged sections
+    when the note is read or exported. Send If-Match with the note's ETag to
+    apply the patch only if nobody wrote in between.
+    """
+    expected_version = _parse_if_match(if_match)
+
+    def write(db: Session) -> DailyNoteModel:
+        values = {"version": DailyNoteModel.version + 1}
+        if patch.sections is not None:
+            values["sections"] = _merged_sections(db.get_bind().dialect.name, patch.sections)
+            values["content"] = None
+        if patch.obsidian_path is not None:
+            values["obsidian_path"] = patch.obsidian_path
+        if patch.obsidian_synced is not None:
+            values["obsidian_synced"] = patch.obsidian_synced
+
+        stmt = update(DailyNoteModel).where(DailyNoteModel.date == date)
+        if expected_version is not None:
+            stmt = stmt.where(DailyNoteModel.version == expected_version)
+        db_note = db.scalars(
+            stmt.values(**values).returning(DailyNoteModel),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if db_note is None:
+            _raise_missing_or_stale(db, date)
+        return db_note
+
+    db_note = writer.run(db, write)
+    _set_etag(response, db_note)
     return db_note
 
 
 @router.delete("/{date}", status_code=204)
 def delete_daily_note(date: str, db: Session = Depends(get_db)):
     """Delete a daily note."""
-    db_note = db.query(DailyNoteModel).filter(DailyNoteModel.date == date).first()
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Daily note not found")
+    def write(db: Session) -> None:
+        deleted = db.execute(delete(DailyNoteModel).where(DailyNoteModel.date == date))
+        if not deleted.rowcount:
+            raise HTTPException(status_code=404, detail="Daily note not found")
 
-    db.delete(db_note)
-    db.commit()
+    writer.run(db, write)
     return None
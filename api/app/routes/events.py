@@ -1,19 +1,35 @@
 """Calendar event routes."""
+import heapq
 import uuid
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, delete, or_, update
 
+from app.core import archive, freebusy, rollups, suggest, workers, writer
+from app.core import tags as tag_index
+from app.core.reminders import scheduler as reminder_scheduler
 from app.core.database import get_db
+from app.core.recurrence import occurrences
+from app.core.timeutils import day_epochs, to_epoch, to_utc_naive, with_epochs
+from app.models.archive import ArchivedEvent
 from app.models.event import Event as EventModel
-from app.schemas.event import Event, EventCreate, EventUpdate
+from app.schemas.event import (
+    ConflictCheck,
+    Event,
+    EventCreate,
+    EventUpdate,
+    FreeBusy,
+    SlotConflicts,
+    TimeSlot,
+)
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 # Import broadcast function (will be available after websocket module is imported)
-async def broadcast_event_change(event_type: str, data: dict):
+async def broadcast_event_change(event_type: str, data):
     """Broadcast event changes via WebSocket."""
     try:
         from app.routes.websocket import broadcast_event
@@ -22,12 +38,24 @@ async def broadcast_event_change(event_type: str, data: dict):
         pass  # WebSocket not available
 
 
+def _has_listeners() -> bool:
+    """Whether any WebSocket client would receive a broadcast."""
+    try:
+        from app.routes.websocket import has_listeners
+    except ImportError:
+        return False
+    return has_listeners()
+
+
 @router.get("", response_model=List[Event])
 def get_events(
     start_date: Optional[datetime] = Query(None, description="Filter events starting from this date"),
     end_date: Optional[datetime] = Query(None, description="Filter events until this date"),
     event_type: Optional[str] = Query(None, description="Filter by event type"),
     status: Optional[str] = Query(None, description="Filter by status (confirmed, tentative, cancelled)"),
+    tag: Optional[List[str]] = Query(None, description="Only events with this tag (repeatable)"),
+    tag_mode: str = Query("all", pattern="^(all|any)$", description="Require all tags (AND) or any tag (OR)"),
+    include_archived: bool = Query(False, description="Also return archived (long past) events"),
     db: Session = Depends(get_db)
 ):
     """
@@ -38,30 +66,200 @@ def get_events(
     - end_date: Return events that end on or before this date
     - event_type: Filter by event type (meeting, appointment, etc.)
     - status: Filter by status (confirmed, tentative, cancelled)
+    - tag: Filter by tag, repeatable; tag_mode=all (AND, default) or any (OR)
+    - include_archived: also return events moved to the archive
     """
-    query = db.query(EventModel)
+    model = archive.event_source(include_archived)
+    query = db.query(model)
 
     # Apply date range filters
     if start_date:
-        query = query.filter(EventModel.end_time >= start_date)
+        query = query.filter(model.end_epoch >= to_epoch(start_date))
     if end_date:
-        query = query.filter(EventModel.start_time <= end_date)
+        query = query.filter(model.start_epoch <= to_epoch(end_date))
 
     # Apply type and status filters
     if event_type:
-        query = query.filter(EventModel.event_type == event_type)
+        query = query.filter(model.event_type == event_type)
     if status:
-        query = query.filter(EventModel.status == status)
+        query = query.filter(model.status == status)
+    if tag:
+        query = query.filter(model.id.in_(tag_index.tagged_ids(tag_index.EVENT, tag, tag_mode)))
 
     # Order by start time
-    events = query.order_by(EventModel.start_time.asc()).all()
+    events = query.order_by(model.start_epoch.asc()).all()
     return events
 
 
+def events_in_window(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    include_cancelled: bool = True,
+    include_archived: bool = False,
+) -> List[Tuple[datetime, datetime, EventModel]]:
+    """
+    Return (occurrence_start, occurrence_end, event) for every occurrence
+    overlapping [start, end], expanding recurring events, sorted by start.
+    Times are naive UTC.
+    """
+    start, end = to_utc_naive(start), to_utc_naive(end)
+    model = archive.event_source(include_archived)
+    overlapping = db.query(model).filter(model.start_epoch <= to_epoch(end), model.end_epoch >= to_epoch(start))
+    # Recurring series that began before the window can still occur inside it (they are never archived)
+    recurring = db.query(EventModel).filter(
+        EventModel.recurrence_rule.isnot(None),
+        EventModel.start_epoch < to_epoch(start),
+    )
+    if not include_cancelled:
+        overlapping = overlapping.filter(model.status != "cancelled")
+        recurring = recurring.filter(EventModel.status != "cancelled")
+
+    rows = {event.id: event for event in overlapping.all()}
+    rows.update((event.id, event) for event in recurring.all())
+
+    result = []
+    for event in rows.values():
+        for occ_start, occ_end in occurrences(event.start_time, event.end_time, event.recurrence_rule, start, end):
+            result.append((occ_start, occ_end, event))
+    result.sort(key=lambda item: item[0])
+    return result
+
+
+def merge_intervals(
+    intervals: List[Tuple[datetime, datetime]],
+    granularity: int = 0,
+) -> List[Tuple[datetime, datetime]]:
+    """Union of intervals after sorting; widened to `granularity`-minute boundaries first."""
+    if granularity:
+        step = timedelta(minutes=granularity)
+        epoch = datetime(1970, 1, 1)
+        intervals = [
+            (epoch + ((s - epoch) // step) * step, epoch + -((epoch - e) // step) * step)
+            for s, e in intervals
+        ]
+    merged: List[Tuple[datetime, datetime]] = []
+    for s, e in sorted(intervals):
+        if merged and s <= merged[-1][1]:
+            if e > merged[-1][1]:
+                merged[-1] = (merged[-1][0], e)
+        else:
+            merged.append((s, e))
+    return merged
+
+
+def find_conflicts(
+    db: Session,
+    slots: List[TimeSlot],
+    exclude_id: Optional[str] = None,
+) -> List[List[EventModel]]:
+    """
+    For each slot, the non-cancelled events overlapping it (touching ends do
+    not count). One window fetch covers the whole batch; a sweep over
+    start-sorted occurrences and slots then matches them. Sorting and the heap
+    cost O((n + m) log n), but each slot scans the occurrences still active,
+    so the worst case (long events under many slots) is O(n·m), the size of
+    the largest possible result.
+    """
+    if not slots:
+        return []
+    bounds = [(to_utc_naive(slot.start_time), to_utc_naive(slot.end_time)) for slot in slots]
+    window_start = min(start for start, _ in bounds)
+    window_end = max(end for _, end in bounds)
+    found = [
+        (occ_start, occ_end, event)
+        for occ_start, occ_end, event in events_in_window(db, window_start, window_end, include_cancelled=False)
+        if event.id != exclude_id
+    ]
+
+    results: List[List[EventModel]] = [[] for _ in slots]
+    active: List[tuple] = []  # heap of (occurrence_end, seq, occurrence_start, event)
+    position = 0
+    for slot_index in sorted(range(len(slots)), key=lambda i: bounds[i][0]):
+        slot_start, slot_end = bounds[slot_index]
+        while position < len(found) and found[position][0] < slot_end:
+            occ_start, occ_end, event = found[position]
+            heapq.heappush(active, (occ_end, position, occ_start, event))
+            position += 1
+        # Slots are visited in start order, so anything ending by now is done for good
+        while active and active[0][0] <= slot_start:
+            heapq.heappop(active)
+        seen = set()
+        for _, _, occ_start, event in active:
+            if occ_start < slot_end and event.id not in seen:
+                seen.add(event.id)
+                results[slot_index].append(event)
+    return results
+
+
+def _raise_on_conflicts(db: Session, start_time: datetime, end_time: datetime, exclude_id: Optional[str] = None):
+    """409 with the overlapping events if the slot is already booked."""
+    conflicts = find_conflicts(db, [TimeSlot(start_time=start_time, end_time=end_time)], exclude_id)[0]
+    if conflicts:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Event conflicts with existing events",
+                "conflicts": jsonable_encoder([Event.model_validate(event) for event in conflicts]),
+            },
+        )
+
+
+@router.get("/freebusy", response_model=FreeBusy)
+def get_freebusy(
+    start: datetime = Query(..., description="Window start"),
+    end: datetime = Query(..., description="Window end"),
+    granularity: int = Query(0, ge=0, le=1440, description="Round busy intervals out to this many minutes"),
+    db: Session = Depends(get_db),
+):
+    """
+    Merged busy intervals in [start, end], excluding cancelled events and
+    expanding recurring ones. Times are returned in UTC.
+    """
+    start, end = to_utc_naive(start), to_utc_naive(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    key = (start, end, granularity)
+    cached = freebusy.get(key)
+    if cached is not None:
+        return cached
+    generation = freebusy.generation()
+
+    busy = merge_intervals(
+        [(s, e) for s, e, _ in events_in_window(db, start, end, include_cancelled=False)],
+        granularity,
+    )
+    # Clip to the requested window
+    busy = [(max(s, start), min(e, end)) for s, e in busy if e > start and s < end]
+    result = FreeBusy(start=start, end=end, granularity=granularity, busy=busy)
+
+    freebusy.put(key, result, generation)
+    return result
+
+
+@router.post("/conflicts", response_model=List[SlotConflicts])
+def check_conflicts(payload: ConflictCheck, db: Session = Depends(get_db)):
+    """Return the existing events overlapping each candidate slot, in request order."""
+    for slot in payload.slots:
+        if slot.end_time <= slot.start_time:
+            raise HTTPException(status_code=400, detail="end_time must be after start_time")
+    conflicts = find_conflicts(db, payload.slots, payload.exclude_id)
+    return [
+        SlotConflicts(index=i, start_time=slot.start_time, end_time=slot.end_time, conflicts=events)
+        for i, (slot, events) in enumerate(zip(payload.slots, conflicts))
+    ]
+
+
 @router.get("/{event_id}", response_model=Event)
-def get_event(event_id: str, db: Session = Depends(get_db)):
+def get_event(
+    event_id: str,
+    include_archived: bool = Query(False, description="Also look in the archive"),
+    db: Session = Depends(get_db),
+):
     """Get a specific calendar event by ID."""
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    model = archive.event_source(include_archived)
+    event = db.query(model).filter(model.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     return event
@@ -71,6 +269,7 @@ def get_event(event_id: str, db: Session = Depends(get_db)):
 async def create_event(
     event: EventCreate,
     background_tasks: BackgroundTasks,
+    check_conflicts: bool = Query(False, description="Reject with 409 if the event overlaps existing events"),
     db: Session = Depends(get_db)
 ):
     """Create a new calendar event."""
@@ -84,18 +283,26 @@ async def create_event(
     # Generate unique ID
     event_id = str(uuid.uuid4())
 
-    # Create event
-    db_event = EventModel(id=event_id, **event.dict())
-    db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
-
-    # Broadcast event creation
-    background_tasks.add_task(
-        broadcast_event_change,
-        "event_created",
-        Event.from_orm(db_event).dict()
-    )
+    def write(db: Session) -> EventModel:
+        # Checked inside the write job, so no other write can book the slot in between
+        if check_conflicts and event.status != "cancelled":
+            _raise_on_conflicts(db, event.start_time, event.end_time)
+        db_event = EventModel(id=event_id, **with_epochs(EventModel, event.dict()))
+        db.add(db_event)
+        tag_index.add_tags(db, tag_index.EVENT, event_id, db_event.tags)
+        db.flush()  # created_at comes back through INSERT ... RETURNING
+        rollups.apply_event(db, None, rollups.EventState.from_row(db_event))
+        workers.record(db, tag_index.EVENT, event_id, "created")
+        return db_event
+
+    db_event = await writer.run_async(db, write)
+    freebusy.invalidate()
+    reminder_scheduler.schedule(db_event)
+    suggest.index.index_event(db_event)
+
+    # Broadcast event creation; the payload is only built if someone is listening
+    if _has_listeners():
+        background_tasks.add_task(broadcast_event_change, "event_created", Event.model_validate(db_event))
 
     return db_event
 
@@ -105,37 +312,56 @@ async def update_event(
     event_id: str,
     event: EventUpdate,
     background_tasks: BackgroundTasks,
+    check_conflicts: bool = Query(False, description="Reject with 409 if the new time overlaps existing events"),
     db: Session = Depends(get_db)
 ):
     """Update a calendar event."""
-    db_event = db.query(EventModel).filter(EventModel.id == event_id).first()
-    if not db_event:
-        raise HTTPException(status_code=404, detail="Event not found")
-
     # Update only provided fields
     update_data = event.dict(exclude_unset=True)
 
-    # Validate time range if both are provided
-    start_time = update_data.get("start_time", db_event.start_time)
-    end_time = update_data.get("end_time", db_event.end_time)
-    if end_time <= start_time:
-        raise HTTPException(
-            status_code=400,
-            detail="end_time must be after start_time"
-        )
-
-    for key, value in update_data.items():
-        setattr(db_event, key, value)
-
-    db.commit()
-    db.refresh(db_event)
+    def write(db: Session) -> EventModel:
+        current = None
+        if check_conflicts or update_data.keys() & rollups.EVENT_FIELDS:
+            # The time range check, the conflict check and the rollups need the stored row
+            current = db.query(*rollups.EVENT_COLUMNS).filter(EventModel.id == event_id).with_for_update().first()
+            if not current:
+                raise HTTPException(status_code=404, detail="Event not found")
+
+            # Validate time range against the stored side when only one is provided
+            start_time = update_data.get("start_time", current.start_time)
+            end_time = update_data.get("end_time", current.end_time)
+            if to_utc_naive(end_time) <= to_utc_naive(start_time):
+                raise HTTPException(
+                    status_code=400,
+                    detail="end_time must be after start_time"
+                )
+            if check_conflicts and update_data.get("status", current.status) != "cancelled":
+                _raise_on_conflicts(db, start_time, end_time, exclude_id=event_id)
+
+        # UPDATE ... RETURNING finds, writes and reloads the row
+        db_event = db.scalars(
+            update(EventModel)
+            .where(EventModel.id == event_id)
+            .values(**with_epochs(EventModel, update_data))
+            .returning(EventModel)
+        ).first()
+        if not db_event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        if "tags" in update_data:
+            tag_index.sync_tags(db, tag_index.EVENT, event_id, db_event.tags)
+        if current is not None:
+            rollups.apply_event(db, rollups.EventState.from_row(current), rollups.EventState.from_row(db_event))
+        workers.record(db, tag_index.EVENT, event_id, "updated")
+        return db_event
+
+    db_event = await writer.run_async(db, write)
+    freebusy.invalidate()
+    reminder_scheduler.schedule(db_event)
+    suggest.index.index_event(db_event)
 
     # Broadcast event update
-    background_tasks.add_task(
-        broadcast_event_change,
-        "event_updated",
-        Event.from_orm(db_event).dict()
-    )
+    if _has_listeners():
+        background_tasks.add_task(broadcast_event_change, "event_updated", Event.model_validate(db_event))
 
     return db_event
 
@@ -147,43 +373,56 @@ async def delete_event(
     db: Session = Depends(get_db)
 ):
     """Delete a calendar event."""
-    db_event = db.query(EventModel).filter(EventModel.id == event_id).first()
-    if not db_event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    def write(db: Session) -> None:
+        old = db.execute(
+            delete(EventModel).where(EventModel.id == event_id).returning(*rollups.EVENT_COLUMNS)
+        ).first()
+        if not old:
+            # Archived events can still be deleted
+            old = db.execute(
+                delete(ArchivedEvent).where(ArchivedEvent.id == event_id).returning(*rollups.ARCHIVED_EVENT_COLUMNS)
+            ).first()
+        if not old:
+            raise HTTPException(status_code=404, detail="Event not found")
+        tag_index.clear_tags(db, tag_index.EVENT, event_id)
+        rollups.apply_event(db, rollups.EventState.from_row(old), None)
+        workers.record(db, tag_index.EVENT, event_id, "deleted")
+
+    await writer.run_async(db, write)
 
     # Broadcast event deletion
-    background_tasks.add_task(
-        broadcast_event_change,
-        "event_deleted",
-        {"id": event_id}
-    )
+    if _has_listeners():
+        background_tasks.add_task(broadcast_event_change, "event_deleted", {"id": event_id})
 
-    db.delete(db_event)
-    db.commit()
+    freebusy.invalidate()
+    reminder_scheduler.unschedule(event_id)
+    suggest.index.remove(tag_index.EVENT, event_id)
     return None
 
 
 @router.get("/date/{date}", response_model=List[Event])
-def get_events_by_date(date: str, db: Session = Depends(get_db)):
+def get_events_by_date(
+    date: str,
+    include_archived: bool = Query(False, description="Also return archived (long past) events"),
+    db: Session = Depends(get_db),
+):
     """
     Get all events for a specific date (YYYY-MM-DD format).
 
     Returns events that occur on or overlap with the specified date.
     """
     try:
-        # Parse the date string
-        target_date = datetime.fromisoformat(date)
-        # Get start and end of the day
-        day_start = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = target_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-        # Find events that overlap with this day
-        events = db.query(EventModel).filter(
+        # Parse the date string (a time part is ignored)
+        day_start, next_day = day_epochs(datetime.fromisoformat(date).date())
+
+        # Find events that overlap with this UTC day
+        model = archive.event_source(include_archived)
+        events = db.query(model).filter(
             and_(
-                EventModel.start_time <= day_end,
-                EventModel.end_time >= day_start
+                model.start_epoch < next_day,
+                model.end_epoch >= day_start
             )
-        ).order_by(EventModel.start_time.asc()).all()
+        ).order_by(model.start_epoch.asc()).all()
 
         return events
     except ValueError:
@@ -1,10 +1,11 @@
 """Search API routes."""
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from app.core import archive, suggest
 from app.core.database import get_db
-from app.models.task import Task as TaskModel
+from app.schemas.search import Suggestion
 from app.schemas.task import Task
 
 router = APIRouter(prefix="/search", tags=["search"])
@@ -13,12 +14,29 @@ router = APIRouter(prefix="/search", tags=["search"])
 @router.get("", response_model=List[Task])
 def search(
     q: str = Query(..., description="Search query"),
+    include_archived: bool = Query(False, description="Also search archived (long completed) tasks"),
     db: Session = Depends(get_db)
 ):
     """Search across all tasks."""
     # Simple search in title and description
-    tasks = db.query(TaskModel).filter(
-        (TaskModel.title.contains(q)) |
-        (TaskModel.description.contains(q))
+    model = archive.task_source(include_archived)
+    tasks = db.query(model).filter(
+        (model.title.contains(q)) |
+        (model.description.contains(q))
     ).all()
     return tasks
+
+
+@router.get("/suggest", response_model=List[Suggestion])
+def suggest_completions(
+    prefix: str = Query(..., min_length=1, description="Text typed so far"),
+    limit: int = Query(10, ge=1, le=50),
+    kind: Optional[List[str]] = Query(None, description="Restrict to task, event, location or tag (repeatable)"),
+):
+    """
+    Typeahead suggestions from task titles, event titles and locations, and tags.
+
+    Served from an in-memory index without touching the database; matches
+    words starting with the prefix, then close misspellings.
+    """
+    return [s._asdict() for s in suggest.index.suggest(prefix, limit, kind)]
@@ -0,0 +1,107 @@
+"""Productivity stats read from the incrementally maintained rollups."""
+from datetime import date as date_type, datetime, time, timedelta
+from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core import rollups
+from app.core.database import get_db
+from app.core.recurrence import occurrences
+from app.core.timeutils import to_epoch, to_utc_naive
+from app.models.event import Event as EventModel
+from app.models.rollup import EventDayRollup, OpenTaskRollup, TaskDayRollup
+from app.schemas.stats import Stats, StatsBucket
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+MAX_RANGE_DAYS = 732
+
+# event_hours key for events without an event_type
+UNTYPED = "other"
+
+
+def _bucket_start(day: date_type, bucket: str) -> date_type:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())  # ISO weeks start on Monday
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+@router.get("", response_model=Stats)
+def get_stats(
+    range_: str = Query("30d", alias="range", pattern=r"^\d+[dw]$", description="Window ending today, e.g. 30d or 12w"),
+    bucket: str = Query("day", pattern="^(day|week|month)$", description="Group by day, ISO week or month"),
+    db: Session = Depends(get_db),
+):
+    """
+    Tasks created and completed and event hours per event type for the
+    window ending today (UTC), plus open and overdue task counts per priority.
+
+    Reads the day rows of the rollup tables kept current by the task and
+    event write handlers, so the cost follows the window length rather than
+    the history. Recurring series are expanded over the window.
+    """
+    days = int(range_[:-1]) * (7 if range_.endswith("w") else 1)
+    if not 1 <= days <= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"range must be between 1 and {MAX_RANGE_DAYS} days")
+    end = datetime.utcnow().date()
+    start = end - timedelta(days=days - 1)
+
+    buckets: Dict[date_type, StatsBucket] = {}
+    for offset in range(days):
+        key = _bucket_start(start + timedelta(days=offset), bucket)
+        if key not in buckets:
+            buckets[key] = StatsBucket(start=str(key), tasks_created=0, tasks_completed=0, events=0, event_hours={})
+
+    def add_hours(target: StatsBucket, event_type: str, minutes: int) -> None:
+        target.event_hours[event_type or UNTYPED] = target.event_hours.get(event_type or UNTYPED, 0) + minutes / 60
+
+    for row in db.query(TaskDayRollup).filter(TaskDayRollup.day >= str(start), TaskDayRollup.day <= str(end)):
+        target = buckets[_bucket_start(date_type.fromisoformat(row.day), bucket)]
+        target.tasks_created += row.created
+        target.tasks_completed += row.completed
+
+    for row in db.query(EventDayRollup).filter(EventDayRollup.day >= str(start), EventDayRollup.day <= str(end)):
+        if not row.events:
+            continue  # every event of this type and day was moved or deleted; the row stays at zero
+        target = buckets[_bucket_start(date_type.fromisoformat(row.day), bucket)]
+        target.events += row.events
+        add_hours(target, row.event_type, row.minutes)
+
+    # Recurring series are not in the rollups: count their occurrences starting in the window
+    window_start = datetime.combine(start, time.min)
+    window_end = datetime.combine(end, time.max)
+    series = db.query(*rollups.EVENT_COLUMNS).filter(
+        EventModel.recurrence_rule.isnot(None),
+        EventModel.start_epoch <= to_epoch(window_end),
+        EventModel.status != "cancelled",
+    )
+    for event in series:
+        for occ_start, occ_end in occurrences(
+            to_utc_naive(event.start_time), to_utc_naive(event.end_time), event.recurrence_rule, window_start, window_end
+        ):
+            if occ_start < window_start:
+                continue
+            target = buckets[_bucket_start(occ_start.date(), bucket)]
+            target.events += 1
+            add_hours(target, event.event_type, 0 if event.all_day else rollups.event_minutes(occ_start, occ_end))
+
+    for target in buckets.values():
+        target.event_hours = {event_type: round(hours, 2) for event_type, hours in target.event_hours.items()}
+
+    open_by_priority: Dict[str, int] = {}
+    overdue_by_priority: Dict[str, int] = {}
+    for row in db.query(OpenTaskRollup).filter(OpenTaskRollup.open > 0):
+        open_by_priority[row.priority] = open_by_priority.get(row.priority, 0) + row.open
+        if row.due_date and row.due_date < str(end):
+            overdue_by_priority[row.priority] = overdue_by_priority.get(row.priority, 0) + row.open
+
+    return Stats(
+        start=str(start),
+        end=str(end),
+        bucket=bucket,
+        buckets=list(buckets.values()),
+        open_by_priority=open_by_priority,
+        overdue_by_priority=overdue_by_priority,
+    )
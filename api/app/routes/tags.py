@@ -0,0 +1,30 @@
+"""Tag facet routes."""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core import tags as tag_index
+from app.core.database import get_db
+from app.models.tag import ItemTag
+from app.schemas.tag import TagCount
+
+router = APIRouter(prefix="/tags", tags=["tags"])
+
+
+@router.get("", response_model=List[TagCount])
+def get_tags(
+    type: Optional[str] = Query(None, pattern="^(task|event)$", description="Only count tasks or events"),
+    db: Session = Depends(get_db),
+):
+    """Return every tag with its task and event counts, most used first."""
+    tasks = func.sum(case((ItemTag.item_type == tag_index.TASK, 1), else_=0))
+    events = func.sum(case((ItemTag.item_type == tag_index.EVENT, 1), else_=0))
+    query = db.query(ItemTag.tag, tasks, events, func.count())
+    if type:
+        query = query.filter(ItemTag.item_type == type)
+    rows = query.group_by(ItemTag.tag).order_by(func.count().desc(), ItemTag.tag).all()
+    return [
+        TagCount(tag=tag, tasks=task_count, events=event_count, total=total)
+        for tag, task_count, event_count, total in rows
+    ]
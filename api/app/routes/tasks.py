@@ -1,27 +1,135 @@
 """Task API routes."""
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date as date_type, datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, delete, func, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import uuid
 
+from app.core import archive, rollups, suggest, workers, writer
+from app.core import tags as tag_index
 from app.core.database import get_db
+from app.core.timeutils import with_epochs
+from app.models.archive import ArchivedTask
 from app.models.task import Task as TaskModel
-from app.schemas.task import Task, TaskCreate, TaskUpdate
+from app.schemas.task import Task, TaskCount, TaskCreate, TaskUpdate
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
+def _priority_rank(model):
+    """Sort rank for priority=...; unknown priorities sort last."""
+    return case({"high": 0, "medium": 1, "low": 2}, value=model.priority, else_=3)
+
+
+class TaskFilters:
+    """Query parameters shared by the task list and count endpoints."""
+
+    def __init__(
+        self,
+        completed: Optional[bool] = Query(None, description="Filter by completion state"),
+        priority: Optional[List[str]] = Query(None, description="Filter by priority (repeatable)"),
+        due_after: Optional[str] = Query(None, description="Due on or after this date (YYYY-MM-DD)"),
+        due_before: Optional[str] = Query(None, description="Due before this date (YYYY-MM-DD), exclusive"),
+        overdue: bool = Query(False, description="Only open tasks due before today"),
+        tag: Optional[List[str]] = Query(None, description="Only tasks with this tag (repeatable)"),
+        tag_mode: str = Query("all", pattern="^(all|any)$", description="Require all tags (AND) or any tag (OR)"),
+        include_archived: bool = Query(False, description="Also return archived (long completed) tasks"),
+    ):
+        self.completed = completed
+        self.priority = priority
+        self.due_after = due_after
+        self.due_before = due_before
+        self.overdue = overdue
+        self.tag = tag
+        self.tag_mode = tag_mode
+        # The entity to query: the tasks table, or the tasks table and its archive
+        self.model = archive.task_source(include_archived)
+
+    def apply(self, query):
+        """Push the filters into the SQL WHERE clause."""
+        model = self.model
+        if self.overdue:
+            query = query.filter(
+                model.completed == False,  # noqa: E712
+                model.due_date < str(date_type.today()),
+            )
+        elif self.completed is not None:
+            query = query.filter(model.completed == self.completed)
+        if self.priority:
+            query = query.filter(model.priority.in_(self.priority))
+        if self.due_after:
+            query = query.filter(model.due_date >= self.due_after)
+        if self.due_before:
+            query = query.filter(model.due_date < self.due_before)
+        if self.tag:
+            query = query.filter(model.id.in_(tag_index.tagged_ids(tag_index.TASK, self.tag, self.tag_mode)))
+        return query
+
+
+def _sort_order(sort: str, filters: TaskFilters) -> list:
+    """ORDER BY clauses for a sort key like "due_date" or "-priority"."""
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    model = filters.model
+    if key == "due_date":
+        column = model.due_date.desc() if descending else model.due_date.asc()
+        if filters.due_after or filters.due_before or filters.overdue:
+            # Range filters already exclude undated tasks, so the index order can be used as is
+            return [column]
+        # Tasks without a due date go last either way
+        return [model.due_date.is_(None), column]
+    if key == "priority":
+        rank = _priority_rank(model)
+        return [rank.desc() if descending else rank.asc(), model.due_date.asc()]
+    return [model.created_at.desc() if descending else model.created_at.asc()]
+
+
 @router.get("", response_model=List[Task])
-def get_tasks(db: Session = Depends(get_db)):
-    """Get all tasks."""
-    tasks = db.query(TaskModel).all()
+def get_tasks(
+    filters: TaskFilters = Depends(),
+    sort: Optional[str] = Query(
+        None,
+        pattern="^-?(due_date|priority|created_at)$",
+        description="Sort key (due_date, priority, created_at); prefix with - for descending",
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    Get tasks, optionally filtered and sorted.
+
+    Query parameters:
+    - completed: true/false
+    - priority: high, medium, low (repeatable)
+    - due_after / due_before: due date range (YYYY-MM-DD, before is exclusive)
+    - overdue: only open tasks due before today
+    - tag: repeatable; tag_mode=all (AND, default) or any (OR)
+    - include_archived: also return tasks moved to the archive
+    - sort: due_date, priority or created_at; -key for descending
+    """
+    query = filters.apply(db.query(filters.model))
+    if sort:
+        query = query.order_by(*_sort_order(sort, filters))
+    tasks = query.all()
     return tasks
 
 
+@router.get("/count", response_model=TaskCount)
+def count_tasks(filters: TaskFilters = Depends(), db: Session = Depends(get_db)):
+    """Count tasks matching the same filters as GET /tasks, without returning them."""
+    count = filters.apply(db.query(func.count(filters.model.id))).scalar()
+    return TaskCount(count=count)
+
+
 @router.get("/{task_id}", response_model=Task)
-def get_task(task_id: str, db: Session = Depends(get_db)):
+def get_task(
+    task_id: str,
+    include_archived: bool = Query(False, description="Also look in the archive"),
+    db: Session = Depends(get_db),
+):
     """Get a specific task by ID."""
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
+    model = archive.task_source(include_archived)
+    task = db.query(model).filter(model.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
@@ -33,47 +141,80 @@ def create_task(task: TaskCreate, db: Session = Depends(get_db)):
     # Generate UUID for new task
     task_id = str(uuid.uuid4())
 
-    # Create task model instance
-    db_task = TaskModel(
-        id=task_id,
-        title=task.title,
-        description=task.description,
-        completed=task.completed,
-        priority=task.priority,
-        due_date=task.due_date,
-        tags=task.tags or []
-    )
-
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    def write(db: Session) -> TaskModel:
+        db_task = TaskModel(
+            id=task_id,
+            title=task.title,
+            description=task.description,
+            completed=task.completed,
+            priority=task.priority,
+            due_date=task.due_date,
+            tags=task.tags or [],
+            **with_epochs(TaskModel, {"completed_at": datetime.now(timezone.utc) if task.completed else None}),
+        )
+        db.add(db_task)
+        tag_index.add_tags(db, tag_index.TASK, task_id, db_task.tags)
+        db.flush()  # created_at comes back through INSERT ... RETURNING
+        rollups.apply_task(db, None, rollups.TaskState.from_row(db_task))
+        workers.record(db, tag_index.TASK, task_id, "created")
+        return db_task
+
+    db_task = writer.run(db, write)
+    suggest.index.index_task(db_task)
     return db_task
 
 
 @router.put("/{task_id}", response_model=Task)
 def update_task(task_id: str, task: TaskUpdate, db: Session = Depends(get_db)):
     """Update an existing task."""
-    db_task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
-    if not db_task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    # Update only provided fields
+    # Update only provided fields; UPDATE ... RETURNING finds, writes and reloads the row
     update_data = task.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_task, field, value)
 
-    db.commit()
-    db.refresh(db_task)
+    def write(db: Session) -> TaskModel:
+        values = dict(update_data)
+        old = None
+        if values.keys() & rollups.TASK_FIELDS:
+            # The rollups move the task's counts from its previous state
+            old = db.query(*rollups.TASK_COLUMNS).filter(TaskModel.id == task_id).with_for_update().first()
+            if not old:
+                raise HTTPException(status_code=404, detail="Task not found")
+            if "completed" in values and values["completed"] != old.completed:
+                values["completed_at"] = datetime.now(timezone.utc) if values["completed"] else None
+                values = with_epochs(TaskModel, values)
+        db_task = db.scalars(
+            update(TaskModel).where(TaskModel.id == task_id).values(**values).returning(TaskModel)
+        ).first()
+        if not db_task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if "tags" in values:
+            tag_index.sync_tags(db, tag_index.TASK, task_id, db_task.tags)
+        if old is not None:
+            rollups.apply_task(db, rollups.TaskState.from_row(old), rollups.TaskState.from_row(db_task))
+        workers.record(db, tag_index.TASK, task_id, "updated")
+        return db_task
+
+    db_task = writer.run(db, write)
+    if "title" in update_data or "tags" in update_data:
+        suggest.index.index_task(db_task)
     return db_task
 
 
 @router.delete("/{task_id}", status_code=204)
 def delete_task(task_id: str, db: Session = Depends(get_db)):
     """Delete a task."""
-    db_task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
-    if not db_task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    db.delete(db_task)
-    db.commit()
+    def write(db: Session) -> None:
+        old = db.execute(delete(TaskModel).where(TaskModel.id == task_id).returning(*rollups.TASK_COLUMNS)).first()
+        if not old:
+            # Archived tasks can still be deleted
+            old = db.execute(
+                delete(ArchivedTask).where(ArchivedTask.id == task_id).returning(*rollups.ARCHIVED_TASK_COLUMNS)
+            ).first()
+        if not old:
+            raise HTTPException(status_code=404, detail="Task not found")
+        tag_index.clear_tags(db, tag_index.TASK, task_id)
+        rollups.apply_task(db, rollups.TaskState.from_row(old), None)
+        workers.record(db, tag_index.TASK, task_id, "deleted")
+
+    writer.run(db, write)
+    suggest.index.remove(tag_index.TASK, task_id)
     return None
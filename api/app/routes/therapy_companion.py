@@ -5,13 +5,17 @@ Companion app and writes them as markdown files to the Obsidian vault
 (when VAULT_PATH is configured).
 """
 import os
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
+from app.core import writer
 from app.core.database import get_db
+from app.core.metrics import VAULT_WRITE_DURATION
+from app.core.timeutils import day_epochs, to_utc, with_epochs
+from app.core.vault import vault_path, write_vault_file
 from app.models.living_context import LivingContext as LivingContextModel
 from app.models.session_summary import SessionSummary as SessionSummaryModel
 from app.schemas.therapy_companion import (
@@ -31,11 +35,6 @@ VAULT_SUBDIR_SS = "Therapy Companion/Session Summaries"
 
 # ── Vault file helpers ────────────────────────────────────────────────────────
 
-def _vault_path() -> Optional[str]:
-    """Return the configured vault root, or None if not set."""
-    return settings.VAULT_PATH or None
-
-
 def _unique_filename(folder: str, date_str: str) -> tuple[str, str]:
     """
     Return a (relative_vault_path, absolute_path) for a new dated file.
@@ -51,13 +50,6 @@ def _unique_filename(folder: str, date_str: str) -> tuple[str, str]:
     return candidate, os.path.join(abs_folder, candidate)
 
 
-def _write_vault_file(abs_path: str, content: str) -> None:
-    """Write content to the vault, creating parent directories as needed."""
-    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-    with open(abs_path, "w", encoding="utf-8") as f:
-        f.write(content)
-
-
 def _living_context_markdown(record: LivingContextModel) -> str:
     """Assemble markdown for a living context version."""
     ts = record.updated_at.isoformat() if record.updated_at else ""
@@ -83,21 +75,59 @@ def _session_summary_markdown(record: SessionSummaryModel) -> str:
     )
 
 
-def _sync_to_vault(subdir: str, date_str: str, markdown: str) -> tuple[Optional[str], Optional[datetime]]:
+def _vault_target(subdir: str, date_str: str) -> Optional[tuple[str, str]]:
     """
-    Write markdown to the vault if VAULT_PATH is configured.
-    Returns (relative_obsidian_path, synced_at) or (None, None).
+    Pick the vault file for a new record if VAULT_PATH is configured.
+    Returns (relative_obsidian_path, absolute_path) or None.
     """
-    vault = _vault_path()
+    vault = vault_path()
     if not vault:
-        return None, None
+        return None
+
+    filename, abs_path = _unique_filename(os.path.join(vault, subdir), date_str)
+    return f"{subdir}/{filename}", abs_path
 
-    abs_folder = os.path.join(vault, subdir)
-    filename, abs_path = _unique_filename(abs_folder, date_str)
-    _write_vault_file(abs_path, markdown)
 
-    relative_path = f"{subdir}/{filename}"
-    return relative_path, datetime.now(timezone.utc)
+def _write_to_vault(subdir: str, abs_path: str, markdown: str) -> None:
+    with VAULT_WRITE_DURATION.time(subdir=subdir):
+        write_vault_file(abs_path, markdown)
+
+
+def _insert_synced(db: Session, record, subdir: str, date_str: str, markdown: str, duplicate_detail: str) -> None:
+    """
+    Insert a record with its vault fields already set, then write its file.
+
+    The INSERT is the only statement: a duplicate id fails on the primary key
+    (409) before anything is written to the vault, and a failed file write
+    rolls the row back.
+    """
+    target = _vault_target(subdir, date_str)
+    record.obsidian_path = target[0] if target else None
+    record.obsidian_synced = target is not None
+    record.synced_at = datetime.now(timezone.utc) if target else None
+
+    def write(db: Session) -> None:
+        db.add(record)
+        try:
+            db.flush()
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail=duplicate_detail)
+        if target:
+            _write_to_vault(subdir, target[1], markdown)
+
+    writer.run(db, write)
+
+
+def _in_days(query, epoch_column, start_date: Optional[str], end_date: Optional[str]):
+    """Restrict `query` to the UTC days start_date..end_date (inclusive) through an epoch column."""
+    try:
+        if start_date:
+            query = query.filter(epoch_column >= day_epochs(date.fromisoformat(start_date))[0])
+        if end_date:
+            query = query.filter(epoch_column < day_epochs(date.fromisoformat(end_date))[1])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    return query
 
 
 # ── Living Context ────────────────────────────────────────────────────────────
@@ -108,28 +138,18 @@ def create_living_context(payload: LivingContextCreate, db: Session = Depends(ge
     Receive a new living context version from the iOS app and write it to the vault.
     Returns obsidian_path and synced_at for the iOS app to store back in SwiftData.
     """
-    if db.query(LivingContextModel).filter(LivingContextModel.id == payload.id).first():
-        raise HTTPException(status_code=409, detail="Living context version already synced")
-
-    record = LivingContextModel(
+    # Stored in UTC (SQLite drops offsets); the vault file is still named by the app's local date
+    record = LivingContextModel(**with_epochs(LivingContextModel, dict(
         id=payload.id,
         content=payload.content,
-        updated_at=payload.updated_at,
+        updated_at=to_utc(payload.updated_at),
         derived_from_session_id=payload.derived_from_session_id,
-    )
-    db.add(record)
-    db.flush()  # Populate record fields before generating markdown
-
+    )))
     date_str = payload.updated_at.strftime("%Y-%m-%d")
-    markdown = _living_context_markdown(record)
-    obsidian_path, synced_at = _sync_to_vault(VAULT_SUBDIR_LC, date_str, markdown)
-
-    record.obsidian_path = obsidian_path
-    record.obsidian_synced = obsidian_path is not None
-    record.synced_at = synced_at
-
-    db.commit()
-    db.refresh(record)
+    _insert_synced(
+        db, record, VAULT_SUBDIR_LC, date_str, _living_context_markdown(record),
+        "Living context version already synced",
+    )
 
     return LivingContextSyncResponse(
         id=record.id,
@@ -145,12 +165,8 @@ def list_living_contexts(
     db: Session = Depends(get_db),
 ):
     """Return all stored living context versions, newest first."""
-    query = db.query(LivingContextModel)
-    if start_date:
-        query = query.filter(LivingContextModel.updated_at >= start_date)
-    if end_date:
-        query = query.filter(LivingContextModel.updated_at <= f"{end_date}T23:59:59")
-    return query.order_by(LivingContextModel.updated_at.desc()).all()
+    query = _in_days(db.query(LivingContextModel), LivingContextModel.updated_epoch, start_date, end_date)
+    return query.order_by(LivingContextModel.updated_epoch.desc()).all()
 
 
 @router.get("/living-context/{lc_id}", response_model=LivingContext)
@@ -170,28 +186,17 @@ def create_session_summary(payload: SessionSummaryCreate, db: Session = Depends(
     Receive a new session summary from the iOS app and write it to the vault.
     Returns obsidian_path and synced_at for the iOS app to store back in SwiftData.
     """
-    if db.query(SessionSummaryModel).filter(SessionSummaryModel.id == payload.id).first():
-        raise HTTPException(status_code=409, detail="Session summary already synced")
-
-    record = SessionSummaryModel(
+    record = SessionSummaryModel(**with_epochs(SessionSummaryModel, dict(
         id=payload.id,
         content=payload.content,
-        generated_at=payload.generated_at,
-        covers_sessions_up_to=payload.covers_sessions_up_to,
-    )
-    db.add(record)
-    db.flush()
-
+        generated_at=to_utc(payload.generated_at),
+        covers_sessions_up_to=to_utc(payload.covers_sessions_up_to),
+    )))
     date_str = payload.generated_at.strftime("%Y-%m-%d")
-    markdown = _session_summary_markdown(record)
-    obsidian_path, synced_at = _sync_to_vault(VAULT_SUBDIR_SS, date_str, markdown)
-
-    record.obsidian_path = obsidian_path
-    record.obsidian_synced = obsidian_path is not None
-    record.synced_at = synced_at
-
-    db.commit()
-    db.refresh(record)
+    _insert_synced(
+        db, record, VAULT_SUBDIR_SS, date_str, _session_summary_markdown(record),
+        "Session summary already synced",
+    )
 
     return SessionSummarySyncResponse(
         id=record.id,
@@ -207,12 +212,8 @@ def list_session_summaries(
     db: Session = Depends(get_db),
 ):
     """Return all stored session summaries, newest first."""
-    query = db.query(SessionSummaryModel)
-    if start_date:
-        query = query.filter(SessionSummaryModel.generated_at >= start_date)
-    if end_date:
-        query = query.filter(SessionSummaryModel.generated_at <= f"{end_date}T23:59:59")
-    return query.order_by(SessionSummaryModel.generated_at.desc()).all()
+    query = _in_days(db.query(SessionSummaryModel), SessionSummaryModel.generated_epoch, start_date, end_date)
+    return query.order_by(SessionSummaryModel.generated_epoch.desc()).all()
 
 
 @router.get("/summaries/{summary_id}", response_model=SessionSummary)
@@ -1,45 +1,96 @@
 """WebSocket endpoint for real-time updates."""
+import asyncio
 import json
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
 from datetime import datetime
 
+from app.core import negotiation, tracing
+from app.core.metrics import WS_BROADCASTS, WS_CONNECTIONS, WS_MESSAGES_SENT, WS_SEND_FAILURES
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["websocket"])
 
+# A client that cannot take a frame within this time is dropped instead of stalling the others
+SEND_TIMEOUT_SECONDS = 5.0
+
 class ConnectionManager:
     """Manages WebSocket connections."""
 
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self.formats: Dict[WebSocket, str] = {}  # "json" or "msgpack"
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, message_format: str = "json"):
         """Accept and store a new connection."""
-        await websocket.accept()
+        requested = websocket.scope.get("subprotocols", [])
+        subprotocol = "msgpack" if message_format == "msgpack" and "msgpack" in requested else None
+        await websocket.accept(subprotocol=subprotocol)
         self.active_connections.append(websocket)
+        self.formats[websocket] = message_format
+        WS_CONNECTIONS.set(len(self.active_connections))
         logger.info(f"New WebSocket connection. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         """Remove a connection."""
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+        self.formats.pop(websocket, None)
+        WS_CONNECTIONS.set(len(self.active_connections))
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
 
+    def has_listeners(self) -> bool:
+        """Whether any client is connected."""
+        return bool(self.active_connections)
+
+    async def _send(self, connection: WebSocket, frame) -> Optional[WebSocket]:
+        """Send one pre-serialized frame; return the connection if it failed."""
+        try:
+            if isinstance(frame, bytes):
+                await asyncio.wait_for(connection.send_bytes(frame), SEND_TIMEOUT_SECONDS)
+            else:
+                await asyncio.wait_for(connection.send_text(frame), SEND_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.error(f"Failed to send message to connection: {e!r}")
+            WS_SEND_FAILURES.inc()
+            return connection
+        WS_MESSAGES_SENT.inc()
+        return None
+
     async def broadcast(self, message: dict):
-        """Send a message to all connected clients."""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Failed to send message to connection: {e}")
-                disconnected.append(connection)
+        """
+        Send a message to all connected clients.
+
+        The message is serialized once per format in use and the same frame
+        is written to every socket concurrently, so one slow client does not
+        delay the rest. MessagePack frames are shared as bytes; JSON frames
+        are shared as a str, because an ASGI text frame cannot carry bytes,
+        so the server still UTF-8 encodes them per socket.
+        """
+        connections = list(self.active_connections)
+        if not connections:
+            return
+        encoded = {}
+        for message_format in set(self.formats.get(c, "json") for c in connections):
+            encoded[message_format] = (
+                negotiation.packb(message) if message_format == "msgpack" else json.dumps(message)
+            )
+        failed = await asyncio.gather(
+            *(self._send(c, encoded[self.formats.get(c, "json")]) for c in connections)
+        )
 
         # Remove disconnected clients
-        for connection in disconnected:
+        for connection in failed:
+            if connection is None:
+                continue
             if connection in self.active_connections:
                 self.active_connections.remove(connection)
+            self.formats.pop(connection, None)
+        WS_CONNECTIONS.set(len(self.active_connections))
 
 # Global connection manager
 manager = ConnectionManager()
@@ -52,8 +103,16 @@ async def websocket_endpoint(websocket: WebSocket):
 
     Clients connect to this endpoint to receive real-time notifications
     about tasks and events being created, updated, or deleted.
+
+    Messages are JSON text frames by default. Connect with ``?format=msgpack``
+    or the ``msgpack`` subprotocol to receive MessagePack binary frames.
     """
-    await manager.connect(websocket)
+    wants_msgpack = (
+        websocket.query_params.get("format") == "msgpack"
+        or "msgpack" in websocket.scope.get("subprotocols", [])
+    )
+    message_format = "msgpack" if wants_msgpack and negotiation.msgpack_available() else "json"
+    await manager.connect(websocket, message_format)
     try:
         while True:
             # Keep connection alive and listen for client messages
@@ -69,17 +128,31 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
-async def broadcast_event(event_type: str, data: dict):
+def has_listeners() -> bool:
+    """Whether a broadcast would reach anyone; check before building its payload."""
+    return manager.has_listeners()
+
+
+async def broadcast_event(event_type: str, data: Any):
     """
     Broadcast an event to all connected WebSocket clients.
 
     Args:
         event_type: Type of event (e.g., 'task_created', 'event_updated')
-        data: Event data to broadcast
+        data: Event data to broadcast: a dict, or a Pydantic model (dumped
+            only if someone is connected). Validate ORM objects into their
+            response schema first.
     """
-    message = {
-        "type": event_type,
-        "data": data,
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    await manager.broadcast(message)
+    if not manager.has_listeners():
+        return
+    WS_BROADCASTS.inc(type=event_type)
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    attributes = {"event.type": event_type, "websocket.recipients": len(manager.active_connections)}
+    with tracing.span("websocket.broadcast", attributes):
+        message = {
+            "type": event_type,
+            "data": jsonable_encoder(data),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        await manager.broadcast(message)
@@ -0,0 +1,43 @@
+"""Database backup Pydantic schemas."""
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+
+class BackupJob(BaseModel):
+    """A backup run and its progress."""
+
+    id: str
+    kind: str  # "full" or "incremental"
+    status: str = "running"  # running, done or failed
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    unit: str = "pages"  # what total/done count: SQLite pages, or PostgreSQL tables
+    total: int = 0
+    done: int = 0
+    steps: int = 0
+    snapshot: Optional[str] = None  # name of the snapshot written
+    timings_ms: Dict[str, float] = {}  # copy, diff (incremental) and total
+    error: Optional[str] = None
+
+
+class BackupSnapshot(BaseModel):
+    """A snapshot in BACKUP_DIR, from its manifest."""
+
+    name: str
+    kind: str
+    file: str
+    parent: Optional[str] = None  # incremental: the snapshot its pages apply to
+    dialect: str
+    created_at: datetime
+    pages: int  # SQLite: pages in the database; PostgreSQL: tables copied
+    changed_pages: int  # pages stored in the snapshot
+    bytes: int
+    timings_ms: Dict[str, float]
+
+
+class BackupStatus(BaseModel):
+    """This worker's recent backup jobs and every snapshot on disk."""
+
+    jobs: List[BackupJob]
+    snapshots: List[BackupSnapshot]
@@ -0,0 +1,34 @@
+"""Batch request Pydantic schemas."""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional, List
+
+
+class BatchSubRequest(BaseModel):
+    """One request to run inside a batch."""
+
+    id: Optional[str] = None  # echoed back to match responses
+    method: str = Field("GET", pattern="^(GET|POST|PUT|PATCH|DELETE)$")
+    path: str  # e.g. "/api/events?start_date=2026-02-22"
+    headers: Dict[str, str] = {}  # e.g. {"If-Match": "\"3\""}
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    """Sub-requests executed in order on one database session."""
+
+    requests: List[BatchSubRequest] = Field(..., min_length=1, max_length=20)
+
+
+class BatchSubResponse(BaseModel):
+    """Result of one sub-request."""
+
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}  # e.g. ETag, Location, Retry-After
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    """All sub-request results, in request order."""
+
+    responses: List[BatchSubResponse]
@@ -0,0 +1,36 @@
+"""Calendar range Pydantic schemas."""
+from pydantic import BaseModel
+from typing import Optional, List
+
+from app.core.timeutils import UTCDateTime
+
+
+class CalendarEvent(BaseModel):
+    """Compact event occurrence for month/week views."""
+
+    id: str
+    title: str
+    start_time: UTCDateTime
+    end_time: UTCDateTime
+    all_day: bool
+    status: str
+    event_type: Optional[str] = None
+    color: Optional[str] = None
+
+
+class CalendarDay(BaseModel):
+    """Everything a calendar cell needs for one day."""
+
+    date: str  # YYYY-MM-DD
+    events: List[CalendarEvent]
+    tasks_due: int
+    tasks_completed: int
+    has_note: bool
+
+
+class CalendarRange(BaseModel):
+    """Per-day calendar data for an inclusive date range."""
+
+    start: str
+    end: str
+    days: List[CalendarDay]
@@ -1,7 +1,9 @@
 """Daily Note Pydantic schemas."""
 from pydantic import BaseModel, model_validator
-from typing import Optional, Dict
-from datetime import datetime
+from typing import Optional, Dict, List
+
+from app.core.daily_note_format import assemble_content
+from app.core.timeutils import UTCDateTime
 
 
 class DailyNoteBase(BaseModel):
@@ -48,8 +50,24 @@ class DailyNote(DailyNoteBase):
 
     date: str
     content: Optional[str] = None
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    version: int = 1
+    created_at: Optional[UTCDateTime] = None
+    updated_at: Optional[UTCDateTime] = None
 
     class Config:
         from_attributes = True
+
+    @model_validator(mode="after")
+    def assemble_content(self) -> "DailyNote":
+        # PATCH clears the stored content when it merges sections; render it from them
+        if self.content is None and self.sections:
+            self.content = assemble_content(self.sections)
+        return self
+
+
+class VaultExportResult(BaseModel):
+    """Outcome of a bulk export to the Obsidian vault."""
+
+    exported: int  # files written
+    unchanged: int  # skipped: content hash matches the last export
+    failed: List[str] = []  # dates that could not be written
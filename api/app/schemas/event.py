@@ -1,7 +1,17 @@
 """Pydantic schemas for calendar events."""
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+
+from app.core.recurrence import validate_rrule
+from app.core.timeutils import UTCDateTime, to_utc
+
+
+def _valid_rrule(value: Optional[str]) -> Optional[str]:
+    """Reject (422) rules the expansion cannot handle, instead of failing every later read."""
+    if value:
+        validate_rrule(value)
+    return value
 
 
 class EventBase(BaseModel):
@@ -11,8 +21,8 @@ class EventBase(BaseModel):
     description: Optional[str] = None
 
     # Date/time fields
-    start_time: datetime
-    end_time: datetime
+    start_time: UTCDateTime
+    end_time: UTCDateTime
     all_day: bool = False
 
     # Location
@@ -41,7 +51,16 @@ class EventBase(BaseModel):
 class EventCreate(EventBase):
     """Schema for creating a new event."""
 
-    pass
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def _store_utc(cls, value: datetime) -> datetime:
+        # Stored in UTC so the timestamps agree with their epoch columns on SQLite, which drops offsets
+        return to_utc(value)
+
+    @field_validator("recurrence_rule")
+    @classmethod
+    def _check_rrule(cls, value: Optional[str]) -> Optional[str]:
+        return _valid_rrule(value)
 
 
 class EventUpdate(BaseModel):
@@ -61,13 +80,63 @@ class EventUpdate(BaseModel):
     attendees: Optional[List[dict]] = None
     reminders: Optional[List[dict]] = None
 
+    @field_validator("title", "start_time", "end_time", "all_day", "status")
+    @classmethod
+    def _not_null(cls, value, info: ValidationInfo):
+        # Omit a field to leave it unchanged; null would violate its NOT NULL column
+        if value is None:
+            raise ValueError(f"{info.field_name} cannot be null")
+        return value
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def _store_utc(cls, value: datetime) -> datetime:
+        return to_utc(value)
+
+    @field_validator("recurrence_rule")
+    @classmethod
+    def _check_rrule(cls, value: Optional[str]) -> Optional[str]:
+        return _valid_rrule(value)
+
 
 class Event(EventBase):
     """Complete event schema with all fields."""
 
     id: str
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    created_at: Optional[UTCDateTime] = None
+    updated_at: Optional[UTCDateTime] = None
 
     class Config:
         from_attributes = True
+
+
+class FreeBusy(BaseModel):
+    """Merged busy intervals within a window."""
+
+    start: UTCDateTime
+    end: UTCDateTime
+    granularity: int  # minutes; busy intervals are widened to multiples of it (0 = exact)
+    busy: List[Tuple[UTCDateTime, UTCDateTime]]
+
+
+class TimeSlot(BaseModel):
+    """A candidate time range."""
+
+    start_time: datetime
+    end_time: datetime
+
+
+class ConflictCheck(BaseModel):
+    """Batch of candidate slots to check against existing events."""
+
+    slots: List[TimeSlot] = Field(..., min_length=1, max_length=500)
+    exclude_id: Optional[str] = None  # ignore this event (e.g. the one being rescheduled)
+
+
+class SlotConflicts(BaseModel):
+    """Events overlapping one candidate slot."""
+
+    index: int  # position in the request's slots list
+    start_time: UTCDateTime
+    end_time: UTCDateTime
+    conflicts: List[Event]
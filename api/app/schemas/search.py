@@ -0,0 +1,13 @@
+"""Search Pydantic schemas."""
+from pydantic import BaseModel
+from typing import Optional
+
+
+class Suggestion(BaseModel):
+    """Typeahead suggestion."""
+
+    text: str
+    kind: str  # task, event, location or tag
+    item_id: Optional[str] = None  # set when exactly one task/event has this title
+    count: int  # items sharing this text
+    fuzzy: bool = False  # matched despite a typo
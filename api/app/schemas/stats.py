@@ -0,0 +1,24 @@
+"""Productivity stats Pydantic schemas."""
+from pydantic import BaseModel
+from typing import Dict, List
+
+
+class StatsBucket(BaseModel):
+    """Activity within one day, week or month."""
+
+    start: str  # first day of the bucket (YYYY-MM-DD)
+    tasks_created: int
+    tasks_completed: int
+    events: int
+    event_hours: Dict[str, float]  # per event_type; "other" for events without one
+
+
+class Stats(BaseModel):
+    """Bucketed activity for a window ending today, plus current task backlog."""
+
+    start: str
+    end: str
+    bucket: str
+    buckets: List[StatsBucket]
+    open_by_priority: Dict[str, int]
+    overdue_by_priority: Dict[str, int]
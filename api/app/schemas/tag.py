@@ -0,0 +1,11 @@
+"""Tag Pydantic schemas."""
+from pydantic import BaseModel
+
+
+class TagCount(BaseModel):
+    """Facet count for one tag."""
+
+    tag: str
+    tasks: int
+    events: int
+    total: int
@@ -1,7 +1,8 @@
 """Task Pydantic schemas."""
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime
+
+from app.core.timeutils import UTCDateTime
 
 
 class TaskBase(BaseModel):
@@ -32,12 +33,19 @@ class TaskUpdate(BaseModel):
     tags: Optional[List[str]] = None
 
 
+class TaskCount(BaseModel):
+    """Schema for a counts-only task query."""
+
+    count: int
+
+
 class Task(TaskBase):
     """Schema for task response."""
 
     id: str
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    completed_at: Optional[UTCDateTime] = None
+    created_at: Optional[UTCDateTime] = None
+    updated_at: Optional[UTCDateTime] = None
 
     class Config:
         from_attributes = True
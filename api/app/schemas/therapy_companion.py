@@ -3,6 +3,8 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 
+from app.core.timeutils import UTCDateTime
+
 
 # ── Living Context ────────────────────────────────────────────────────────────
 
@@ -18,19 +20,19 @@ class LivingContextSyncResponse(BaseModel):
     """Minimal response returned after a successful POST — iOS stores synced_at."""
     id: str
     obsidian_path: Optional[str]
-    synced_at: Optional[datetime]
+    synced_at: Optional[UTCDateTime]
 
 
 class LivingContext(BaseModel):
     """Full stored object returned by GET endpoints."""
     id: str
     content: str
-    updated_at: datetime
+    updated_at: UTCDateTime
     derived_from_session_id: str
     obsidian_path: Optional[str] = None
     obsidian_synced: bool
-    synced_at: Optional[datetime] = None
-    created_at: Optional[datetime] = None
+    synced_at: Optional[UTCDateTime] = None
+    created_at: Optional[UTCDateTime] = None
 
     class Config:
         from_attributes = True
@@ -50,19 +52,19 @@ class SessionSummarySyncResponse(BaseModel):
     """Minimal response returned after a successful POST — iOS stores synced_at."""
     id: str
     obsidian_path: Optional[str]
-    synced_at: Optional[datetime]
+    synced_at: Optional[UTCDateTime]
 
 
 class SessionSummary(BaseModel):
     """Full stored object returned by GET endpoints."""
     id: str
     content: str
-    generated_at: datetime
-    covers_sessions_up_to: datetime
+    generated_at: UTCDateTime
+    covers_sessions_up_to: UTCDateTime
     obsidian_path: Optional[str] = None
     obsidian_synced: bool
-    synced_at: Optional[datetime] = None
-    created_at: Optional[datetime] = None
+    synced_at: Optional[UTCDateTime] = None
+    created_at: Optional[UTCDateTime] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,147 @@
+"""
+Shared fixtures: the app on a scratch SQLite database.
+
+Set TEST_DATABASE_URL to run the suite against another database instead,
+e.g. an empty PostgreSQL one; the SQLite-specific tests skip themselves.
+"""
+import json
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+# Settings are read at import time, so point them at scratch locations first
+_scratch = tempfile.mkdtemp(prefix="8alls-tests-")
+os.environ.update({
+    "DATABASE_URL": os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{_scratch}/test.db",
+    "ENVIRONMENT": "test",
+    "RATE_LIMIT_PER_SECOND": "0",
+    "VAULT_PATH": os.path.join(_scratch, "vault"),
+    "VAULT_WATCH": "false",
+    "BACKUP_DIR": os.path.join(_scratch, "backups"),
+    "TRACE_FILE": "",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event as sqlalchemy_event  # noqa: E402
+
+from app.core import metrics, query_log  # noqa: E402
+from app.core.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def _unique(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def unique():
+    """``unique(prefix)``: a title or id no other test uses."""
+    return _unique
+
+
+@pytest.fixture
+def task(client):
+    return client.post("/api/tasks", json={
+        "title": _unique("task"), "priority": "high", "due_date": "2026-01-06", "tags": ["a", "b"],
+    }).json()
+
+
+@pytest.fixture
+def event(client):
+    return client.post("/api/events", json={
+        "title": _unique("event"),
+        "start_time": "2026-01-01T10:00:00Z",
+        "end_time": "2026-01-01T11:00:00Z",
+        "event_type": "meeting",
+        "tags": ["a"],
+    }).json()
+
+
+class QueryRecorder:
+    """SQL statements executed by each request served while the fixture is active."""
+
+    def __init__(self):
+        self.requests: List[List[str]] = []
+        self.plans: List[List[Tuple[str, str]]] = []  # (sql, query plan) per request
+        self._pending: Dict[metrics.RequestStats, List[Tuple[str, str]]] = {}
+
+    @property
+    def last(self) -> List[str]:
+        """Statements of the most recent request."""
+        return self.requests[-1]
+
+    @property
+    def last_plans(self) -> List[Tuple[str, str]]:
+        """Query plans of the most recent request's explainable statements."""
+        return self.plans[-1]
+
+    def record(self, stats: metrics.RequestStats) -> None:
+        self.requests.append([sql for sql, _ in stats.statements])
+        self.plans.append(self._pending.pop(stats, []))
+
+    def explain(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        """after_cursor_execute hook: keep the plan of every statement run for a request."""
+        stats = metrics.current_request_stats()
+        if stats is None or executemany:
+            return
+        if conn.dialect.name == "postgresql":
+            plan = _explain_postgres(cursor, statement, parameters)
+        else:
+            plan = query_log.explain(cursor, conn.dialect.name, statement, parameters)
+        if plan is not None:
+            self._pending.setdefault(stats, []).append((statement, plan))
+
+    @contextmanager
+    def job(self):
+        """Record the statements of background work (startup, archiver) as one request."""
+        stats, token = metrics.begin_request()
+        try:
+            yield
+        finally:
+            metrics.end_request(token)
+            self.record(stats)
+
+
+def _explain_postgres(cursor, statement: str, parameters) -> Optional[str]:
+    """
+    EXPLAIN (FORMAT JSON) with sequential scans disabled, so a seq scan in
+    the plan means no index applies (tiny test tables would otherwise make
+    one the cheapest plan). Run in a savepoint that also undoes the SET.
+    """
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+        return None
+    plan_cursor = cursor.connection.cursor()
+    try:
+        plan_cursor.execute("SAVEPOINT query_plan")
+        plan_cursor.execute("SET LOCAL enable_seqscan = off")
+        plan_cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters or ())
+        plan = plan_cursor.fetchone()[0]
+        plan_cursor.execute("ROLLBACK TO SAVEPOINT query_plan")
+    finally:
+        plan_cursor.close()
+    return plan if isinstance(plan, str) else json.dumps(plan)
+
+
+@pytest.fixture
+def queries(monkeypatch) -> QueryRecorder:
+    recorder = QueryRecorder()
+    observe_request = metrics.observe_request
+
+    def record(method, route, status, duration, stats):
+        recorder.record(stats)
+        observe_request(method, route, status, duration, stats)
+
+    monkeypatch.setattr(metrics, "observe_request", record)
+    sqlalchemy_event.listen(engine, "after_cursor_execute", recorder.explain)
+    yield recorder
+    sqlalchemy_event.remove(engine, "after_cursor_execute", recorder.explain)
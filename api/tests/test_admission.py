@@ -0,0 +1,96 @@
+"""Rate limiting keys and the concurrency limiter."""
+import asyncio
+
+from app.core.admission import AdmissionControlMiddleware, _client_key
+from app.core.config import settings
+
+
+def _scope(api_key=None, client=("10.0.0.1", 5000)):
+    headers = [(b"x-api-key", api_key.encode())] if api_key is not None else []
+    return {"type": "http", "headers": headers, "client": client}
+
+
+def test_valid_api_key_shares_one_bucket():
+    assert _client_key(_scope(settings.API_KEY)) == _client_key(_scope(settings.API_KEY, ("10.0.0.2", 1)))
+
+
+def test_unvalidated_api_key_falls_back_to_client_address():
+    keys = {_client_key(_scope(f"made-up-{i}")) for i in range(5)}
+    assert keys == {_client_key(_scope())} == {"ip:10.0.0.1"}
+
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    async def scenario():
+        release = asyncio.Event()
+        served = []
+
+        async def app(scope, receive, send):
+            served.append(scope["path"])
+            await release.wait()
+
+        middleware = AdmissionControlMiddleware(
+            app, max_concurrency=1, max_queue=10, queue_timeout=10, rate_limit=0, rate_burst=0,
+        )
+
+        async def call(path):
+            await middleware({"type": "http", "method": "GET", "path": path, "headers": []}, None, _discard)
+
+        holder = asyncio.create_task(call("/api/tasks/1"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(call("/api/tasks/2"))
+        await asyncio.sleep(0)
+        waiter.cancel()  # client disconnected while queued
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        release.set()
+        await holder
+        assert middleware.limiter.active == 0
+        await asyncio.wait_for(call("/api/tasks/3"), timeout=1)
+        return served
+
+    assert asyncio.run(scenario()) == ["/api/tasks/1", "/api/tasks/3"]
+
+
+def test_slot_handed_to_a_cancelled_waiter_is_returned():
+    async def scenario():
+        middleware = AdmissionControlMiddleware(
+            _noop, max_concurrency=1, max_queue=10, queue_timeout=10, rate_limit=0, rate_burst=0,
+        )
+        limiter = middleware.limiter
+        assert limiter.try_acquire()
+        waiter = asyncio.create_task(
+            middleware({"type": "http", "method": "GET", "path": "/api/tasks/1", "headers": []}, None, _discard)
+        )
+        await asyncio.sleep(0)
+        limiter.release()  # hands the slot to the waiter
+        waiter.cancel()  # before it gets to run
+        await asyncio.gather(waiter, return_exceptions=True)
+        return limiter.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+async def _noop(scope, receive, send):
+    pass
+
+
+async def _discard(message):
+    pass
+
+
+def test_forwarded_address_behind_a_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    scope = _scope(client=("172.16.0.1", 443))
+    scope["headers"].append((b"x-forwarded-for", b"1.2.3.4"))
+    assert _client_key(scope) == "ip:1.2.3.4"
+
+    # entries the client sent itself come first and do not pick the bucket
+    spoofed = _scope(client=("172.16.0.1", 443))
+    spoofed["headers"].append((b"x-forwarded-for", b"9.9.9.9, 1.2.3.4"))
+    assert _client_key(spoofed) == "ip:1.2.3.4"
+
+
+def test_forwarded_header_ignored_without_trusted_proxies():
+    scope = _scope()
+    scope["headers"].append((b"x-forwarded-for", b"9.9.9.9"))
+    assert _client_key(scope) == "ip:10.0.0.1"
@@ -0,0 +1,64 @@
+"""Moving old tasks and events to the archive tables and reading them back."""
+from datetime import datetime, timezone
+
+from sqlalchemy import update
+
+from app.core import archive
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.timeutils import to_epoch
+from app.models.task import Task
+
+NOW = datetime(2000, 1, 10, tzinfo=timezone.utc)  # before every other test's data
+WINDOW = {"start_date": "1999-12-01T00:00:00Z", "end_date": "1999-12-02T00:00:00Z"}
+
+
+def _ids(response):
+    assert response.status_code == 200, response.text
+    return {item["id"] for item in response.json()}
+
+
+def test_archived_items_are_read_through_include_archived(client, unique, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_TASKS_AFTER_DAYS", 1)
+    monkeypatch.setattr(settings, "ARCHIVE_EVENTS_AFTER_DAYS", 1)
+    title = unique("task")
+    done = client.post("/api/tasks", json={"title": title, "priority": "low", "due_date": "1999-12-01"}).json()
+    client.put(f"/api/tasks/{done['id']}", json={"completed": True})
+    db = SessionLocal()
+    try:
+        completed_at = datetime(1999, 12, 1)
+        db.execute(update(Task).where(Task.id == done["id"]).values(
+            completed_at=completed_at, completed_epoch=to_epoch(completed_at),
+        ))
+        db.commit()
+    finally:
+        db.close()
+    events = {
+        kind: client.post("/api/events", json={
+            "title": unique("event"), "start_time": "1999-12-01T10:00:00Z", "end_time": "1999-12-01T11:00:00Z",
+            **extra,
+        }).json()
+        for kind, extra in (("past", {}), ("series", {"recurrence_rule": "FREQ=DAILY;COUNT=3"}))
+    }
+
+    assert archive.run_once(now=NOW) == 2
+
+    # gone from the hot tables, series excepted
+    assert client.get(f"/api/tasks/{done['id']}").status_code == 404
+    assert client.get(f"/api/events/{events['past']['id']}").status_code == 404
+    assert _ids(client.get("/api/events", params=WINDOW)) == {events["series"]["id"]}
+
+    # read back through the UNION ALL of both tables
+    assert client.get(f"/api/tasks/{done['id']}", params={"include_archived": "true"}).json()["title"] == title
+    assert done["id"] in _ids(client.get("/api/tasks", params={"include_archived": "true", "due_before": "1999-12-02"}))
+    assert _ids(client.get("/api/events", params={**WINDOW, "include_archived": "true"})) == {
+        events["past"]["id"], events["series"]["id"],
+    }
+    calendar = client.get("/api/calendar", params={"start": "1999-12-01", "end": "1999-12-01", "include_archived": "true"})
+    assert {event["id"] for event in calendar.json()["days"][0]["events"]} == {e["id"] for e in events.values()}
+
+    assert archive.run_once(now=NOW) == 0  # nothing left past the cutoff
+
+    # archived rows can still be deleted
+    assert client.delete(f"/api/tasks/{done['id']}").status_code == 204
+    assert client.get(f"/api/tasks/{done['id']}", params={"include_archived": "true"}).status_code == 404
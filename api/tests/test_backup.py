@@ -0,0 +1,54 @@
+"""Online backups and restoring them."""
+import sqlite3
+import time
+
+import pytest
+
+from app.core import backup
+from app.core.config import settings
+from app.core.database import engine
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="SQLite page snapshots")
+
+ADMIN = {"X-API-Key": settings.API_KEY}
+
+
+def _backup(client, kind):
+    job = client.post("/api/backups", params={"kind": kind}, headers=ADMIN)
+    assert job.status_code == 202, job.text
+    job_id = job.json()["id"]
+    for _ in range(200):
+        job = client.get(f"/api/backups/{job_id}", headers=ADMIN).json()
+        if job["status"] != "running":
+            break
+        time.sleep(0.05)
+    assert job["status"] == "done", job
+    return job["snapshot"]
+
+
+def _titles(path):
+    db = sqlite3.connect(path)
+    try:
+        assert db.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        return {title for (title,) in db.execute("SELECT title FROM tasks")}
+    finally:
+        db.close()
+
+
+def test_full_and_incremental_snapshots_restore(client, unique, tmp_path):
+    assert client.post("/api/backups", headers={"X-API-Key": "wrong"}).status_code == 401
+    before, after = unique("task"), unique("task")
+    client.post("/api/tasks", json={"title": before, "priority": "low"})
+    full = _backup(client, backup.FULL)
+    client.post("/api/tasks", json={"title": after, "priority": "low"})
+    incremental = _backup(client, backup.INCREMENTAL)
+
+    snapshots = {s["name"]: s for s in client.get("/api/backups", headers=ADMIN).json()["snapshots"]}
+    assert snapshots[incremental]["parent"] == full
+    assert 0 < snapshots[incremental]["changed_pages"] < snapshots[incremental]["pages"]
+
+    assert backup.restore(full, str(tmp_path / "full.db")) == 1
+    assert backup.restore(incremental, str(tmp_path / "incr.db")) == 2
+    full_titles, incremental_titles = _titles(tmp_path / "full.db"), _titles(tmp_path / "incr.db")
+    assert before in full_titles and after not in full_titles
+    assert {before, after} <= incremental_titles
@@ -0,0 +1,35 @@
+"""Batch requests."""
+
+
+def test_conditional_patch_through_batch(client):
+    date = "2026-09-01"
+    client.post("/api/daily-notes", json={"date": date, "sections": {"notes": "a"}})
+
+    read = client.post("/api/batch", json={"requests": [{"path": f"/api/daily-notes/{date}"}]}).json()["responses"][0]
+    etag = read["headers"]["etag"]
+
+    def patch(if_match, text):
+        return client.post("/api/batch", json={"requests": [{
+            "method": "PATCH",
+            "path": f"/api/daily-notes/{date}",
+            "headers": {"If-Match": if_match},
+            "body": {"sections": {"notes": text}},
+        }]}).json()["responses"][0]
+
+    patched = patch(etag, "b")
+    assert patched["status"] == 200, patched
+    assert patched["headers"]["etag"] != etag
+    assert patched["body"]["sections"]["notes"] == "b"
+
+    # the ETag read before the patch is stale now
+    assert patch(etag, "c")["status"] == 412
+    assert client.get(f"/api/daily-notes/{date}").json()["sections"]["notes"] == "b"
+
+
+def test_sub_requests_do_not_share_headers(client):
+    responses = client.post("/api/batch", json={"requests": [
+        {"method": "PATCH", "path": "/api/daily-notes/2026-09-02", "headers": {"If-Match": '"999"'}, "body": {}},
+        {"path": "/api/tasks/count"},
+    ]}).json()["responses"]
+    assert responses[0]["status"] in (404, 412)
+    assert responses[1]["status"] == 200
@@ -0,0 +1,36 @@
+"""Daily note section merging."""
+import json
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+from app.models.daily_note import DailyNote
+from app.routes.daily_notes import _merged_sections
+
+
+def _bound_values(statement, dialect) -> list:
+    """Parameters of a compiled statement as the driver would receive them."""
+    compiled = statement.compile(dialect=dialect)
+    values = []
+    for name, value in compiled.construct_params().items():
+        processor = compiled.binds[name].type._cached_bind_processor(dialect)
+        values.append(processor(value) if processor else value)
+    return values
+
+
+def test_postgres_merge_binds_json_objects():
+    dialect = postgresql.dialect()
+    statement = update(DailyNote).values(sections=_merged_sections("postgresql", {"notes": "hi"}))
+    assert "||" in str(statement.compile(dialect=dialect))
+    # objects, not JSON strings: jsonb || '"..."' would append to an array instead of merging
+    decoded = [json.loads(value) for value in _bound_values(statement, dialect) if isinstance(value, str)]
+    assert {} in decoded
+    assert {"notes": "hi"} in decoded
+
+
+def test_patch_merges_sections(client):
+    date = "2026-08-01"
+    client.post("/api/daily-notes", json={"date": date, "sections": {"notes": "a", "tasks": "b"}})
+    response = client.patch(f"/api/daily-notes/{date}", json={"sections": {"notes": "c"}})
+    assert response.status_code == 200, response.text
+    assert response.json()["sections"] == {"notes": "c", "tasks": "b"}
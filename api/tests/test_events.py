@@ -0,0 +1,101 @@
+"""Event reads: free/busy, conflicts and the calendar view."""
+from app.core import freebusy
+
+WINDOW = {"start": "2031-03-01T00:00:00Z", "end": "2031-03-02T00:00:00Z"}
+
+
+def test_freebusy_sees_a_write_after_a_cached_read(client, unique):
+    assert client.get("/api/events/freebusy", params=WINDOW).json()["busy"] == []
+    assert client.get("/api/events/freebusy", params=WINDOW).json()["busy"] == []  # served from the cache
+
+    client.post("/api/events", json={
+        "title": unique("event"), "start_time": "2031-03-01T09:00:00Z", "end_time": "2031-03-01T10:00:00Z",
+    })
+    busy = client.get("/api/events/freebusy", params=WINDOW).json()["busy"]
+    assert [[s[:16], e[:16]] for s, e in busy] == [["2031-03-01T09:00", "2031-03-01T10:00"]]
+
+
+def test_result_computed_before_an_invalidation_is_not_cached():
+    key = ("stale",)
+    computed_at = freebusy.generation()
+    freebusy.invalidate()  # a write lands while the read is querying
+    freebusy.put(key, "result read before the write", computed_at)
+    assert freebusy.get(key) is None
+
+    freebusy.put(key, "fresh", freebusy.generation())
+    assert freebusy.get(key) == "fresh"
+
+
+def _event(client, unique, start, end, **fields):
+    response = client.post("/api/events", json={"title": unique("event"), "start_time": start, "end_time": end, **fields})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_conflicts_per_slot(client, unique):
+    meeting = _event(client, unique, "2031-05-01T10:00:00Z", "2031-05-01T11:00:00Z")
+    weekly = _event(
+        client, unique, "2031-05-01T12:00:00Z", "2031-05-01T13:00:00Z", recurrence_rule="FREQ=WEEKLY;COUNT=3",
+    )
+    _event(client, unique, "2031-05-01T10:00:00Z", "2031-05-01T11:00:00Z", status="cancelled")
+
+    slots = [
+        {"start_time": "2031-05-08T12:30:00Z", "end_time": "2031-05-08T12:45:00Z"},  # second occurrence
+        {"start_time": "2031-05-01T10:30:00Z", "end_time": "2031-05-01T12:30:00Z"},  # both
+        {"start_time": "2031-05-01T11:00:00Z", "end_time": "2031-05-01T12:00:00Z"},  # touching ends only
+    ]
+    response = client.post("/api/events/conflicts", json={"slots": slots})
+    assert response.status_code == 200, response.text
+    found = [sorted(event["id"] for event in slot["conflicts"]) for slot in response.json()]
+    assert found == [[weekly["id"]], sorted([meeting["id"], weekly["id"]]), []]
+
+    response = client.post("/api/events/conflicts", json={"slots": slots[1:2], "exclude_id": meeting["id"]})
+    assert [event["id"] for event in response.json()[0]["conflicts"]] == [weekly["id"]]
+
+
+def test_check_conflicts_rejects_overlapping_writes(client, unique):
+    booked = _event(client, unique, "2031-05-02T10:00:00Z", "2031-05-02T11:00:00Z")
+    overlapping = {"title": unique("event"), "start_time": "2031-05-02T10:30:00Z", "end_time": "2031-05-02T11:30:00Z"}
+
+    response = client.post("/api/events", params={"check_conflicts": "true"}, json=overlapping)
+    assert response.status_code == 409
+    assert [event["id"] for event in response.json()["detail"]["conflicts"]] == [booked["id"]]
+    assert client.post("/api/events", json=overlapping).status_code == 201  # unchecked by default
+
+    def move(start, end):
+        return client.put(f"/api/events/{booked['id']}", params={"check_conflicts": "true"}, json={
+            "start_time": start, "end_time": end,
+        }).status_code
+
+    assert move("2031-05-02T11:00:00Z", "2031-05-02T12:00:00Z") == 409  # onto the unchecked event
+    assert move("2031-05-02T09:30:00Z", "2031-05-02T10:15:00Z") == 200  # overlapping only itself
+
+
+def test_calendar_groups_events_tasks_and_notes_per_day(client, unique):
+    overnight = _event(client, unique, "2031-06-02T22:00:00Z", "2031-06-04T00:00:00Z")  # ends at midnight
+    daily = _event(client, unique, "2031-06-01T08:00:00Z", "2031-06-01T09:00:00Z", recurrence_rule="FREQ=DAILY;COUNT=2")
+    for completed in (False, True):
+        client.post("/api/tasks", json={
+            "title": unique("task"), "priority": "low", "due_date": "2031-06-03", "completed": completed,
+        })
+    client.post("/api/daily-notes", json={"date": "2031-06-04", "sections": {"Notes": "a"}})
+
+    response = client.get("/api/calendar", params={"start": "2031-06-01", "end": "2031-06-04"})
+    assert response.status_code == 200, response.text
+    days = {day["date"]: day for day in response.json()["days"]}
+    assert list(days) == ["2031-06-01", "2031-06-02", "2031-06-03", "2031-06-04"]
+    assert {day: [event["id"] for event in days[day]["events"]] for day in days} == {
+        "2031-06-01": [daily["id"]],
+        "2031-06-02": [daily["id"], overnight["id"]],
+        "2031-06-03": [overnight["id"]],
+        "2031-06-04": [],
+    }
+    assert days["2031-06-02"]["events"][0]["start_time"].startswith("2031-06-02T08:00")
+    assert (days["2031-06-03"]["tasks_due"], days["2031-06-03"]["tasks_completed"]) == (2, 1)
+    assert [day for day in days if days[day]["has_note"]] == ["2031-06-04"]
+
+
+def test_calendar_range_is_capped(client):
+    assert client.get("/api/calendar", params={"start": "2031-01-01", "end": "2031-03-03"}).status_code == 200  # 62 days
+    assert client.get("/api/calendar", params={"start": "2031-01-01", "end": "2031-03-04"}).status_code == 400
+    assert client.get("/api/calendar", params={"start": "2031-01-02", "end": "2031-01-01"}).status_code == 400
@@ -0,0 +1,58 @@
+"""Writes from several worker processes sharing one SQLite database."""
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from app.core.database import engine
+
+# One worker process: starts the app on the shared database and creates tasks from several threads
+WORKER = textwrap.dedent("""
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    worker, count = sys.argv[1], int(sys.argv[2])
+    with TestClient(app) as client:
+        def create(i):
+            response = client.post("/api/tasks", json={"title": f"{worker}-{i}", "priority": "low", "tags": [worker]})
+            assert response.status_code == 201, response.text
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(create, range(count)))
+        assert client.get("/api/tasks/count").json()["count"] >= count
+""")
+
+WORKERS = 4
+TASKS_PER_WORKER = 40
+
+
+@pytest.mark.skipif(engine.dialect.name != "sqlite", reason="SQLite writer contention")
+def test_concurrent_writes_from_several_processes(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path}/shared.db",
+        "WEB_CONCURRENCY": str(WORKERS),
+        "VAULT_PATH": "",
+        "BACKUP_INTERVAL_SECONDS": "0",
+    }
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, f"w{n}", str(TASKS_PER_WORKER)],
+            cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        for n in range(WORKERS)
+    ]
+    outputs = [process.communicate(timeout=120)[0] for process in processes]
+
+    for process, output in zip(processes, outputs):
+        assert process.returncode == 0, output
+        assert "database is locked" not in output, output
+
+    with sqlite3.connect(tmp_path / "shared.db") as conn:
+        assert conn.execute("SELECT count(*) FROM tasks").fetchone()[0] == WORKERS * TASKS_PER_WORKER
@@ -0,0 +1,44 @@
+"""MessagePack bodies and response compression."""
+import msgpack
+
+
+def _tasks(client, unique, count=10):
+    for _ in range(count):
+        client.post("/api/tasks", json={"title": unique("task"), "priority": "low", "description": "x" * 200})
+
+
+def test_msgpack_body_when_accepted(client, task):
+    response = client.get(f"/api/tasks/{task['id']}", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == client.get(f"/api/tasks/{task['id']}").json()
+
+
+def test_json_unless_msgpack_is_accepted(client, task):
+    response = client.get(f"/api/tasks/{task['id']}", headers={"Accept": "application/msgpack;q=0, application/json"})
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+
+
+def test_large_responses_are_compressed(client, unique):
+    _tasks(client, unique)
+    for accept, expected in (("br, gzip", "br"), ("gzip", "gzip"), ("identity", None)):
+        response = client.get("/api/tasks", headers={"Accept-Encoding": accept})
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding") == expected
+        assert len(response.json()) >= 10  # decoded by the client
+
+
+def test_small_responses_are_not_compressed(client, task):
+    response = client.get(f"/api/tasks/{task['id']}", headers={"Accept-Encoding": "br, gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_websocket_msgpack_frames(client, unique):
+    with client.websocket_connect("/ws?format=msgpack") as websocket:
+        title = unique("event")
+        client.post("/api/events", json={
+            "title": title, "start_time": "2031-04-01T09:00:00Z", "end_time": "2031-04-01T10:00:00Z",
+        })
+        message = msgpack.unpackb(websocket.receive_bytes())
+    assert message["type"] == "event_created"
+    assert message["data"]["title"] == title
@@ -0,0 +1,49 @@
+"""Request profiling and span export."""
+import json
+import re
+
+from app.core import tracing
+from app.core.config import settings
+
+ADMIN = {"X-API-Key": settings.API_KEY}
+TRACE_ID, PARENT_ID = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+
+
+def test_profiling_requires_the_api_key(client, task):
+    response = client.get(f"/api/tasks/{task['id']}", params={"profile": "1"})
+    assert response.status_code == 401
+    assert client.get(f"/api/tasks/{task['id']}", headers={"X-Profile": "1"}).status_code == 401
+
+    response = client.get(f"/api/tasks/{task['id']}", params={"profile": "1"}, headers=ADMIN)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["x-profiled-status"] == "200"
+    assert response.text.startswith("GET /api/tasks/{task_id} -> 200\n")
+
+    response = client.get("/api/tasks/missing", params={"profile": "collapsed"}, headers=ADMIN)
+    assert response.headers["x-profiled-status"] == "404"
+    assert all(re.fullmatch(r"\S.* \d+", line) for line in response.text.splitlines() if line)
+
+
+def test_sampled_requests_are_exported_as_otlp_json(client, task, tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACE_FILE", str(path))
+    tracing.start()
+    try:
+        client.get(f"/api/tasks/{task['id']}", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+        client.get(f"/api/tasks/{task['id']}", headers={"traceparent": f"00-{'1' * 32}-{PARENT_ID}-00"})  # not sampled
+    finally:
+        tracing.stop()
+
+    [line] = path.read_text().splitlines()
+    [resource] = json.loads(line)["resourceSpans"]
+    assert resource["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": tracing.SERVICE_NAME}}]
+    spans = resource["scopeSpans"][0]["spans"]
+    assert {span["traceId"] for span in spans} == {TRACE_ID}
+    [root] = [span for span in spans if span["kind"] == tracing.SERVER]
+    assert root["name"] == "GET /api/tasks/{task_id}"
+    assert root["parentSpanId"] == PARENT_ID
+    assert {"key": "http.response.status_code", "value": {"intValue": "200"}} in root["attributes"]
+    queries = [span for span in spans if span["kind"] == tracing.CLIENT]
+    assert queries and all(span["parentSpanId"] == root["spanId"] for span in queries)
+    assert all(int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"]) for span in spans)
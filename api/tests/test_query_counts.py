@@ -0,0 +1,172 @@
+"""
+Statement counts per endpoint.
+
+Every endpoint is pinned to the number of SQL statements it runs, so an N+1
+loop, a reintroduced existence check or a refresh after a write fails here.
+Lists are served with several rows to make per-row queries visible. Run
+against the default single-worker configuration (no change feed rows).
+"""
+import pytest
+
+from app.core.database import engine
+
+# Counts are pinned for the SQLite writer
+pytestmark = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="SQLite statement counts")
+
+
+def statements(queries, response, status=200) -> int:
+    assert response.status_code == status, response.text
+    return len(queries.last)
+
+
+# --- Tasks ------------------------------------------------------------------
+
+def test_task_writes(client, queries, unique):
+    response = client.post("/api/tasks", json={"title": unique("t"), "priority": "low", "tags": ["a", "b"]})
+    # tag rows (one executemany), insert ... returning, day and open-task rollups
+    assert statements(queries, response, 201) == 4
+    task_id = response.json()["id"]
+
+    # plain field: one UPDATE ... RETURNING
+    assert statements(queries, client.put(f"/api/tasks/{task_id}", json={"title": "renamed"})) == 1
+    # rollup fields and tags: previous state, update, tag rows replaced (delete + insert), two rollups
+    response = client.put(f"/api/tasks/{task_id}", json={"completed": True, "tags": ["c"]})
+    assert statements(queries, response) == 6
+
+    # delete ... returning, tag rows, day rollup (a completed task has no open rollup)
+    assert statements(queries, client.delete(f"/api/tasks/{task_id}"), 204) == 3
+
+
+def test_task_reads(client, queries, unique, task):
+    for _ in range(3):
+        client.post("/api/tasks", json={"title": unique("t"), "priority": "high", "tags": ["a"]})
+    assert statements(queries, client.get("/api/tasks")) == 1
+    assert statements(queries, client.get("/api/tasks/count")) == 1
+    assert statements(queries, client.get(f"/api/tasks/{task['id']}")) == 1
+    assert statements(queries, client.get("/api/search", params={"q": "t"})) == 1
+    assert statements(queries, client.get("/api/tags")) == 1
+    # served from the in-memory index
+    assert statements(queries, client.get("/api/search/suggest", params={"prefix": "ta"})) == 0
+
+
+# --- Events -----------------------------------------------------------------
+
+def test_event_writes(client, queries, unique):
+    body = {"title": unique("e"), "start_time": "2026-04-01T10:00:00Z", "end_time": "2026-04-01T11:00:00Z", "tags": ["a"]}
+    response = client.post("/api/events", json=body)
+    # insert ... returning, tag rows, day rollup
+    assert statements(queries, response, 201) == 3
+    event_id = response.json()["id"]
+
+    # the conflict check adds the window's one-off and recurring lookups
+    body = {"title": unique("e"), "start_time": "2026-04-01T12:00:00Z", "end_time": "2026-04-01T13:00:00Z"}
+    assert statements(queries, client.post("/api/events?check_conflicts=true", json=body), 201) == 4
+
+    assert statements(queries, client.put(f"/api/events/{event_id}", json={"title": "renamed"})) == 1
+    # previous state, update, tag rows replaced (nothing to insert), rollup
+    response = client.put(f"/api/events/{event_id}", json={"start_time": "2026-04-01T09:00:00Z", "tags": []})
+    assert statements(queries, response) == 4
+    # previous state, two conflict lookups, update, rollup
+    response = client.put(f"/api/events/{event_id}?check_conflicts=true", json={"start_time": "2026-04-01T08:00:00Z"})
+    assert statements(queries, response) == 5
+
+    # delete ... returning, tag rows, rollup
+    assert statements(queries, client.delete(f"/api/events/{event_id}"), 204) == 3
+
+
+def test_event_reads(client, queries, unique, event):
+    for hour in (12, 14, 16):
+        client.post("/api/events", json={
+            "title": unique("e"),
+            "start_time": f"2026-03-02T{hour}:00:00Z",
+            "end_time": f"2026-03-02T{hour}:30:00Z",
+            "tags": ["a"],
+        })
+    assert statements(queries, client.get("/api/events")) == 1
+    assert statements(queries, client.get(f"/api/events/{event['id']}")) == 1
+    assert statements(queries, client.get("/api/events/date/2026-03-02")) == 1
+
+    # one-off and recurring events in the window; the repeat is cached
+    window = {"start": "2026-03-02T00:00:00Z", "end": "2026-03-02T23:00:00Z"}
+    assert statements(queries, client.get("/api/events/freebusy", params=window)) == 2
+    assert statements(queries, client.get("/api/events/freebusy", params=window)) == 0
+
+    slots = [{"start_time": f"2026-03-02T{hour:02d}:15:00Z", "end_time": f"2026-03-02T{hour:02d}:45:00Z"} for hour in range(9, 18)]
+    assert statements(queries, client.post("/api/events/conflicts", json={"slots": slots})) == 2
+
+
+def test_calendar_and_stats(client, queries, task, event):
+    # events (one-off, recurring), task counts, note days
+    response = client.get("/api/calendar", params={"start": "2026-03-01", "end": "2026-03-07"})
+    assert statements(queries, response) == 4
+    # task days, event days, recurring series, open tasks
+    assert statements(queries, client.get("/api/stats")) == 4
+
+
+# --- Daily notes ------------------------------------------------------------
+
+def test_daily_notes(client, queries):
+    date = "2026-05-01"
+    response = client.post("/api/daily-notes", json={"date": date, "sections": {"Notes": "hi"}})
+    assert statements(queries, response, 201) == 1
+    assert statements(queries, client.get("/api/daily-notes")) == 1
+    assert statements(queries, client.get(f"/api/daily-notes/{date}")) == 1
+
+    assert statements(queries, client.put(f"/api/daily-notes/{date}", json={"sections": {"Notes": "yo"}})) == 1
+    # one merge ... returning; content is assembled from the merged sections on read
+    response = client.patch(f"/api/daily-notes/{date}", json={"sections": {"Todo": "x"}})
+    assert statements(queries, response) == 1
+    assert response.json()["content"] == "## Notes\nyo\n\n## Todo\nx"
+    # the failed merge, then the lookup telling 404 from 412
+    response = client.patch("/api/daily-notes/2000-01-01", json={"sections": {"Todo": "x"}})
+    assert statements(queries, response, 404) == 2
+
+    assert statements(queries, client.delete(f"/api/daily-notes/{date}"), 204) == 1
+
+
+def test_today(client, queries):
+    client.delete("/api/daily-notes/" + client.get("/api/daily-notes/today").json()["date"])
+    # note lookup, open tasks, today's events, insert of the generated note
+    assert statements(queries, client.get("/api/daily-notes/today")) == 4
+    # the note exists now
+    assert statements(queries, client.get("/api/daily-notes/today")) == 1
+
+
+def test_vault_export(client, queries):
+    client.post("/api/daily-notes", json={"date": "2026-05-02", "sections": {"Notes": "a"}})
+    client.post("/api/daily-notes", json={"date": "2026-05-03", "sections": {"Notes": "b"}})
+    # changed notes, their hashes stored (one executemany) and read back, then one executemany marking them synced
+    assert statements(queries, client.post("/api/daily-notes/export-to-vault")) == 4
+    # nothing changed since
+    assert statements(queries, client.post("/api/daily-notes/export-to-vault")) == 1
+
+
+# --- Therapy companion ------------------------------------------------------
+
+def test_therapy_companion(client, queries, unique):
+    context_id, summary_id = unique("lc"), unique("ss")
+    response = client.post("/api/therapy-companion/living-context", json={
+        "id": context_id, "content": "x", "updated_at": "2026-01-01T10:00:00Z", "derived_from_session_id": "s",
+    })
+    assert statements(queries, response, 201) == 1
+    assert statements(queries, client.get("/api/therapy-companion/living-context")) == 1
+    assert statements(queries, client.get(f"/api/therapy-companion/living-context/{context_id}")) == 1
+
+    response = client.post("/api/therapy-companion/summaries", json={
+        "id": summary_id, "content": "x",
+        "generated_at": "2026-01-01T10:00:00Z", "covers_sessions_up_to": "2026-01-01T10:00:00Z",
+    })
+    assert statements(queries, response, 201) == 1
+    assert statements(queries, client.get("/api/therapy-companion/summaries")) == 1
+    assert statements(queries, client.get(f"/api/therapy-companion/summaries/{summary_id}")) == 1
+
+
+# --- Batch ------------------------------------------------------------------
+
+def test_batch_is_the_sum_of_its_requests(client, queries, task, event):
+    response = client.post("/api/batch", json={"requests": [
+        {"method": "GET", "path": "/api/tasks"},
+        {"method": "GET", "path": f"/api/events/{event['id']}"},
+        {"method": "PUT", "path": f"/api/tasks/{task['id']}", "body": {"title": "renamed"}},
+    ]})
+    assert statements(queries, response) == 3
@@ -0,0 +1,166 @@
+"""
+Query plans of the statements the endpoints run.
+
+Every SELECT, UPDATE and DELETE a request executes is EXPLAINed as it runs
+(see the queries fixture) and must not read a table with a full scan (SQLite
+``SCAN``, PostgreSQL ``Seq Scan`` with TEST_DATABASE_URL), unless
+the test names the table as an inherent scan (an unfiltered listing, a
+substring search). A new filter or a changed query without a matching index
+fails here.
+"""
+import json
+import re
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core import archive, freebusy, reminders
+from app.core.database import SessionLocal
+
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def full_scans(plan: str) -> set:
+    """Tables a plan reads with a full table scan: SQLite text, or PostgreSQL JSON."""
+    if plan.startswith("["):
+        return set(_seq_scans(json.loads(plan)))
+    return {m.group(1) for line in plan.splitlines() if (m := _FULL_SCAN.match(line.strip()))}
+
+
+def _seq_scans(node):
+    if isinstance(node, list):
+        for item in node:
+            yield from _seq_scans(item)
+    elif isinstance(node, dict):
+        if node.get("Node Type") == "Seq Scan":
+            yield node["Relation Name"]
+        for key in ("Plan", "Plans"):
+            if key in node:
+                yield from _seq_scans(node[key])
+
+
+def assert_indexed(queries, response=None, status=200, allow=()) -> None:
+    """The last request's statements use indexes, apart from scans of the `allow` tables."""
+    if response is not None:
+        assert response.status_code == status, response.text
+    assert queries.last_plans, "no statement was explained"
+    scans = [
+        f"{sql}\n    " + plan.replace("\n", "\n    ")
+        for sql, plan in queries.last_plans
+        if full_scans(plan) - set(allow)
+    ]
+    assert not scans, "full table scan:\n" + "\n\n".join(scans)
+
+
+READS = [
+    # tasks
+    ("/api/tasks", {}, {"tasks"}),  # unfiltered listing
+    ("/api/tasks", {"tag": ["a", "b"], "tag_mode": "all"}, ()),
+    ("/api/tasks", {"completed": "false", "due_after": "2026-01-05", "due_before": "2026-01-12", "sort": "due_date"}, ()),
+    ("/api/tasks", {"completed": "false", "priority": "high"}, ()),
+    ("/api/tasks", {"overdue": "true"}, ()),
+    ("/api/tasks", {"include_archived": "true", "due_after": "2026-01-05", "due_before": "2026-01-12"}, ()),
+    ("/api/tasks/count", {"completed": "false"}, ()),
+    ("/api/search", {"q": "task"}, {"tasks"}),  # substring match
+    # events
+    ("/api/events", {"start_date": "2026-01-01T00:00:00Z", "end_date": "2026-01-02T00:00:00Z"}, ()),
+    ("/api/events", {"event_type": "meeting"}, ()),
+    ("/api/events", {"status": "tentative"}, ()),
+    ("/api/events", {"tag": ["a", "b"], "tag_mode": "any"}, ()),
+    ("/api/events", {"include_archived": "true", "start_date": "2026-01-01T00:00:00Z", "end_date": "2026-01-02T00:00:00Z"}, ()),
+    ("/api/events/date/2026-01-01", {}, ()),
+    ("/api/calendar", {"start": "2026-01-01", "end": "2026-01-31"}, ()),
+    # daily notes
+    ("/api/daily-notes", {"start_date": "2026-01-01", "end_date": "2026-01-31"}, ()),
+    # tags and stats
+    ("/api/tags", {}, {"item_tags"}),  # facet counts over the whole index
+    ("/api/stats", {}, {"open_task_rollups"}),  # one row per due date and priority
+    # therapy companion
+    ("/api/therapy-companion/living-context", {"start_date": "2026-01-01", "end_date": "2026-01-31"}, ()),
+    ("/api/therapy-companion/summaries", {"start_date": "2026-01-01", "end_date": "2026-01-31"}, ()),
+]
+
+
+@pytest.mark.parametrize("path,params,allow", READS)
+def test_reads(client, queries, task, event, path, params, allow):
+    assert_indexed(queries, client.get(path, params=params), allow=allow)
+
+
+def test_item_reads(client, queries, task, event):
+    assert_indexed(queries, client.get(f"/api/tasks/{task['id']}"))
+    assert_indexed(queries, client.get(f"/api/tasks/{task['id']}", params={"include_archived": "true"}))
+    assert_indexed(queries, client.get(f"/api/events/{event['id']}"))
+    # one-off and recurring events in the window
+    freebusy.invalidate()
+    window = {"start": "2026-01-01T00:00:00Z", "end": "2026-01-01T23:00:00Z"}
+    assert_indexed(queries, client.get("/api/events/freebusy", params=window))
+    slots = [{"start_time": "2026-01-01T10:15:00Z", "end_time": "2026-01-01T10:45:00Z"}]
+    assert_indexed(queries, client.post("/api/events/conflicts", json={"slots": slots}))
+
+
+def test_task_writes(client, queries, task):
+    assert_indexed(queries, client.put(f"/api/tasks/{task['id']}", json={"completed": True, "tags": ["c"]}))
+    # deleting an id that is not live also looks in the archive
+    assert_indexed(queries, client.delete(f"/api/tasks/{task['id']}"), 204)
+    assert_indexed(queries, client.delete(f"/api/tasks/{task['id']}"), 404)
+
+
+def test_event_writes(client, queries, event):
+    response = client.put(f"/api/events/{event['id']}?check_conflicts=true", json={
+        "start_time": "2026-01-01T06:00:00Z", "end_time": "2026-01-01T07:00:00Z",
+    })
+    assert_indexed(queries, response)
+    assert_indexed(queries, client.delete(f"/api/events/{event['id']}"), 204)
+    assert_indexed(queries, client.delete(f"/api/events/{event['id']}"), 404)
+
+
+def test_daily_notes(client, queries):
+    date = "2026-07-01"
+    client.post("/api/daily-notes", json={"date": date, "sections": {"Notes": "a"}})
+    assert_indexed(queries, client.get(f"/api/daily-notes/{date}"))
+    assert_indexed(queries, client.patch(f"/api/daily-notes/{date}", json={"sections": {"Todo": "x"}}))
+    export = {"start_date": date, "end_date": date}
+    assert_indexed(queries, client.post("/api/daily-notes/export-to-vault", params=export))
+    # note lookup, open tasks due today, today's events
+    client.delete("/api/daily-notes/" + client.get("/api/daily-notes/today").json()["date"])
+    assert_indexed(queries, client.get("/api/daily-notes/today"))
+
+
+def test_therapy_companion(client, queries, unique):
+    context_id, summary_id = unique("lc"), unique("ss")
+    client.post("/api/therapy-companion/living-context", json={
+        "id": context_id, "content": "x", "updated_at": "2026-01-01T10:00:00Z", "derived_from_session_id": "s",
+    })
+    client.post("/api/therapy-companion/summaries", json={
+        "id": summary_id, "content": "x",
+        "generated_at": "2026-01-01T10:00:00Z", "covers_sessions_up_to": "2026-01-01T10:00:00Z",
+    })
+    assert_indexed(queries, client.get(f"/api/therapy-companion/living-context/{context_id}"))
+    assert_indexed(queries, client.get(f"/api/therapy-companion/summaries/{summary_id}"))
+
+
+def test_background_jobs(client, queries, task, event):
+    db = SessionLocal()
+    try:
+        with queries.job():
+            reminders.ReminderScheduler().load(db)
+    finally:
+        db.close()
+    assert_indexed(queries)
+
+    # a cutoff long ago: the candidate lookups run, nothing is moved
+    with queries.job():
+        archive.run_once(now=datetime(2000, 1, 1, tzinfo=timezone.utc))
+    assert_indexed(queries)
+
+
+def test_postgres_plans_are_read_from_json():
+    plan = json.dumps([{"Plan": {
+        "Node Type": "Hash Join",
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "tasks"},
+            {"Node Type": "Index Scan", "Relation Name": "item_tags", "Index Name": "ix_item_tags_tag"},
+        ],
+    }}])
+    assert full_scans(plan) == {"tasks"}
+    assert full_scans("SEARCH tasks USING INDEX ix_tasks_due_date (due_date>?)\nSCAN item_tags") == {"item_tags"}
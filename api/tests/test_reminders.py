@@ -0,0 +1,88 @@
+"""Reminder scheduling and delivery."""
+from datetime import datetime, timedelta
+
+from app.core.reminders import DELIVERY_GRACE, EventSnapshot, ReminderScheduler, scheduler
+
+NOW = datetime(2031, 7, 1, 9, 0)
+
+
+def _snapshot(event_id, start, offsets=(10,), rule=None):
+    return EventSnapshot(event_id, event_id, start, start + timedelta(hours=1), rule, None, offsets)
+
+
+def _fired(reminders, now):
+    return [(event.id, minutes, start) for event, minutes, start, _ in reminders.pop_due(now)]
+
+
+def test_reminders_fire_in_time_order():
+    reminders = ReminderScheduler()
+    reminders.schedule(_snapshot("late", NOW + timedelta(hours=2), offsets=(10, 60)), now=NOW)
+    reminders.schedule(_snapshot("soon", NOW + timedelta(minutes=30)), now=NOW)
+    reminders.schedule(_snapshot("past", NOW - timedelta(hours=1)), now=NOW)  # nothing left to fire
+    assert len(reminders) == 3
+
+    assert _fired(reminders, NOW + timedelta(minutes=19)) == []
+    assert _fired(reminders, NOW + timedelta(minutes=20)) == [("soon", 10, NOW + timedelta(minutes=30))]
+    assert _fired(reminders, NOW + timedelta(minutes=61)) == [("late", 60, NOW + timedelta(hours=2))]
+    assert len(reminders) == 1
+
+
+def test_reminders_missed_by_more_than_the_grace_are_dropped():
+    reminders = ReminderScheduler()
+    reminders.schedule(_snapshot("missed", NOW + timedelta(minutes=30)), now=NOW)
+    assert _fired(reminders, NOW + timedelta(minutes=20) + DELIVERY_GRACE + timedelta(seconds=1)) == []
+    assert len(reminders) == 0
+
+
+def test_rescheduled_and_deleted_events_drop_stale_entries():
+    reminders = ReminderScheduler()
+    reminders.schedule(_snapshot("moved", NOW + timedelta(minutes=30)), now=NOW)
+    reminders.schedule(_snapshot("deleted", NOW + timedelta(minutes=30)), now=NOW)
+    reminders.schedule(_snapshot("moved", NOW + timedelta(hours=3)), now=NOW)
+    reminders.unschedule("deleted")
+    assert len(reminders) == 1
+
+    assert _fired(reminders, NOW + timedelta(hours=1)) == []  # both old entries are skipped
+    assert _fired(reminders, NOW + timedelta(hours=2, minutes=50)) == [("moved", 10, NOW + timedelta(hours=3))]
+
+
+def test_recurring_event_schedules_its_next_occurrence():
+    reminders = ReminderScheduler()
+    reminders.schedule(_snapshot("daily", NOW + timedelta(minutes=30), rule="FREQ=DAILY;COUNT=2"), now=NOW)
+    assert _fired(reminders, NOW + timedelta(minutes=20)) == [("daily", 10, NOW + timedelta(minutes=30))]
+    assert len(reminders) == 1
+    assert _fired(reminders, NOW + timedelta(days=1, minutes=20)) == [
+        ("daily", 10, NOW + timedelta(days=1, minutes=30)),
+    ]
+    assert len(reminders) == 0
+
+
+def test_event_writes_keep_the_scheduler_current(client, unique):
+    start = datetime.utcnow() + timedelta(days=30)
+    pending = len(scheduler)
+    event = client.post("/api/events", json={
+        "title": unique("event"),
+        "start_time": start.isoformat() + "Z",
+        "end_time": (start + timedelta(hours=1)).isoformat() + "Z",
+        "reminders": [{"minutes_before": 10}, {"minutes_before": 60}],
+    }).json()
+    assert len(scheduler) == pending + 2
+
+    client.put(f"/api/events/{event['id']}", json={"reminders": [{"minutes_before": 5}]})
+    assert len(scheduler) == pending + 1
+    client.delete(f"/api/events/{event['id']}")
+    assert len(scheduler) == pending
+
+
+def test_due_reminder_is_delivered_over_the_websocket(client, unique):
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(minutes=1, seconds=1)
+    with client.websocket_connect("/ws") as websocket:
+        event = client.post("/api/events", json={
+            "title": unique("event"),
+            "start_time": start.isoformat() + "Z",
+            "end_time": (start + timedelta(hours=1)).isoformat() + "Z",
+            "reminders": [{"minutes_before": 1}],
+        }).json()
+        messages = {message["type"]: message["data"] for message in (websocket.receive_json(), websocket.receive_json())}
+    assert messages["reminder_due"]["event_id"] == event["id"]  # due within a second
+    assert messages["reminder_due"]["minutes_before"] == 1
@@ -0,0 +1,19 @@
+"""Stats read from the rollups."""
+from datetime import datetime, timezone
+
+
+def test_deleted_events_leave_no_event_hours(client):
+    today = datetime.now(timezone.utc).date()
+    event = client.post("/api/events", json={
+        "title": "standup",
+        "start_time": f"{today}T09:00:00Z",
+        "end_time": f"{today}T09:30:00Z",
+        "event_type": "stats-test",
+    }).json()
+    buckets = client.get("/api/stats", params={"range": "1d"}).json()["buckets"]
+    assert buckets[-1]["event_hours"]["stats-test"] == 0.5
+
+    # the rollup row drops back to zero but stays in the table
+    assert client.delete(f"/api/events/{event['id']}").status_code == 204
+    buckets = client.get("/api/stats", params={"range": "1d"}).json()["buckets"]
+    assert "stats-test" not in buckets[-1]["event_hours"]
@@ -0,0 +1,35 @@
+"""Typeahead suggestions."""
+
+
+def _suggest(client, prefix, **params):
+    response = client.get("/api/search/suggest", params={"prefix": prefix, **params})
+    assert response.status_code == 200, response.text
+    return [(s["text"], s["kind"], s["fuzzy"]) for s in response.json()]
+
+
+def test_prefix_and_typo_matches(client):
+    task = client.post("/api/tasks", json={"title": "Marzipan degustation", "priority": "low", "tags": ["marzipanery"]}).json()
+    client.post("/api/events", json={
+        "title": "Bakery visit", "location": "Marzipan museum",
+        "start_time": "2031-08-01T10:00:00Z", "end_time": "2031-08-01T11:00:00Z",
+    })
+
+    assert sorted(_suggest(client, "marzip")) == [
+        ("Marzipan degustation", "task", False),
+        ("Marzipan museum", "location", False),
+        ("marzipanery", "tag", False),
+    ]
+    assert _suggest(client, "degus", kind="task") == [("Marzipan degustation", "task", False)]  # any word
+    assert ("Marzipan degustation", "task", True) in _suggest(client, "mrazipan")  # transposition
+    assert ("Marzipan degustation", "task", True) in _suggest(client, "marzepan")  # substitution
+    assert _suggest(client, "mxrzxpan", kind="task") == [("Marzipan degustation", "task", True)]  # two edits
+    assert _suggest(client, "mxrzxpxn") == []  # three
+
+    [suggestion] = client.get("/api/search/suggest", params={"prefix": "marzipan d"}).json()
+    assert suggestion["item_id"] == task["id"]
+
+    client.put(f"/api/tasks/{task['id']}", json={"title": "Nougat degustation"})
+    assert _suggest(client, "marzip", kind="task") == []
+    assert _suggest(client, "noug") == [("Nougat degustation", "task", False)]
+    client.delete(f"/api/tasks/{task['id']}")
+    assert _suggest(client, "noug") == []
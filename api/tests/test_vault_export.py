@@ -0,0 +1,26 @@
+"""Exporting daily notes to the vault."""
+import os
+
+from app.core.config import settings
+from app.core.vault_watch import VaultWatcher
+from app.routes.daily_notes import VAULT_SUBDIR_DAILY
+
+
+def test_export_keeps_version_and_is_not_ingested_back(client):
+    date = "2026-06-01"
+    created = client.post("/api/daily-notes", json={"date": date, "sections": {"notes": "exported"}})
+    etag = created.headers.get("etag") or client.get(f"/api/daily-notes/{date}").headers["etag"]
+
+    result = client.post("/api/daily-notes/export-to-vault", params={"start_date": date, "end_date": date}).json()
+    assert result["exported"] == 1
+    assert os.path.exists(os.path.join(settings.VAULT_PATH, VAULT_SUBDIR_DAILY, f"{date}.md"))
+
+    note = client.get(f"/api/daily-notes/{date}")
+    assert note.json()["obsidian_synced"] is True
+    assert note.headers["etag"] == etag
+    # the file is our own write
+    watcher = VaultWatcher(settings.VAULT_PATH, VAULT_SUBDIR_DAILY)
+    assert watcher.ingest([f"{date}.md"]) == 0
+
+    response = client.put(f"/api/daily-notes/{date}", json={"sections": {"notes": "edited"}}, headers={"If-Match": etag})
+    assert response.status_code == 200, response.text
@@ -0,0 +1,42 @@
+"""Ingesting daily notes edited in the vault."""
+import os
+
+from app.core.config import settings
+from app.core.daily_note_format import assemble_content
+from app.core.vault_watch import VaultWatcher
+from app.routes.daily_notes import VAULT_SUBDIR_DAILY
+
+
+def test_changed_files_are_ingested_once(client):
+    watcher = VaultWatcher(settings.VAULT_PATH, VAULT_SUBDIR_DAILY)
+    os.makedirs(watcher.folder, exist_ok=True)
+    watcher.catch_up()
+    name = "2031-09-01.md"
+    path = os.path.join(watcher.folder, name)
+
+    def edit(sections, mtime):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(assemble_content(sections))
+        os.utime(path, (mtime, mtime))
+
+    edit({"notes": "written in the vault"}, 2_000_000_000)
+    with open(os.path.join(watcher.folder, "scratch.md"), "w") as f:
+        f.write("not a daily note")
+    assert watcher.poll() == [name]
+    assert watcher.ingest([name]) == 1
+    note = client.get("/api/daily-notes/2031-09-01").json()
+    assert note["sections"]["notes"] == "written in the vault"
+
+    assert watcher.poll() == []  # mtime and size unchanged: not even read
+    assert watcher.ingest([name]) == 0  # same content hash
+
+    edit({"notes": "written in the vault"}, 2_000_000_100)  # touched, not changed
+    assert watcher.poll() == [name]
+    assert watcher.ingest([name]) == 0
+
+    edit({"notes": "edited again", "tasks": "- [ ] x"}, 2_000_000_200)
+    assert watcher.poll() == [name]
+    assert watcher.ingest([name]) == 1
+    edited = client.get("/api/daily-notes/2031-09-01").json()
+    assert (edited["sections"]["notes"], edited["sections"]["tasks"]) == ("edited again", "- [ ] x")
+    assert edited["version"] == note["version"] + 1